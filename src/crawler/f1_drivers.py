@@ -1,4 +1,3 @@
-from bs4 import BeautifulSoup
 import aiohttp
 import asyncio
 import sys
@@ -15,7 +14,9 @@ logger = logging.getLogger(__name__)
 
 PROJECT_ROOT = os.getcwd()
 sys.path.append(PROJECT_ROOT)
-from src.utils.crawling_helpers import ssl_context, head, base_url, years
+from src.utils.crawling_helpers import create_session, fetch_soup, write_crawl_telemetry, base_url, years
+from src.utils.raw_storage import write_raw_json, close_raw_storage
+from src.utils.date_ranges import parse_date
 
 DATA_DIR = os.path.join(PROJECT_ROOT, "data", "f1_drivers_data")
 os.makedirs(DATA_DIR, exist_ok=True)
@@ -26,148 +27,148 @@ async def scrape_drivers_standing(session, year):
     """Scrape driver standings for a specific year (2025+ structure, simplified output)"""
     url = f"{base_url}/en/results/{year}/drivers"
 
-    async with session.get(url, headers=head) as response:
-        if response.status != 200:
-            print(f"Failed to load {url}. Status: {response.status}")
-            return [], [], []
-
-        html = await response.text()
-        soup = BeautifulSoup(html, 'lxml')
-
-        table = soup.find('table', class_='Table-module_table__cKsW2')
-        headers = [th.get_text(strip=True).replace('.', '') for th in table.find('thead').find_all('th')]
-
-        if not table:
-            return [], [], []
-
-        headers = [th.get_text(strip=True).replace('.', '') for th in table.find('thead').find_all('th')]
-        # headers = ["Pos", "Driver", "Nationality", "Car", "Pts", "Year"]
-        data = []
-        driver_links = []
-
-        for row in table.find('tbody').find_all('tr'):
-            cols = row.find_all('td')
-            if len(cols) < 5:
-                continue
-
-            # Position
-            pos = cols[0].text.strip()
-
-            # Driver Name
-            driver_a = cols[1].find('a')
-            name = ""
-            if driver_a:
-                full_text = driver_a.get_text(separator=" ", strip=True)
-                name = re.sub(r'\b[A-Z]{3}\b', '', full_text)
-                name = " ".join(dict.fromkeys(name.split()))
-                name = re.sub(r'\s+', ' ', name.replace('\u00a0', ' ')).strip()
-
-            # Nationality (SVG title, clean like teams)
-            nationality_td = cols[2]
-            nationality = nationality_td.text.strip()
-            svg_title = nationality_td.find('svg')
-            if svg_title:
-                title_tag = svg_title.find('title')
-                if title_tag:
-                    nationality = title_tag.text.strip()
-                    if nationality.lower().startswith("flag of "):
-                        nationality = nationality[8:].strip()
-
-            # Team Name
-            team_a = cols[3].find('a')
-            team_name = team_a.text.strip() if team_a else ""
-
-            # Points
-            points = cols[4].text.strip()
-
-            # Year
-            year_str = str(year)
-
-            data.append([
-                pos, name, nationality, team_name, points, year_str
-            ])
-
-            # For detailed scraping (if needed elsewhere)
-            if driver_a and driver_a['href']:
-                driver_href = driver_a['href']
-                profile_url = urljoin(base_url, driver_href)
-                driver_links.append((name, profile_url, year))
-
-        return data, headers, driver_links
+    status, soup = await fetch_soup(session, url, "drivers", "driver_standings")
+    if status != 200:
+        print(f"Failed to load {url}. Status: {status}")
+        return [], [], []
+
+    table = soup.find('table', class_='Table-module_table__cKsW2')
+    if not table:
+        return [], [], []
+
+    headers = [th.get_text(strip=True).replace('.', '') for th in table.find('thead').find_all('th')]
+    # headers = ["Pos", "Driver", "Nationality", "Car", "Pts", "Year"]
+    data = []
+    driver_links = []
+
+    for row in table.find('tbody').find_all('tr'):
+        cols = row.find_all('td')
+        if len(cols) < 5:
+            continue
+
+        # Position
+        pos = cols[0].text.strip()
+
+        # Driver Name
+        driver_a = cols[1].find('a')
+        name = ""
+        if driver_a:
+            full_text = driver_a.get_text(separator=" ", strip=True)
+            name = re.sub(r'\b[A-Z]{3}\b', '', full_text)
+            name = " ".join(dict.fromkeys(name.split()))
+            name = re.sub(r'\s+', ' ', name.replace('\u00a0', ' ')).strip()
+
+        # Nationality (SVG title, clean like teams)
+        nationality_td = cols[2]
+        nationality = nationality_td.text.strip()
+        svg_title = nationality_td.find('svg')
+        if svg_title:
+            title_tag = svg_title.find('title')
+            if title_tag:
+                nationality = title_tag.text.strip()
+                if nationality.lower().startswith("flag of "):
+                    nationality = nationality[8:].strip()
+
+        # Team Name
+        team_a = cols[3].find('a')
+        team_name = team_a.text.strip() if team_a else ""
+
+        # Points
+        points = cols[4].text.strip()
+
+        # Year
+        year_str = str(year)
+
+        data.append([
+            pos, name, nationality, team_name, points, year_str
+        ])
+
+        # For detailed scraping (if needed elsewhere)
+        if driver_a and driver_a['href']:
+            driver_href = driver_a['href']
+            profile_url = urljoin(base_url, driver_href)
+            driver_links.append((name, profile_url, year))
+
+    return data, headers, driver_links
 
 async def scrape_driver_results(session, driver_url):
     """Scrape detailed information for a specific driver (new F1.com table format)"""
-    async with session.get(driver_url, headers=head) as response:
-        if response.status != 200:
-            print(f"Failed to load {driver_url}. Status: {response.status}")
-            return None, None, None
-
-        html = await response.text()
-        soup = BeautifulSoup(html, 'lxml')
-
-        # Extract driver code from URL
-        url_parts = driver_url.split('/')
-        driver_code = url_parts[-2] if len(url_parts) > 2 else None
-
-        # Get the race results table
-        table = soup.find('table', class_='Table-module_table__cKsW2')
-        if not table:
-            print(f"No results table found for {driver_url}")
-            return [], [], driver_code
-
-        # Get headers automatically, but since format changed, we keep the old format
-        # headers = []
-        # for th in table.find('thead').find_all('th'):
-        #     p = th.find('p')
-        #     headers.append(p.text.strip() if p else th.text.strip())
-        headers = [th.get_text(strip=True).replace('.', '') for th in table.find('thead').find_all('th')]
-
-        # Get race results
-        rows = table.find('tbody').find_all('tr')
-        data = []
-
-        # Extract year from URL (e.g. .../2025/drivers/...)
-        year = None
-        m = re.search(r'/(\d{4})/', driver_url)
-        if m:
-            year = m.group(1)
-
-        for row in rows:
-            cols = row.find_all('td')
-            row_data = []
-            for idx, col in enumerate(cols):
-                # For "GRAND PRIX", get the text from the <a> tag only
-                if idx == 0:
-                    a = col.find('a')
-                    if a:
-                        grand_prix = ""
-                        for content in reversed(a.contents):
-                            if isinstance(content, str) and content.strip():
-                                grand_prix = content.strip()
-                                break
-                        row_data.append(grand_prix)
-                    else:
-                        row_data.append(col.get_text(strip=True))
-                # For "TEAM", get the text from the <a> tag if present
-                elif idx == 2:
-                    a = col.find('a')
-                    row_data.append(a.get_text(strip=True) if a else col.get_text(strip=True))
-                # For "Date", only keep "27 May" (not year)
-                elif idx == 1:
-                    p = col.find('p')
-                    date_text = p.text.strip() if p else col.get_text(strip=True)
-                    # Add the year (from your variable) to the date
-                    date_with_year = f"{date_text} {year}"
-                    row_data.append(date_with_year)
+    status, soup = await fetch_soup(session, driver_url, "drivers", "driver_results")
+    if status != 200:
+        print(f"Failed to load {driver_url}. Status: {status}")
+        return None, None, None
+
+    # Extract driver code from URL
+    url_parts = driver_url.split('/')
+    driver_code = url_parts[-2] if len(url_parts) > 2 else None
+
+    # Get the race results table
+    table = soup.find('table', class_='Table-module_table__cKsW2')
+    if not table:
+        print(f"No results table found for {driver_url}")
+        return [], [], driver_code
+
+    # Get headers automatically, but since format changed, we keep the old format
+    # headers = []
+    # for th in table.find('thead').find_all('th'):
+    #     p = th.find('p')
+    #     headers.append(p.text.strip() if p else th.text.strip())
+    headers = [th.get_text(strip=True).replace('.', '') for th in table.find('thead').find_all('th')]
+
+    # Get race results
+    rows = table.find('tbody').find_all('tr')
+    data = []
+
+    # Extract year from URL (e.g. .../2025/drivers/...)
+    year = None
+    m = re.search(r'/(\d{4})/', driver_url)
+    if m:
+        year = m.group(1)
+
+    unparsed_dates = 0
+    for row in rows:
+        cols = row.find_all('td')
+        row_data = []
+        for idx, col in enumerate(cols):
+            # For "GRAND PRIX", get the text from the <a> tag only
+            if idx == 0:
+                a = col.find('a')
+                if a:
+                    grand_prix = ""
+                    for content in reversed(a.contents):
+                        if isinstance(content, str) and content.strip():
+                            grand_prix = content.strip()
+                            break
+                    row_data.append(grand_prix)
                 else:
-                    p = col.find('p')
-                    row_data.append(p.text.strip() if p else col.get_text(strip=True))
-            # Add year as last column
-            row_data.append(year)
-            data.append(row_data)
+                    row_data.append(col.get_text(strip=True))
+            # For "TEAM", get the text from the <a> tag if present
+            elif idx == 2:
+                a = col.find('a')
+                row_data.append(a.get_text(strip=True) if a else col.get_text(strip=True))
+            # "Date" only shows "27 May"; stored as an ISO date of the season, like the races dimension
+            elif idx == 1:
+                p = col.find('p')
+                # Nested <p> tags are split by the parser, leaving the first one empty
+                date_text = (p.text.strip() if p else '') or col.get_text(strip=True)
+                date_with_year = f"{date_text} {year}"
+                try:
+                    row_data.append(parse_date(date_with_year).isoformat())
+                except ValueError:
+                    # Keep what the page showed
+                    unparsed_dates += 1
+                    row_data.append(date_with_year)
+            else:
+                p = col.find('p')
+                row_data.append(p.text.strip() if p else col.get_text(strip=True))
+        # Add year as last column
+        row_data.append(year)
+        data.append(row_data)
+
+    if unparsed_dates:
+        logger.warning(f"{unparsed_dates} of {len(rows)} result dates in {driver_url} could not be parsed")
+    return data, headers, driver_code
 
-        return data, headers, driver_code
-    
 async def process_driver_data(session, driver_link_tuple):
     """Process a driver link to get detailed information"""
     driver_name, url = driver_link_tuple
@@ -195,9 +196,7 @@ async def collect_driver_links():
     headers_drivers = []
     drivers = []
     
-    connector = aiohttp.TCPConnector(ssl=ssl_context)
-    
-    async with aiohttp.ClientSession(connector=connector) as session:          
+    async with create_session() as session:          
         tasks = [scrape_drivers_standing(session, year) for year in years]
         results = await asyncio.gather(*tasks)
     
@@ -213,93 +212,86 @@ async def collect_driver_links():
             "headers": headers_drivers,
             "drivers": drivers
         }    
-        with open(os.path.join(DATA_DIR, "race_standing.json"), 'w', encoding='utf-8') as f:
-            json.dump(drivers_data, f, indent=2, ensure_ascii=False)
+        write_raw_json(os.path.join(DATA_DIR, "race_standing.json"), drivers_data)
         
         logger.info(f"Saved {len(drivers)} driver standings to race_standing.json")
                 
         return all_driver_links, headers_drivers, drivers
 
 async def scrape_driver_profile(session, driver_name, profile_url):
-    async with session.get(profile_url, headers=head) as response:
-        if response.status != 200:
-            print(f"Driver profile not found: {profile_url}. Status: {response.status}")
-            return None, None
-
-        html = await response.text()
-        soup = BeautifulSoup(html, 'lxml')
+    status, soup = await fetch_soup(session, profile_url, "drivers", "driver_profile")
+    if status != 200:
+        print(f"Driver profile not found: {profile_url}. Status: {status}")
+        return None
 
-        profile = {
-            "profile_url": profile_url,
-        }
+    profile = {
+        "profile_url": profile_url,
+    }
 
-        # --- Name ---
-        h1 = soup.find('h1')
-        if h1:
-            spans = h1.find_all('span', recursive=False)
-            if len(spans) == 2:
-                first_name = spans[0].get_text(strip=True)
-                last_name = spans[1].get_text(strip=True)
-                profile["name"] = f"{first_name} {last_name}"
-            else:
-                profile["name"] = h1.get_text(strip=True)
-
-        # --- Nationality ---
-        nationality = ""
-        p_tags = soup.find_all("p", class_="typography-module_body-xs-semibold__Fyfwn typography-module_lg_body-s-compact-semibold__cpAmk")
-        for p in p_tags:
-            # Check if the parent contains a <svg> with role="presentation" (the flag)
-            if p.find_previous_sibling("svg", role="presentation"):
-                nationality = p.get_text(strip=True)
-                break
-        profile["nationality"] = nationality
-
-        # --- Image ---
-        img_url = ""
-        img_tag = soup.find("img", class_=lambda c: c and any(x in c for x in ["w-[222px]", "md:w-[305px]", "lg:w-[360px]"]))
-        if img_tag and img_tag.get("src"):
-            img_url = img_tag["src"]
-        profile["image_url"] = img_url
-
-        # --- All <dl> blocks (driver info, stats, biography) ---
-        for dl in soup.find_all('dl', class_="DataGrid-module_dataGrid__Zk5Y8"):
-            for div in dl.find_all('div', class_='DataGrid-module_item__cs9Zd'):
-                dt = div.find('dt')
-                dd = div.find('dd')
-                if dt and dd:
-                    key = dt.text.strip().lower().replace(' ', '_')
-                    value = dd.text.strip()
-                    profile[key] = value
-                    
-        return profile
+    # --- Name ---
+    h1 = soup.find('h1')
+    if h1:
+        spans = h1.find_all('span', recursive=False)
+        if len(spans) == 2:
+            first_name = spans[0].get_text(strip=True)
+            last_name = spans[1].get_text(strip=True)
+            profile["name"] = f"{first_name} {last_name}"
+        else:
+            profile["name"] = h1.get_text(strip=True)
+
+    # --- Nationality ---
+    nationality = ""
+    p_tags = soup.find_all("p", class_="typography-module_body-xs-semibold__Fyfwn typography-module_lg_body-s-compact-semibold__cpAmk")
+    for p in p_tags:
+        # Check if the parent contains a <svg> with role="presentation" (the flag)
+        if p.find_previous_sibling("svg", role="presentation"):
+            nationality = p.get_text(strip=True)
+            break
+    profile["nationality"] = nationality
+
+    # --- Image ---
+    img_url = ""
+    img_tag = soup.find("img", class_=lambda c: c and any(x in c for x in ["w-[222px]", "md:w-[305px]", "lg:w-[360px]"]))
+    if img_tag and img_tag.get("src"):
+        img_url = img_tag["src"]
+    profile["image_url"] = img_url
+
+    # --- All <dl> blocks (driver info, stats, biography) ---
+    for dl in soup.find_all('dl', class_="DataGrid-module_dataGrid__Zk5Y8"):
+        for div in dl.find_all('div', class_='DataGrid-module_item__cs9Zd'):
+            dt = div.find('dt')
+            dd = div.find('dd')
+            if dt and dd:
+                key = dt.text.strip().lower().replace(' ', '_')
+                value = dd.text.strip()
+                profile[key] = value
+                
+    return profile
 
-        # This returns headers and data 
-        # return list(profile.keys()), list(profile.values()) 
+    # This returns headers and data 
+    # return list(profile.keys()), list(profile.values()) 
 
 async def collect_current_driver_profiles(current_year=years[-1]):
     """Collect detailed profiles for current season drivers from the main drivers page"""
-    connector = aiohttp.TCPConnector(ssl=ssl_context)
     timeout = aiohttp.ClientTimeout(total=60)
 
-    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+    async with create_session(timeout=timeout) as session:
         # --- Get current season driver profile links from /en/drivers.html ---
         url = f"{base_url}/en/drivers.html"
-        async with session.get(url, headers=head) as response:
-            if response.status != 200:
-                print(f"Failed to load {url}. Status: {response.status}")
-                return [], []
-
-            html = await response.text()
-            soup = BeautifulSoup(html, 'lxml')
-            driver_links = []
-            for a in soup.find_all('a', attrs={'data-f1rd-a7s-click': 'driver_card_click'}):
-                # Get the full name from the card (first and last name)
-                name_parts = a.find_all('p')
-                driver_name = " ".join([p.text.strip() for p in name_parts])
-                href = a.get('href')
-                if href:
-                    profile_url = urljoin(base_url, href)
-                    driver_links.append((driver_name, profile_url))
+        status, soup = await fetch_soup(session, url, "drivers", "drivers_listing")
+        if status != 200:
+            print(f"Failed to load {url}. Status: {status}")
+            return [], []
+
+        driver_links = []
+        for a in soup.find_all('a', attrs={'data-f1rd-a7s-click': 'driver_card_click'}):
+            # Get the full name from the card (first and last name)
+            name_parts = a.find_all('p')
+            driver_name = " ".join([p.text.strip() for p in name_parts])
+            href = a.get('href')
+            if href:
+                profile_url = urljoin(base_url, href)
+                driver_links.append((driver_name, profile_url))
 
         # --- Process each driver profile ---
         driver_profiles = []
@@ -330,7 +322,6 @@ async def collect_current_driver_profiles(current_year=years[-1]):
 
 async def scrape_f1_driver_data(all_driver_links):
     """Scrape all F1 driver data organized by year"""
-    connector = aiohttp.TCPConnector(ssl=ssl_context)
     
     # Create a longer timeout
     timeout = aiohttp.ClientTimeout(total=60)
@@ -344,7 +335,7 @@ async def scrape_f1_driver_data(all_driver_links):
             driver_links_by_year[year] = []
         driver_links_by_year[year].append((name, url))
     
-    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+    async with create_session(timeout=timeout) as session:
         # Process driver standings checkpoints
         logger.info("Processing driver standings...")
         standings_results = []
@@ -354,7 +345,6 @@ async def scrape_f1_driver_data(all_driver_links):
         for year, year_links in driver_links_by_year.items():
             # Create directory for the year
             year_dir = os.path.join(DATA_DIR, str(year))
-            os.makedirs(year_dir, exist_ok=True)
             
             # print(f"Processing {len(year_links)} drivers for year {year}")
             
@@ -375,8 +365,7 @@ async def scrape_f1_driver_data(all_driver_links):
                     driver_name = result['name'].lower().replace(' ', '_')
                     driver_file = os.path.join(year_dir, f"{driver_name}.json")
                     
-                    with open(driver_file, 'w', encoding='utf-8') as f:
-                        json.dump(result, f, indent=2, ensure_ascii=False)
+                    write_raw_json(driver_file, result)
                         
                     results_processed += 1
                 
@@ -389,6 +378,7 @@ async def scrape_f1_driver_data(all_driver_links):
             
             # print(f"Processed {results_processed} drivers for year {year}")
     
+    close_raw_storage()
     end_time = time.time()
     total_time = end_time - start_time
     
@@ -433,6 +423,7 @@ async def scrape_driver_async():
 def main():
     """Main entry point for the driver scraping script"""
     asyncio.run(scrape_driver_async())
+    write_crawl_telemetry()
     
 if __name__ == "__main__":
     main()
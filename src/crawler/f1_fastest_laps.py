@@ -1,4 +1,3 @@
-from bs4 import BeautifulSoup
 import aiohttp
 import asyncio
 import os
@@ -12,7 +11,7 @@ logger = logging.getLogger(__name__)
 
 PROJECT_ROOT = os.getcwd()
 sys.path.append(PROJECT_ROOT)
-from src.utils.crawling_helpers import ssl_context, head, base_url, years
+from src.utils.crawling_helpers import create_session, fetch_soup, write_crawl_telemetry, base_url, years
 
 DATA_DIR = os.path.join(PROJECT_ROOT, "data", "f1_fastest_laps")
 os.makedirs(DATA_DIR, exist_ok=True)
@@ -23,67 +22,63 @@ async def scrape_fastest_laps(session, year):
     """Scrape fastest lap data for a specific year (new 2025+ format)"""
     url = f"{base_url}/en/results/{year}/awards/fastest-laps"
 
-    async with session.get(url, headers=head) as response:
-        if response.status != 200:
-            logger.info(f"Failed to load {url}. Status: {response.status}")
-            return None
+    status, soup = await fetch_soup(session, url, "fastest_laps", "fastest_laps")
+    if status != 200:
+        logger.info(f"Failed to load {url}. Status: {status}")
+        return None
 
-        html = await response.text()
-        soup = BeautifulSoup(html, 'lxml')
+    # Find the awards table by id
+    table_wrapper = soup.find('div', id='awards-table')
+    if not table_wrapper:
+        print(f"No awards table found for {year}")
+        return None
+    table = table_wrapper.find('table')
+    if not table:
+        print(f"No fastest lap data found for {year}")
+        return None
 
-        # Find the awards table by id
-        table_wrapper = soup.find('div', id='awards-table')
-        if not table_wrapper:
-            print(f"No awards table found for {year}")
-            return None
-        table = table_wrapper.find('table')
-        if not table:
-            print(f"No fastest lap data found for {year}")
-            return None
+    # Get headers from <th>
+    headers = [th.text.strip() for th in table.find('thead').find_all('th')]
 
-        # Get headers from <th>
-        headers = [th.text.strip() for th in table.find('thead').find_all('th')]
+    # Get rows
+    rows = table.find('tbody').find_all('tr')
+    data = []
+    for row in rows:
+        cols = row.find_all('td')
+        row_data = []
+        # 1. Grand Prix name
+        gp_cell = cols[0]
+        a_tag = gp_cell.find('a')
+        if a_tag:
+            # Get only the text after the SVG (the Grand Prix name)
+            texts = [t for t in a_tag.stripped_strings if not t.startswith("Flag of")]
+            gp_name = " ".join(texts)
+            row_data.append(gp_name)
+        else:
+            row_data.append(gp_cell.text.strip())
+        # 2. Winner name
+        winner_cell = cols[1]
+        first_name = winner_cell.find('span', class_='max-lg:hidden')
+        last_name = winner_cell.find('span', class_='max-md:hidden')
+        if first_name and last_name:
+            winner = f"{first_name.text.strip()} {last_name.text.strip()}"
+        else:
+            winner = winner_cell.get_text(strip=True)
+        row_data.append(winner)
+        # 3. Time
+        time_cell = cols[2]
+        time_val = time_cell.get_text(strip=True)
+        row_data.append(time_val)
+        data.append(row_data)
 
-        # Get rows
-        rows = table.find('tbody').find_all('tr')
-        data = []
-        for row in rows:
-            cols = row.find_all('td')
-            row_data = []
-            # 1. Grand Prix name
-            gp_cell = cols[0]
-            a_tag = gp_cell.find('a')
-            if a_tag:
-                # Get only the text after the SVG (the Grand Prix name)
-                texts = [t for t in a_tag.stripped_strings if not t.startswith("Flag of")]
-                gp_name = " ".join(texts)
-                row_data.append(gp_name)
-            else:
-                row_data.append(gp_cell.text.strip())
-            # 2. Winner name
-            winner_cell = cols[1]
-            first_name = winner_cell.find('span', class_='max-lg:hidden')
-            last_name = winner_cell.find('span', class_='max-md:hidden')
-            if first_name and last_name:
-                winner = f"{first_name.text.strip()} {last_name.text.strip()}"
-            else:
-                winner = winner_cell.get_text(strip=True)
-            row_data.append(winner)
-            # 3. Time
-            time_cell = cols[2]
-            time_val = time_cell.get_text(strip=True)
-            row_data.append(time_val)
-            data.append(row_data)
-
-        output = {
-            "headers": headers,
-            "data": data
-        }
-        return output
+    output = {
+        "headers": headers,
+        "data": data
+    }
+    return output
 
 async def collect_fastest_laps_data(start_year=years[0], end_year=years[-1]):
     """Collect fastest lap data for a range of years into a single file with year column"""
-    connector = aiohttp.TCPConnector(ssl=ssl_context)
     timeout = aiohttp.ClientTimeout(total=60)
     start_time = time.time()
     
@@ -92,7 +87,7 @@ async def collect_fastest_laps_data(start_year=years[0], end_year=years[-1]):
     combined_data = []
     all_data_by_year = {}  # For checkpoints
 
-    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+    async with create_session(timeout=timeout) as session:
         for i, year in enumerate(range(start_year, end_year + 1)):
             # print(f"Fetching fastest lap data for {year}...")
             year_data = await scrape_fastest_laps(session, year)
@@ -160,6 +155,7 @@ async def scrape_fastest_laps_async():
 
 def main():
     asyncio.run(scrape_fastest_laps_async())
+    write_crawl_telemetry()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
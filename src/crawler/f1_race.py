@@ -13,7 +13,10 @@ logger = logging.getLogger(__name__)
 
 PROJECT_ROOT = os.getcwd()
 sys.path.append(PROJECT_ROOT)
-from src.utils.crawling_helpers import ssl_context, head, base_url, years, standardize_folder_name
+from src.utils.crawling_helpers import create_session, fetch_soup, write_crawl_telemetry, base_url, years, standardize_folder_name
+from src.utils.crawl_telemetry import telemetry
+from src.utils.raw_storage import write_raw_json, close_raw_storage
+from src.utils.browser_pool import BrowserPool, render_html
 from urllib.parse import urljoin
 
 DATA_DIR = os.path.join(PROJECT_ROOT, "data", "f1_race_data")
@@ -24,65 +27,60 @@ os.makedirs(CHECKPOINTS_DIR, exist_ok=True)
 async def scrape_races_year(session, year):
     url = f"{base_url}/en/results/{year}/races"
 
-    async with session.get(url, headers=head) as response:
-        if response.status != 200:
-            print(f"Failed to load {url}. Status: {response.status}")
-            return []
-
-        html = await response.text()
-        soup = BeautifulSoup(html, 'lxml')
-
-        # Updated table selector
-        table = soup.find('table', class_='Table-module_table__cKsW2')
-        if not table:
-            print(f"No race table found for {year}")
-            return [], [], []
-
-        # Updated header extraction
-        headers = [th.get_text(strip=True).replace('.', '') for th in table.find('thead').find_all('th')]
-
-        rows = table.find('tbody').find_all('tr')
-        data = []
-        race_links = []
-
-        for row in rows:
-            cols = row.find_all('td')
-            row_data = [col.get_text(strip=True) for col in cols]
-            # Grand Prix name and link
-            gp_cell = cols[0]
-            a_tag = gp_cell.find('a')
-            if a_tag:
-                gp_name = a_tag.get_text(strip=True)
-                race_href = a_tag.get('href', '')
-                full_link = urljoin(base_url, race_href)
-                race_links.append((gp_name, full_link))
-            else:
-                race_links.append((gp_cell.text.strip(), ""))
-
-            data.append(row_data)
-
-        return data, headers, race_links
+    status, soup = await fetch_soup(session, url, "race", "season_races")
+    if status != 200:
+        print(f"Failed to load {url}. Status: {status}")
+        return [], [], []
+
+    # Updated table selector
+    table = soup.find('table', class_='Table-module_table__cKsW2')
+    if not table:
+        print(f"No race table found for {year}")
+        return [], [], []
+
+    # Updated header extraction
+    headers = [th.get_text(strip=True).replace('.', '') for th in table.find('thead').find_all('th')]
+
+    rows = table.find('tbody').find_all('tr')
+    data = []
+    race_links = []
+
+    for row in rows:
+        cols = row.find_all('td')
+        row_data = [col.get_text(strip=True) for col in cols]
+        # Grand Prix name and link
+        gp_cell = cols[0]
+        a_tag = gp_cell.find('a')
+        if a_tag:
+            gp_name = a_tag.get_text(strip=True)
+            race_href = a_tag.get('href', '')
+            full_link = urljoin(base_url, race_href)
+            race_links.append((gp_name, full_link))
+        else:
+            race_links.append((gp_cell.text.strip(), ""))
+
+        data.append(row_data)
+
+    return data, headers, race_links
 
 async def scrape_race_location(session, race_url):
-    async with session.get(race_url, headers=head) as response:
-        if response.status != 200:
-            print(f"Failed to load {race_url}. Status: {response.status_code}")
-            return []
-        html = await response.text()
-        soup = BeautifulSoup(html, 'lxml')
+    status, soup = await fetch_soup(session, race_url, "race", "race_location")
+    if status != 200:
+        print(f"Failed to load {race_url}. Status: {status}")
+        return []
+    
+    # Find the location table
+    header_section = soup.find('div', class_='flex flex-col gap-px-6 text-text-3')
+    
+    if header_section:
+        location_info = header_section.find_all('p')
         
-        # Find the location table
-        header_section = soup.find('div', class_='flex flex-col gap-px-6 text-text-3')
+        race_date = location_info[0].text.strip()
+        track = location_info[1].text.strip().split(", ")
+        circuit = track[0]
+        city = track[1]
         
-        if header_section:
-            location_info = header_section.find_all('p')
-            
-            race_date = location_info[0].text.strip()
-            track = location_info[1].text.strip().split(", ")
-            circuit = track[0]
-            city = track[1]
-            
-        return race_date, circuit, city
+    return race_date, circuit, city
 
 async def process_race_location(session, race_link_tuple):
     grand_prix, url = race_link_tuple
@@ -96,48 +94,89 @@ async def process_race_location(session, race_link_tuple):
         print(f"Error processing {url}: {e}")
         return None
 
-# Get available sessions for a race
-async def scrape_race_sessions(race_url):
-    async with aiohttp.ClientSession() as session:
-        async with session.get(race_url, headers=head) as response:
-            html = await response.text()
-            soup = BeautifulSoup(html, "lxml")
-            dropdown = soup.find_all("a", class_="DropdownMenuItem-module_dropdown-menu-item__6Y3-v")
-            sessions = []
-            m = re.search(r"(/races/\d+/[a-z0-9\-]+)/", race_url)
-            race_path = m.group(1) if m else None
-            for item in dropdown:
-                session_name = item.get_text(strip=True).replace("Active", "").strip()
-                session_url = item.get("href")
-                # Filter out links with "Flag of" in the name
-                if race_path and session_url and race_path in session_url and "Flag of" not in session_name:
-                    sessions.append((session_name, f"https://www.formula1.com{session_url}"))
-            return sessions
+SESSION_DROPDOWN_CLASS = "DropdownMenuItem-module_dropdown-menu-item__6Y3-v"
+
+def parse_race_sessions(html, race_url):
+    """Extract (session_name, session_url) pairs from a race page's session dropdown"""
+    return find_race_sessions(BeautifulSoup(html, "lxml"), race_url)
+
+def find_race_sessions(soup, race_url):
+    dropdown = soup.find_all("a", class_=SESSION_DROPDOWN_CLASS)
+    sessions = []
+    m = re.search(r"(/races/\d+/[a-z0-9\-]+)/", race_url)
+    race_path = m.group(1) if m else None
+    for item in dropdown:
+        session_name = item.get_text(strip=True).replace("Active", "").strip()
+        session_url = item.get("href")
+        # Filter out links with "Flag of" in the name
+        if race_path and session_url and race_path in session_url and "Flag of" not in session_name:
+            sessions.append((session_name, urljoin(base_url, session_url)))
+    return sessions
 
+# Get available sessions for a race
+async def scrape_race_sessions(race_url, session=None):
+    if session is None:
+        async with create_session() as session:
+            return await scrape_race_sessions(race_url, session)
+
+    status, soup = await fetch_soup(session, race_url, "race", "race_sessions")
+    if status != 200:
+        print(f"Failed to load {race_url}. Status: {status}")
+        return []
+    return find_race_sessions(soup, race_url)
+
+# Get available sessions for a race from the browser-rendered page
+async def scrape_race_sessions_batch(browser, race_url):
+    """Discover sessions with a headless browser (BrowserPool or Playwright browser)"""
+    html = await render_html(browser, race_url, wait_for_selector=f"a.{SESSION_DROPDOWN_CLASS}")
+    return parse_race_sessions(html, race_url)
+
+async def render_missing_race_sessions(race_links, sessions_by_race):
+    """Fill in races whose dropdown was not visible to aiohttp using a browser pool"""
+    missing = [i for i, sessions in enumerate(sessions_by_race) if not sessions]
+    if not missing:
+        return
+
+    logger.info(f"Rendering {len(missing)} race pages with headless browser...")
+    async with BrowserPool() as browser_pool:
+        try:
+            await browser_pool.start()
+        except Exception as e:
+            logger.warning(f"Browser fallback unavailable: {e}")
+            return
+
+        # The pool bounds how many pages render at once
+        rendered = await asyncio.gather(
+            *[scrape_race_sessions_batch(browser_pool, race_links[i][1]) for i in missing],
+            return_exceptions=True
+        )
+
+    for i, sessions in zip(missing, rendered):
+        if isinstance(sessions, Exception):
+            print(f"Error rendering sessions for {race_links[i][1]}: {sessions}")
+            continue
+        sessions_by_race[i] = sessions
 
 async def scrape_race_results(session, session_url, session_name=None):
-    async with session.get(session_url, headers=head) as response:
-        if response.status != 200:
-            print(f"Failed to load {session_url}. Status: {response.status_code}")
-            return []
-
-        html = await response.text()
-        soup = BeautifulSoup(html, 'lxml')
+    status, soup = await fetch_soup(session, session_url, "race", "session_results")
+    if status != 200:
+        print(f"Failed to load {session_url}. Status: {status}")
+        return None
 
-        table = soup.find('table', class_='Table-module_table__cKsW2')
-        if not table:
-            print(f"No table found for {session_url}")
-            return None
+    table = soup.find('table', class_='Table-module_table__cKsW2')
+    if not table:
+        print(f"No table found for {session_url}")
+        return None
 
-        headers = [th.get_text(strip=True).replace('.', '') for th in table.find('thead').find_all('th')]
-        rows = table.find('tbody').find_all('tr')
-        data = []
+    headers = [th.get_text(strip=True).replace('.', '') for th in table.find('thead').find_all('th')]
+    rows = table.find('tbody').find_all('tr')
+    data = []
 
-        for row in rows:
-            cols = row.find_all('td')
-            row_data = [col.get_text(strip=True) for col in cols]
-            data.append(row_data)
-        return headers, data, session_url, session_name
+    for row in rows:
+        cols = row.find_all('td')
+        row_data = [col.get_text(strip=True) for col in cols]
+        data.append(row_data)
+    return headers, data, session_url, session_name
 
 headers_race_location = ['Grand Prix', 'Circuit', 'Country/City', 'Year', 'Date']
 race_location = []
@@ -148,10 +187,8 @@ async def collect_race_links():
     headers_race = []
     races = []
     
-    connector = aiohttp.TCPConnector(ssl=ssl_context)
 
-    
-    async with aiohttp.ClientSession(connector=connector) as session:          
+    async with create_session() as session:          
         tasks = [scrape_races_year(session, year) for year in years]
         results = await asyncio.gather(*tasks)
     
@@ -175,126 +212,127 @@ async def collect_race_links():
         return all_race_links, headers_race, races
 
 async def scrape_f1_data_with_checkpoints(all_race_links):
-    connector = aiohttp.TCPConnector(ssl=ssl_context)
     
     # Create a longer timeout
     timeout = aiohttp.ClientTimeout(total=60)
     
     start_time = time.time()
     
-    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+    async with create_session(timeout=timeout) as session:
         # Process Race Location concurrently with incremental saves
         logger.info("Processing race locations...")
-        location_results = []
-        checkpoint_count = 0
+        with telemetry.stage("race_locations"):
+            location_results = []
+            checkpoint_count = 0
         
-        for i, link in enumerate(all_race_links):
-            result = await process_race_location(session, link)
+            for i, link in enumerate(all_race_links):
+                result = await process_race_location(session, link)
             
-            if result:  # Only process valid results
-                location_results.append(result)
+                if result:  # Only process valid results
+                    location_results.append(result)
                 
-                # Save directly to hierarchical structure
-                grand_prix, circuit, city, year, date = result
+                    # Save directly to hierarchical structure
+                    grand_prix, circuit, city, year, date = result
                 
-                url = link[1]
-                parts = url.split('/')
-                race_location = parts[8] if len(parts) > 8 else "unknown"
-                race_location = standardize_folder_name(race_location)
-                race_dir = os.path.join(DATA_DIR, str(year), race_location)
-                os.makedirs(race_dir, exist_ok=True)
+                    url = link[1]
+                    parts = url.split('/')
+                    race_location = parts[8] if len(parts) > 8 else "unknown"
+                    race_location = standardize_folder_name(race_location)
+                    race_dir = os.path.join(DATA_DIR, str(year), race_location)
                 
-                # Save race metadata
-                metadata = {
-                    "grand_prix": grand_prix,
-                    "circuit": circuit,
-                    "city": city, 
-                    "year": year,
-                    "date": date
-                }
+                    # Save race metadata
+                    metadata = {
+                        "grand_prix": grand_prix,
+                        "circuit": circuit,
+                        "city": city, 
+                        "year": year,
+                        "date": date
+                    }
                 
-                with open(os.path.join(race_dir, "race_metadata.json"), 'w', encoding='utf-8') as f:
-                    json.dump(metadata, f, indent=2, ensure_ascii=False)
+                    write_raw_json(os.path.join(race_dir, "race_metadata.json"), metadata)
             
-            # Save checkpoint every 100 races or at the end
-            checkpoint_file =  os.path.join(CHECKPOINTS_DIR, "race_locations_latest.json")
-            if (i + 1) % 1000 == 0 or i == len(all_race_links) - 1:
-                checkpoint_count += 1
-                with open(checkpoint_file, 'w', encoding='utf-8') as f:
-                    json.dump(location_results, f, indent=2, ensure_ascii=False)
+                # Save checkpoint every 100 races or at the end
+                checkpoint_file =  os.path.join(CHECKPOINTS_DIR, "race_locations_latest.json")
+                if (i + 1) % 1000 == 0 or i == len(all_race_links) - 1:
+                    checkpoint_count += 1
+                    with open(checkpoint_file, 'w', encoding='utf-8') as f:
+                        json.dump(location_results, f, indent=2, ensure_ascii=False)
 
         logger.info(f"Processed {len(location_results)} race locations")
         
         # Process Race Sessions with incremental saves
         logger.info("Getting race sessions...")
-        session_results = []
-        all_sessions = []
-        checkpoint_count = 0
+        with telemetry.stage("race_sessions"):
+            sessions_by_race = []
+            checkpoint_count = 0
         
-        for i, link in enumerate(all_race_links):
-            sessions = await scrape_race_sessions(link[1])
-            
-            if sessions:
-                session_results.append(sessions)
-                all_sessions.extend(sessions)
+            for i, link in enumerate(all_race_links):
+                sessions = await scrape_race_sessions(link[1], session)
+                sessions_by_race.append(sessions)
                 
-            # Save checkpoint every 100 races or at the end
-            checkpoint_file =  os.path.join(CHECKPOINTS_DIR, "race_sessions_latest.json")
-            if (i + 1) % 1000 == 0 or i == len(all_race_links) - 1:
-                checkpoint_count += 1
-                with open(checkpoint_file, 'w', encoding='utf-8') as f:
-                    json.dump(session_results, f, indent=2, ensure_ascii=False)
+                # Save checkpoint every 100 races or at the end
+                checkpoint_file =  os.path.join(CHECKPOINTS_DIR, "race_sessions_latest.json")
+                if (i + 1) % 1000 == 0 or i == len(all_race_links) - 1:
+                    checkpoint_count += 1
+                    with open(checkpoint_file, 'w', encoding='utf-8') as f:
+                        json.dump([s for s in sessions_by_race if s], f, indent=2, ensure_ascii=False)
+
+            # Dropdowns rendered client-side are invisible to aiohttp
+            await render_missing_race_sessions(all_race_links, sessions_by_race)
+        
+        session_results = [sessions for sessions in sessions_by_race if sessions]
+        all_sessions = [s for sessions in session_results for s in sessions]
 
         logger.info(f"Found {len(all_sessions)} total session results to process")
 
         # Scrape Race Results with incremental saves to hierarchical structure
         logger.info("Processing race results...")
-        race_result = {}
-        checkpoint_count = 0
-        results_processed = 0
+        with telemetry.stage("race_results"):
+            race_result = {}
+            checkpoint_count = 0
+            results_processed = 0
         
-        for i, task in enumerate(all_sessions):
-            result = await scrape_race_results(session, task[1], task[0])
+            for i, task in enumerate(all_sessions):
+                result = await scrape_race_results(session, task[1], task[0])
             
-            if result is not None:
-                headers, data, url, session_name = result
-                race_result[url] = {
-                    "header": headers,
-                    "data": data,
-                    "session_name": session_name
-                }
+                if result is not None:
+                    headers, data, url, session_name = result
+                    race_result[url] = {
+                        "header": headers,
+                        "data": data,
+                        "session_name": session_name
+                    }
                 
-                # Save directly to hierarchical structure
-                parts = url.split('/')
-                year = parts[5]
+                    # Save directly to hierarchical structure
+                    parts = url.split('/')
+                    year = parts[5]
                 
-                # Extract race name from URL
-                race_location = parts[8] if len(parts) > 8 else "unknown"
-                session_type = session_name.lower().replace(' ', '-').replace('-', '_')
-
-                # Use the standardized folder name function
-                race_location = standardize_folder_name(race_location)
-                race_dir = os.path.join(DATA_DIR, str(year), race_location)
-                os.makedirs(race_dir, exist_ok=True)
+                    # Extract race name from URL
+                    race_location = parts[8] if len(parts) > 8 else "unknown"
+                    session_type = session_name.lower().replace(' ', '-').replace('-', '_')
+
+                    # Use the standardized folder name function
+                    race_location = standardize_folder_name(race_location)
+                    race_dir = os.path.join(DATA_DIR, str(year), race_location)
                 
-                # Save session data
-                session_filename = f"{session_type}.json"
-                with open(os.path.join(race_dir, session_filename), 'w', encoding='utf-8') as f:
-                    json.dump({
+                    # Save session data
+                    session_filename = f"{session_type}.json"
+                    write_raw_json(os.path.join(race_dir, session_filename), {
                         "header": headers,
                         "data": data,
                         "session_name": session_name
-                    }, f, indent=2, ensure_ascii=False)
+                    })
                     
-                results_processed += 1
+                    results_processed += 1
                 
-            # Save checkpoint every 200 sessions or at the end
-            checkpoint_file =  os.path.join(CHECKPOINTS_DIR, "race_results_latest.json")
-            if (i + 1) % 1000 == 0 or i == len(all_sessions) - 1:
-                checkpoint_count += 1
-                with open(checkpoint_file, 'w', encoding='utf-8') as f:
-                    json.dump(race_result, f, indent=2, ensure_ascii=False)
+                # Save checkpoint every 200 sessions or at the end
+                checkpoint_file =  os.path.join(CHECKPOINTS_DIR, "race_results_latest.json")
+                if (i + 1) % 1000 == 0 or i == len(all_sessions) - 1:
+                    checkpoint_count += 1
+                    with open(checkpoint_file, 'w', encoding='utf-8') as f:
+                        json.dump(race_result, f, indent=2, ensure_ascii=False)
                 
+            close_raw_storage()
         end_time = time.time()
         total_time = end_time - start_time
         
@@ -340,6 +378,7 @@ async def scrape_race_async():
 
 def main():
     asyncio.run(scrape_race_async())
+    write_crawl_telemetry()
 
 if __name__ == "__main__":
     main()
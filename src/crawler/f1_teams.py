@@ -1,4 +1,3 @@
-from bs4 import BeautifulSoup
 import aiohttp
 import asyncio
 import sys
@@ -14,7 +13,8 @@ logger = logging.getLogger(__name__)
 
 PROJECT_ROOT = os.getcwd()
 sys.path.append(PROJECT_ROOT)
-from src.utils.crawling_helpers import ssl_context, head, base_url, years
+from src.utils.crawling_helpers import create_session, fetch_soup, write_crawl_telemetry, base_url, years
+from src.utils.raw_storage import write_raw_json, close_raw_storage
 
 DATA_DIR = os.path.join(PROJECT_ROOT, "data", "f1_teams_data")
 os.makedirs(DATA_DIR, exist_ok=True)
@@ -27,75 +27,69 @@ async def scrape_teams_standing(session, year):
     headers = []
     team_links = []
 
-    async with session.get(url, headers=head) as response:
-        if response.status != 200:
-            print(f"Failed to load {url}. Status: {response.status}")
-            return data, headers, team_links
-
-        html = await response.text()
-        soup = BeautifulSoup(html, 'lxml')
-
-        # Updated table selector
-        table = soup.find('table', class_='Table-module_table__cKsW2')
-        if not table:
-            return data, headers, team_links
-
-        # Updated header extraction
-        headers = [th.get_text(strip=True).replace('.', '') for th in table.find('thead').find_all('th')]
-
-        rows = table.find('tbody').find_all('tr')
-        for row in rows:
-            cols = row.find_all('td')
-            if len(cols) < 3:
-                continue
-
-            position = cols[0].get_text(strip=True)
-            team_a = cols[1].find('a')
-            if team_a:
-                team_name = team_a.get_text(strip=True)
-                team_link = team_a.get('href', '')
-                full_link = urljoin(base_url, team_link)
-            else:
-                team_name = cols[1].get_text(strip=True)
-                full_link = None
+    status, soup = await fetch_soup(session, url, "teams", "team_standings")
+    if status != 200:
+        print(f"Failed to load {url}. Status: {status}")
+        return data, headers, team_links
 
-            points = cols[2].get_text(strip=True)
-            row_data = [position, team_name, points, str(year)]
-            data.append(row_data)
+    # Updated table selector
+    table = soup.find('table', class_='Table-module_table__cKsW2')
+    if not table:
+        return data, headers, team_links
 
-            if full_link:
-                team_links.append((team_name, full_link, year))
+    # Updated header extraction
+    headers = [th.get_text(strip=True).replace('.', '') for th in table.find('thead').find_all('th')]
 
-        return data, headers, team_links
+    rows = table.find('tbody').find_all('tr')
+    for row in rows:
+        cols = row.find_all('td')
+        if len(cols) < 3:
+            continue
+
+        position = cols[0].get_text(strip=True)
+        team_a = cols[1].find('a')
+        if team_a:
+            team_name = team_a.get_text(strip=True)
+            team_link = team_a.get('href', '')
+            full_link = urljoin(base_url, team_link)
+        else:
+            team_name = cols[1].get_text(strip=True)
+            full_link = None
+
+        points = cols[2].get_text(strip=True)
+        row_data = [position, team_name, points, str(year)]
+        data.append(row_data)
+
+        if full_link:
+            team_links.append((team_name, full_link, year))
+
+    return data, headers, team_links
 
 async def scrape_team_results(session, team_url):
-    async with session.get(team_url, headers=head) as response:
-        if response.status != 200:
-            print(f"Failed to load {team_url}. Status: {response.status}")
-            return None, None, None
+    status, soup = await fetch_soup(session, team_url, "teams", "team_results")
+    if status != 200:
+        print(f"Failed to load {team_url}. Status: {status}")
+        return None, None, None
 
-        html = await response.text()
-        soup = BeautifulSoup(html, 'lxml')
+    url_parts = team_url.split('/')
+    team_code = url_parts[-1] if len(url_parts) > 2 else None
 
-        url_parts = team_url.split('/')
-        team_code = url_parts[-1] if len(url_parts) > 2 else None
+    table = soup.find('table', class_='Table-module_table__cKsW2')
+    if not table:
+        print(f"No results table found for {team_url}")
+        return [], [], team_code
 
-        table = soup.find('table', class_='Table-module_table__cKsW2')
-        if not table:
-            print(f"No results table found for {team_url}")
-            return [], [], team_code
+    headers = [th.get_text(strip=True).replace('.', '') for th in table.find('thead').find_all('th')]
+    rows = table.find('tbody').find_all('tr')
+    data = []
 
-        headers = [th.get_text(strip=True).replace('.', '') for th in table.find('thead').find_all('th')]
-        rows = table.find('tbody').find_all('tr')
-        data = []
+    for row in rows:
+        cols = row.find_all('td')
+        row_data = [col.get_text(strip=True) for col in cols]
+        data.append(row_data)
 
-        for row in rows:
-            cols = row.find_all('td')
-            row_data = [col.get_text(strip=True) for col in cols]
-            data.append(row_data)
+    return data, headers, team_code
 
-        return data, headers, team_code
-    
 async def process_team_data(session, team_link_tuple):
     """Process a team link to get detailed information"""
     team_name, url = team_link_tuple
@@ -123,9 +117,7 @@ async def collect_team_links():
     headers_teams = []
     teams = []
     
-    connector = aiohttp.TCPConnector(ssl=ssl_context)
-    
-    async with aiohttp.ClientSession(connector=connector) as session:          
+    async with create_session() as session:          
         tasks = [scrape_teams_standing(session, year) for year in years]
         results = await asyncio.gather(*tasks)
     
@@ -141,8 +133,7 @@ async def collect_team_links():
             "headers": headers_teams,
             "teams": teams
         }    
-        with open(os.path.join(DATA_DIR, "team_standing.json"), 'w', encoding='utf-8') as f:
-            json.dump(teams_data, f, indent=2, ensure_ascii=False)
+        write_raw_json(os.path.join(DATA_DIR, "team_standing.json"), teams_data)
         
         logger.info(f"Saved {len(teams)} team standings to team_standing.json")
                 
@@ -153,70 +144,67 @@ async def scrape_team_profile(session, team_name, team_code):
     profile_url = f"{base_url}/en/teams/{team_code}"
 
     try:
-        async with session.get(profile_url, headers=head) as response:
-            if response.status != 200:
-                print(f"Team profile not found: {profile_url}. Status: {response.status}")
-                return None, None
-
-            html = await response.text()
-            soup = BeautifulSoup(html, 'lxml')
-
-            profile = {
-                "name": team_name,
-                "team_code": team_code,
-                "profile_url": profile_url,
-            }
-
-            # --- Logo image ---
-            logo_img = soup.find("img", class_="relative z-40 h-px-32")
-            if logo_img:
-                profile["logo_url"] = logo_img.get("src", "")
-            else:
-                profile["logo_url"] = ""
+        status, soup = await fetch_soup(session, profile_url, "teams", "team_profile")
+        if status != 200:
+            print(f"Team profile not found: {profile_url}. Status: {status}")
+            return None, None
+
+        profile = {
+            "name": team_name,
+            "team_code": team_code,
+            "profile_url": profile_url,
+        }
 
-            # --- Car image ---
-            car_img = soup.find("img", class_="relative z-40 max-w-full max-h-[90px] md:max-h-[127px] lg:max-h-[183px]")
-            if car_img:
-                profile["car_img_url"] = car_img.get("src", "")
-            else:
-                profile["car_img_url"] = ""
-
-            # --- Remove car_img if present ---
-            if "car_img" in profile:
-                del profile["car_img"]
-
-            # --- Drivers ---
-            profile["drivers"] = []
-            for card in soup.select('a[data-f1rd-a7s-click="driver_card_click"]'):
-                driver = {}
-                # Driver name
-                name_elem = card.select_one('p.typography-module_display-l-bold__m1yaJ')
-                if name_elem:
-                    driver["name"] = name_elem.text.strip()
-                # Driver image
-                img_elem = card.select_one('div.absolute img')
-                if img_elem:
-                    driver["img"] = img_elem.get("src", "")
-                # Nationality (flag title)
-                flag_elem = card.select_one('svg[role="presentation"] title')
-                if flag_elem:
-                    nationality = flag_elem.text.strip()
-                    if nationality.lower().startswith("flag of "):
-                        nationality = nationality[8:].strip()
-                    driver["nationality"] = nationality
-                profile["drivers"].append(driver)
-
-            # --- All <dl> blocks (team info, statistics, summary) ---
-            for dl in soup.find_all('dl'):
-                for div in dl.find_all('div', class_='DataGrid-module_item__cs9Zd'):
-                    dt = div.find('dt')
-                    dd = div.find('dd')
-                    if dt and dd:
-                        key = dt.text.strip().lower().replace(' ', '_')
-                        value = dd.text.strip()
-                        profile[key] = value
-
-            return list(profile.keys()), list(profile.values())
+        # --- Logo image ---
+        logo_img = soup.find("img", class_="relative z-40 h-px-32")
+        if logo_img:
+            profile["logo_url"] = logo_img.get("src", "")
+        else:
+            profile["logo_url"] = ""
+
+        # --- Car image ---
+        car_img = soup.find("img", class_="relative z-40 max-w-full max-h-[90px] md:max-h-[127px] lg:max-h-[183px]")
+        if car_img:
+            profile["car_img_url"] = car_img.get("src", "")
+        else:
+            profile["car_img_url"] = ""
+
+        # --- Remove car_img if present ---
+        if "car_img" in profile:
+            del profile["car_img"]
+
+        # --- Drivers ---
+        profile["drivers"] = []
+        for card in soup.select('a[data-f1rd-a7s-click="driver_card_click"]'):
+            driver = {}
+            # Driver name
+            name_elem = card.select_one('p.typography-module_display-l-bold__m1yaJ')
+            if name_elem:
+                driver["name"] = name_elem.text.strip()
+            # Driver image
+            img_elem = card.select_one('div.absolute img')
+            if img_elem:
+                driver["img"] = img_elem.get("src", "")
+            # Nationality (flag title)
+            flag_elem = card.select_one('svg[role="presentation"] title')
+            if flag_elem:
+                nationality = flag_elem.text.strip()
+                if nationality.lower().startswith("flag of "):
+                    nationality = nationality[8:].strip()
+                driver["nationality"] = nationality
+            profile["drivers"].append(driver)
+
+        # --- All <dl> blocks (team info, statistics, summary) ---
+        for dl in soup.find_all('dl'):
+            for div in dl.find_all('div', class_='DataGrid-module_item__cs9Zd'):
+                dt = div.find('dt')
+                dd = div.find('dd')
+                if dt and dd:
+                    key = dt.text.strip().lower().replace(' ', '_')
+                    value = dd.text.strip()
+                    profile[key] = value
+
+        return list(profile.keys()), list(profile.values())
     except Exception as e:
         print(f"Error scraping profile for {team_name}: {e}")
         return None, None
@@ -224,57 +212,53 @@ async def scrape_team_profile(session, team_name, team_code):
 async def scrape_teams_listing(session):
     """Scrape teams directly from the main F1 teams listing page (2025 structure)"""
     url = f"{base_url}/en/teams"
-    async with session.get(url, headers=head) as response:
-        if response.status != 200:
-            print(f"Failed to load {url}. Status: {response.status}")
-            return []
-
-        html = await response.text()
-        soup = BeautifulSoup(html, 'lxml')
-
-        teams = []
-        # Each team card
-        for card in soup.select('a.group\\/team-card'):
-            team = {}
-            # Team name
-            name_elem = card.select_one('p.typography-module_display-l-bold__m1yaJ')
-            team['name'] = name_elem.text.strip() if name_elem else ""
-            # Team code (from href)
-            href = card.get('href', '')
-            team['team_code'] = href.split('/')[-1] if href else ""
-            team['profile_url'] = base_url + href if href else ""
-            # Team logo
-            logo_elem = card.select_one('.TeamLogo-module_teamlogo__lA3j1 img')
-            team['logo_url'] = logo_elem['src'] if logo_elem else ""
-            # Car image
-            car_img_elem = card.select_one('span.relative img.absolute')
-            team['car_img_url'] = car_img_elem['src'] if car_img_elem else ""
-            # Team color (from style)
-            style = card.get('style', '')
-            import re
-            match = re.search(r'--f1-team-colour:\s*([^;]+);', style)
-            team['team_color'] = match.group(1) if match else ""
-            # Drivers
-            team['drivers'] = []
-            for driver in card.select('span.flex.gap-px-8.rounded-s.items-center'):
-                driver_name = " ".join([
-                    x.text.strip() for x in driver.select('span.typography-module_body-xs-regular__0B0St, span.typography-module_body-xs-bold__TovJz')
-                ])
-                driver_img_elem = driver.select_one('img')
-                driver_img = driver_img_elem['src'] if driver_img_elem else ""
-                team['drivers'].append({
-                    'name': driver_name,
-                    'img': driver_img
-                })
-            teams.append(team)
-        return teams
+    status, soup = await fetch_soup(session, url, "teams", "teams_listing")
+    if status != 200:
+        print(f"Failed to load {url}. Status: {status}")
+        return []
+
+    teams = []
+    # Each team card
+    for card in soup.select('a.group\\/team-card'):
+        team = {}
+        # Team name
+        name_elem = card.select_one('p.typography-module_display-l-bold__m1yaJ')
+        team['name'] = name_elem.text.strip() if name_elem else ""
+        # Team code (from href)
+        href = card.get('href', '')
+        team['team_code'] = href.split('/')[-1] if href else ""
+        team['profile_url'] = base_url + href if href else ""
+        # Team logo
+        logo_elem = card.select_one('.TeamLogo-module_teamlogo__lA3j1 img')
+        team['logo_url'] = logo_elem['src'] if logo_elem else ""
+        # Car image
+        car_img_elem = card.select_one('span.relative img.absolute')
+        team['car_img_url'] = car_img_elem['src'] if car_img_elem else ""
+        # Team color (from style)
+        style = card.get('style', '')
+        import re
+        match = re.search(r'--f1-team-colour:\s*([^;]+);', style)
+        team['team_color'] = match.group(1) if match else ""
+        # Drivers
+        team['drivers'] = []
+        for driver in card.select('span.flex.gap-px-8.rounded-s.items-center'):
+            driver_name = " ".join([
+                x.text.strip() for x in driver.select('span.typography-module_body-xs-regular__0B0St, span.typography-module_body-xs-bold__TovJz')
+            ])
+            driver_img_elem = driver.select_one('img')
+            driver_img = driver_img_elem['src'] if driver_img_elem else ""
+            team['drivers'].append({
+                'name': driver_name,
+                'img': driver_img
+            })
+        teams.append(team)
+    return teams
 
 async def collect_current_teams_data():
     """Collect comprehensive team data from the main teams page and individual profiles"""
-    connector = aiohttp.TCPConnector(ssl=ssl_context)
     timeout = aiohttp.ClientTimeout(total=60)
     
-    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+    async with create_session(timeout=timeout) as session:
         # Get teams from main listing page
         teams_basic_data = await scrape_teams_listing(session)
         
@@ -325,7 +309,6 @@ async def collect_current_teams_data():
 
 async def scrape_f1_team_data(all_team_links):
     """Scrape all F1 team data organized by year"""
-    connector = aiohttp.TCPConnector(ssl=ssl_context)
     
     # Create a longer timeout
     timeout = aiohttp.ClientTimeout(total=60)
@@ -339,7 +322,7 @@ async def scrape_f1_team_data(all_team_links):
             team_links_by_year[year] = []
         team_links_by_year[year].append((name, url))
     
-    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+    async with create_session(timeout=timeout) as session:
         # Process team standings checkpoints
         logger.info("Processing team standings...")
         standings_results = []
@@ -349,7 +332,6 @@ async def scrape_f1_team_data(all_team_links):
         for year, year_links in team_links_by_year.items():
             # Create directory for the year
             year_dir = os.path.join(DATA_DIR, str(year))
-            os.makedirs(year_dir, exist_ok=True)
             
             # print(f"Processing {len(year_links)} teams for year {year}")
             
@@ -373,8 +355,7 @@ async def scrape_f1_team_data(all_team_links):
                     team_name = team_name.replace(':', '').replace('"', '').replace('<', '').replace('>', '')
                     team_file = os.path.join(year_dir, f"{team_name}.json")
                     
-                    with open(team_file, 'w', encoding='utf-8') as f:
-                        json.dump(result, f, indent=2, ensure_ascii=False)
+                    write_raw_json(team_file, result)
                         
                     results_processed += 1
                 
@@ -387,6 +368,7 @@ async def scrape_f1_team_data(all_team_links):
                 
             # print(f"Processed {results_processed} teams for year {year}")
     
+    close_raw_storage()
     end_time = time.time()
     total_time = end_time - start_time
     
@@ -430,6 +412,7 @@ async def scrape_team_async():
 def main():
     """Main function to run the team scraping"""
     asyncio.run(scrape_team_async())
+    write_crawl_telemetry()
     
 if __name__ == "__main__":
     main()
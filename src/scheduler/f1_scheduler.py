@@ -27,6 +27,8 @@ async def run_all_crawlers():
     from crawler.f1_teams import scrape_team_async
     from crawler.f1_race import scrape_race_async
     from crawler.f1_fastest_laps import scrape_fastest_laps_async
+    # The crawlers record telemetry through src.utils, so export from the same module
+    from src.utils.crawling_helpers import write_crawl_telemetry
     
     scrape_results = await asyncio.gather(
         scrape_driver_async(),
@@ -35,6 +37,7 @@ async def run_all_crawlers():
         scrape_fastest_laps_async(),
         return_exceptions=True
     )
+    write_crawl_telemetry()
     
     return scrape_results
 
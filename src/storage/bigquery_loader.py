@@ -1,3 +1,5 @@
+import gzip
+import io
 import json
 import os
 from google.cloud import bigquery
@@ -13,9 +15,17 @@ logger = logging.getLogger(__name__)
 from storage.configuration import (
     GOOGLE_CLOUD_PROJECT_ID,
     BIGQUERY_DATASET_ID,
+    TRANSFORMED_DATA_DIR,
     DIMENSIONS_DIR,
     FACTS_DIR,
+    LOAD_STATE_FILE,
 )
+from utils.table_io import find_table_file, list_tables, partition_files, table_format, columnar_row_count, \
+    parquet_bytes, load_partition_manifest, partition_value, partition_payload, iter_records, COLUMNAR_FORMATS
+
+LOAD_STATE_VERSION = 1
+# Integer range of the season partitions of partitioned tables (one partition per year)
+PARTITION_RANGE = (1950, 2100)
 
 class BigQueryLoader:
     def __init__(self, project_id=None, dataset_id=BIGQUERY_DATASET_ID):
@@ -53,34 +63,47 @@ class BigQueryLoader:
             logger.error(f"Failed to delete dataset {self.dataset_id}: {e}")
 
     def load_json_to_table(self, json_file_path, table_name, write_disposition="WRITE_TRUNCATE"):
-        """Load JSON file to BigQuery table"""
+        """Load a transformed table file (or partitioned table directory) to BigQuery.
+
+        NDJSON and parquet files are uploaded as they are, Arrow IPC files are
+        converted to parquet first, and JSON array files are parsed and sent
+        as rows. Partitions are appended one after the other.
+        """
         table_id = f"{self.project_id}.{self.dataset_id}.{table_name}"
 
         # Check if file exists and has data
-        if not os.path.exists(json_file_path):
+        if not json_file_path or not os.path.exists(json_file_path):
             logger.warning(f"File not found: {json_file_path}")
             return False
-            
-        with open(json_file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
         
-        if not data:
+        part_paths = partition_files(json_file_path) if os.path.isdir(json_file_path) else [json_file_path]
+        file_format = table_format(os.path.basename(part_paths[0])) if part_paths else None
+        data = None
+        if file_format == "json":
+            data = list(iter_records(json_file_path))
+            has_data = bool(data)
+        elif file_format in COLUMNAR_FORMATS:
+            has_data = any(columnar_row_count(part_path) for part_path in part_paths)
+        else:
+            has_data = any(self._has_records(part_path) for part_path in part_paths)
+        
+        if not has_data:
             logger.warning(f"No data to load for table {table_name}")
             return False
         
-        # Configure the load job
-        job_config = bigquery.LoadJobConfig(
-            source_format=bigquery.SourceFormat.NEWLINE_DELIMITED_JSON,
-            autodetect=True,
-            write_disposition=getattr(bigquery.WriteDisposition, write_disposition)
-        )
-        
         try:
-            # Load data
-            job = self.client.load_table_from_json(
-                data, table_id, job_config=job_config
-            )
-            job.result()  # Wait for the job to complete
+            if file_format == "json":
+                job = self.client.load_table_from_json(
+                    data, table_id, job_config=self._job_config(file_format, write_disposition)
+                )
+                job.result()  # Wait for the job to complete
+            else:
+                for part_index, part_path in enumerate(part_paths):
+                    job_config = self._job_config(file_format, write_disposition if part_index == 0 else "WRITE_APPEND")
+                    # BigQuery detects gzip compression of uploaded files itself
+                    with self._open_upload(part_path, file_format) as f:
+                        job = self.client.load_table_from_file(f, table_id, job_config=job_config)
+                    job.result()
             
             # Get table info
             table = self.client.get_table(table_id)
@@ -91,21 +114,44 @@ class BigQueryLoader:
             logger.error(f"❌ Failed to load {table_name}: {str(e)}")
             return False
     
+    @staticmethod
+    def _job_config(file_format, write_disposition):
+        """Load job settings for a table file format"""
+        if file_format in COLUMNAR_FORMATS:
+            # Column types come from the parquet schema
+            return bigquery.LoadJobConfig(
+                source_format=bigquery.SourceFormat.PARQUET,
+                write_disposition=getattr(bigquery.WriteDisposition, write_disposition)
+            )
+        return bigquery.LoadJobConfig(
+            source_format=bigquery.SourceFormat.NEWLINE_DELIMITED_JSON,
+            autodetect=True,
+            write_disposition=getattr(bigquery.WriteDisposition, write_disposition)
+        )
+    
+    @staticmethod
+    def _open_upload(file_path, file_format):
+        if file_format == "arrow":
+            return io.BytesIO(parquet_bytes(file_path))
+        return open(file_path, 'rb')
+    
+    @staticmethod
+    def _has_records(file_path):
+        """True when an NDJSON file holds at least one non-empty line"""
+        opener = gzip.open if file_path.endswith('.gz') else open
+        with opener(file_path, 'rt', encoding='utf-8') as f:
+            return any(line.strip() for line in f)
+    
     def load_all_dimensions(self, dimensions_dir=DIMENSIONS_DIR):
         """Load all dimension tables"""
         success_count = 0
         total_count = 0
         
-        dimension_files = [
-            ("drivers.json", "drivers"),
-            ("teams.json", "teams"), 
-            ("races.json", "races"),
-            ("sessions.json", "sessions"),
-            ('countries.json', 'countries')
-        ]
+        dimension_tables = ["drivers", "teams", "races", "sessions", "countries"]
         
-        for filename, table_name in dimension_files:
-            file_path = os.path.join(dimensions_dir, filename)
+        for table_name in dimension_tables:
+            # drivers.json, drivers.ndjson(.gz), drivers.parquet or drivers.arrow
+            file_path = find_table_file(dimensions_dir, table_name) or os.path.join(dimensions_dir, f"{table_name}.json")
             total_count += 1
             
             if self.load_json_to_table(file_path, table_name):
@@ -123,15 +169,12 @@ class BigQueryLoader:
             logger.warning(f"Facts directory not found: {facts_dir}")
             return False
         
-        # Load all JSON files in facts directory
-        for filename in os.listdir(facts_dir):
-            if filename.endswith('.json'):
-                table_name = filename.replace('.json', '')
-                file_path = os.path.join(facts_dir, filename)
-                total_count += 1
-                
-                if self.load_json_to_table(file_path, table_name):
-                    success_count += 1
+        # Load all table files (JSON, NDJSON, parquet/arrow or partitioned directories) in facts directory
+        for table_name, file_path in list_tables(facts_dir):
+            total_count += 1
+            
+            if self.load_json_to_table(file_path, table_name):
+                success_count += 1
         
         logger.info(f"Facts loaded: {success_count}/{total_count}")
         return success_count == total_count
@@ -140,11 +183,16 @@ class BigQueryLoader:
         """Load both dimensions and facts"""
         logger.info("Starting BigQuery data load...")
         
-        # Load dimensions first (facts reference dimensions)
-        dimensions_success = self.load_all_dimensions()
-        
-        # Load facts
-        facts_success = self.load_all_facts()
+        manifest = load_partition_manifest(TRANSFORMED_DATA_DIR)
+        if manifest is not None:
+            # Partitioned layout: only upload what changed since the last load
+            dimensions_success = facts_success = self.load_changed_tables(manifest)
+        else:
+            # Load dimensions first (facts reference dimensions)
+            dimensions_success = self.load_all_dimensions()
+            
+            # Load facts
+            facts_success = self.load_all_facts()
         
         if dimensions_success and facts_success:
             logger.info("All data loaded successfully to BigQuery!")
@@ -154,6 +202,129 @@ class BigQueryLoader:
             logger.error("Some tables failed to load")
             return False
     
+    def load_changed_tables(self, manifest, transformed_dir=TRANSFORMED_DATA_DIR, state_file=LOAD_STATE_FILE):
+        """Load the tables of a partition manifest whose content changed since the last load.
+
+        Content hashes of every loaded file are kept in `state_file`. Unpartitioned
+        tables are reloaded as a whole; partitioned tables become BigQuery tables
+        partitioned on the season column, where only changed seasons are replaced
+        and seasons without rows anymore are deleted.
+        """
+        state = self._load_state(state_file)
+        loaded = state['tables']
+        success = True
+        
+        for group in ("dimensions", "facts"):
+            for table_name, parts in manifest.get('tables', {}).get(group, {}).items():
+                table_id = f"{self.project_id}.{self.dataset_id}.{table_name}"
+                hashes = {part: entry['hash'] for part, entry in parts.items()}
+                # Tables can disappear with the dataset (7-day expiration), so the state alone is not enough
+                previous = loaded.get(table_name, {}) if self._table_exists(table_id) else {}
+                if hashes == previous:
+                    logger.info(f"{table_name} unchanged, skipped")
+                    continue
+                
+                paths = {part: os.path.join(transformed_dir, group, entry['file']) for part, entry in parts.items()}
+                if list(parts) == [""]:
+                    ok = self.load_json_to_table(paths[""], table_name)
+                else:
+                    ok = self.load_partitions(table_name, paths, hashes, previous)
+                
+                if ok:
+                    loaded[table_name] = hashes
+                    self._save_state(state_file, state)
+                else:
+                    success = False
+        
+        return success
+    
+    def load_partitions(self, table_name, paths, hashes, previous):
+        """Replace the changed season partitions of a table; rebuild it when it is new or has no usable state"""
+        table_id = f"{self.project_id}.{self.dataset_id}.{table_name}"
+        values = {part: partition_value(part) for part in paths}
+        changed = [part for part in sorted(paths) if previous.get(part) != hashes[part]]
+        removed = [part for part in previous if part not in paths]
+        # Only integer partitions can be addressed with a table$<year> decorator
+        rebuild = not previous or any(not isinstance(partition_value(part)[1], int) for part in changed + removed)
+        
+        try:
+            if rebuild:
+                self._rebuild_partitioned_table(table_id, paths, values)
+            else:
+                for part in changed:
+                    column, value = values[part]
+                    self._load_partition(f"{table_id}${value}", paths[part], column, value, "WRITE_TRUNCATE",
+                                         schema=self.client.get_table(table_id).schema)
+                for part in removed:
+                    self.client.delete_table(f"{table_id}${partition_value(part)[1]}", not_found_ok=True)
+            
+            table = self.client.get_table(table_id)
+            logger.info(f"✅ Loaded {table_name}: {len(paths) if rebuild else len(changed)} partition(s) replaced, "
+                        f"{len(removed)} deleted, {table.num_rows} rows in {table_id}")
+            return True
+        
+        except Exception as e:
+            logger.error(f"❌ Failed to load partitions of {table_name}: {str(e)}")
+            return False
+    
+    def _rebuild_partitioned_table(self, table_id, paths, values):
+        """Recreate a table partitioned on its partition column from all partition files"""
+        self.client.delete_table(table_id, not_found_ok=True)
+        parts = sorted(paths)
+        column = values[parts[0]][0]
+        if table_format(os.path.basename(paths[parts[0]])) in COLUMNAR_FORMATS:
+            for part_index, part in enumerate(parts):
+                self._load_partition(table_id, paths[part], column, values[part][1],
+                                     "WRITE_TRUNCATE" if part_index == 0 else "WRITE_APPEND")
+        else:
+            # One NDJSON upload, so schema autodetection sees every season at once
+            payload = b"".join(partition_payload(paths[part], column, values[part][1]) for part in parts)
+            self._upload(table_id, payload, "ndjson", column, "WRITE_TRUNCATE")
+    
+    def _load_partition(self, destination, file_path, column, value, write_disposition, schema=None):
+        file_format = "parquet" if table_format(os.path.basename(file_path)) in COLUMNAR_FORMATS else "ndjson"
+        self._upload(destination, partition_payload(file_path, column, value), file_format, column,
+                     write_disposition, schema)
+    
+    def _upload(self, destination, payload, file_format, column, write_disposition, schema=None):
+        job_config = self._job_config(file_format, write_disposition)
+        job_config.range_partitioning = bigquery.RangePartitioning(
+            field=column,
+            range_=bigquery.PartitionRange(start=PARTITION_RANGE[0], end=PARTITION_RANGE[1], interval=1)
+        )
+        if schema is not None and file_format not in COLUMNAR_FORMATS:
+            # A single season may autodetect other column types than the existing table
+            job_config.autodetect = False
+            job_config.schema = schema
+        job = self.client.load_table_from_file(io.BytesIO(payload), destination, job_config=job_config)
+        job.result()
+    
+    def _table_exists(self, table_id):
+        try:
+            self.client.get_table(table_id)
+            return True
+        except NotFound:
+            return False
+    
+    def _load_state(self, state_file):
+        """Hashes of the files loaded into this dataset by earlier runs"""
+        dataset = f"{self.project_id}.{self.dataset_id}"
+        try:
+            with open(state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = {}
+        if state.get('version') != LOAD_STATE_VERSION or state.get('dataset') != dataset:
+            state = {'version': LOAD_STATE_VERSION, 'dataset': dataset, 'tables': {}}
+        return state
+    
+    @staticmethod
+    def _save_state(state_file, state):
+        tmp_path = state_file + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, state_file)
+    
     def _print_table_summary(self):
         """Print summary of loaded tables"""
         logger.info("\nBigQuery Tables Summary:")
@@ -10,4 +10,6 @@ PROJECT_ROOT = os.getenv('GITHUB_WORKSPACE', os.getcwd())
 DATA_DIR = os.path.join(PROJECT_ROOT, "data")
 TRANSFORMED_DATA_DIR = os.path.join(DATA_DIR, "transformed_data")
 DIMENSIONS_DIR = os.path.join(TRANSFORMED_DATA_DIR, "dimensions")
-FACTS_DIR = os.path.join(TRANSFORMED_DATA_DIR, "facts")
\ No newline at end of file
+FACTS_DIR = os.path.join(TRANSFORMED_DATA_DIR, "facts")
+# Content hashes of the partitions uploaded to BigQuery (partitioned layout)
+LOAD_STATE_FILE = os.path.join(TRANSFORMED_DATA_DIR, "bigquery_load_state.json")
\ No newline at end of file
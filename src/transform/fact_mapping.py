@@ -0,0 +1,121 @@
+import os
+import sys
+from collections import Counter
+
+sys.path.append(os.path.join(os.getcwd(), 'src'))
+from utils.tranform_helpers import safe_float, safe_int
+from transform.fact_records import record_layout, intern_value
+
+# Row mapper actions besides plain converters
+MAP_DRIVER = 'driver'
+MAP_TEAM = 'team'
+
+# Fields a fact table always carries, even when the session lacks the column
+FACT_TEMPLATES = {
+    'pit_stops': {'time': None, 'total': None, 'time_of_day': None},
+    'fastest_laps': {'position': None, 'number': None, 'driver_id': None, 'team_id': None,
+                     'lap': None, 'time': None, 'avg_speed': None, 'time_of_day': None},
+    'practice_results': {'position': None, 'number': None, 'driver_id': None, 'team_id': None,
+                         'time': None, 'laps': None},
+}
+
+def fact_record_base(fact_table):
+    """Layout and default values a fact table's records start from: ID, race, session, then template fields"""
+    template = FACT_TEMPLATES.get(fact_table, {})
+    layout = record_layout((f'{fact_table[:-1]}_id', 'race_id', 'session_id') + tuple(template))
+    return layout, list(template.values())
+
+def _keep(value):
+    return value
+
+def compile_row_mapper(fact_table, headers):
+    """Turn a header into [(column index, record field, converter or MAP_* action)].
+
+    Entries follow the order columns were handled in before, so records keep
+    the same field order; duplicated column names use their last index.
+    """
+    header_indexes = {col: idx for idx, col in enumerate(headers)}
+    mapper = []
+    for col, idx in header_indexes.items():
+        if col == 'DRIVER':
+            mapper.append((idx, 'driver_id', MAP_DRIVER))
+        elif col == 'TEAM':
+            mapper.append((idx, 'team_id', MAP_TEAM))
+        elif fact_table == 'practice_results':
+            # Practice sessions only keep a fixed set of columns
+            if col == 'POS':
+                mapper.append((idx, 'position', intern_value))
+            elif col == 'NO':
+                mapper.append((idx, 'number', safe_int))
+            elif col == 'TIME / GAP':
+                mapper.append((idx, 'time', _keep))
+            elif col == 'LAPS':
+                mapper.append((idx, 'laps', safe_int))
+        elif col == 'TIME':
+            mapper.append((idx, 'time', _keep))
+        elif col == 'NO':
+            mapper.append((idx, 'number', safe_int))
+        elif col == 'LAPS':
+            # Only add 'laps' if not fastest_laps or pit_stop_summary table
+            if fact_table not in ['fastest_laps', 'pit_stops']:
+                mapper.append((idx, 'laps', safe_int))
+        elif col == 'LAP':
+            mapper.append((idx, 'lap', safe_int))
+        elif col == 'PTS':
+            mapper.append((idx, 'points', safe_float))
+        elif col == "STOPS":
+            mapper.append((idx, 'stops', safe_int))
+        elif col in ['POS', 'RACE POS']:
+            mapper.append((idx, 'position', intern_value))
+        elif col == 'TIME / RETIRED':
+            mapper.append((idx, 'time', _keep))
+        elif col == 'AVG SPEED':
+            mapper.append((idx, 'avg_speed', safe_float))
+        else:
+            mapper.append((idx, col.lower().replace(' ', '_'), _keep))
+    return mapper
+
+_row_mappers = {}
+
+def get_row_mapper(fact_table, headers):
+    """Compiled mapper for a (fact_table, header) pair, shared by all files with that header"""
+    mapper_key = (fact_table, tuple(headers))
+    if mapper_key not in _row_mappers:
+        _row_mappers[mapper_key] = compile_row_mapper(fact_table, headers)
+    return _row_mappers[mapper_key]
+
+class RecordPlan:
+    """Where the mapped fields of a (fact_table, header) pair go in a FactRecord's values.
+
+    Template fields have a fixed slot; other fields are appended in the order
+    they are present in a row, as keys added to a dict would be. The layout of
+    each combination of appended fields is looked up once and cached.
+    """
+
+    def __init__(self, fact_table, mapper):
+        self.base, self.defaults = fact_record_base(fact_table)
+        self.base_size = len(self.base.fields)
+        repeated = Counter(field for _, field, _ in mapper if field not in self.base.index)
+        # (column index, field, fixed slot or None, field mapped more than once, converter)
+        self.entries = [(idx, field, self.base.index.get(field), repeated[field] > 1, convert)
+                        for idx, field, convert in mapper]
+        self._layouts = {}
+
+    def layout(self, appended):
+        key = tuple(appended)
+        layout = self._layouts.get(key)
+        if layout is None:
+            layout = self.base
+            for field in appended:
+                layout = layout.extend(field)
+            self._layouts[key] = layout
+        return layout
+
+_record_plans = {}
+
+def get_record_plan(fact_table, headers):
+    """Cached RecordPlan of a (fact_table, header) pair"""
+    plan_key = (fact_table, tuple(headers))
+    if plan_key not in _record_plans:
+        _record_plans[plan_key] = RecordPlan(fact_table, get_row_mapper(fact_table, headers))
+    return _record_plans[plan_key]
@@ -0,0 +1,104 @@
+import sys
+
+# String values repeated across many fact rows; equal values share one object
+INTERNED_FIELDS = ('driver_id', 'team_id', 'position')
+
+def intern_value(value):
+    return sys.intern(value) if type(value) is str else value
+
+class RecordLayout:
+    """Ordered field names shared by every record of the same shape.
+
+    Layouts are interned, and adding a field moves a record to the layout
+    with that field appended (cached per layout), so the transform's
+    thousands of rows share a handful of layouts.
+    """
+    __slots__ = ('fields', 'index', '_extended')
+
+    def __init__(self, fields):
+        self.fields = fields
+        self.index = {field: position for position, field in enumerate(fields)}
+        self._extended = {}
+
+    def extend(self, field):
+        layout = self._extended.get(field)
+        if layout is None:
+            layout = self._extended[field] = record_layout(self.fields + (field,))
+        return layout
+
+    def __reduce__(self):
+        # Unpickled records (e.g. from season workers) share this process's layouts
+        return record_layout, (self.fields,)
+
+_layouts = {}
+
+def record_layout(fields):
+    """Interned RecordLayout of a field sequence"""
+    fields = tuple(sys.intern(field) for field in fields)
+    layout = _layouts.get(fields)
+    if layout is None:
+        layout = _layouts[fields] = RecordLayout(fields)
+    return layout
+
+class FactRecord:
+    """Fact row as a value list plus a shared layout instead of a dict per row.
+
+    Supports the dict operations the transform uses (get, [], assignment,
+    `in`, iteration over fields); assigning a new field appends it like a
+    dict would. to_dict() builds the plain dict when the row is written.
+    """
+    __slots__ = ('layout', 'values')
+
+    def __init__(self, layout, values):
+        self.layout = layout
+        self.values = values
+
+    @classmethod
+    def from_dict(cls, record):
+        return cls(record_layout(record),
+                   [intern_value(value) if field in INTERNED_FIELDS else value for field, value in record.items()])
+
+    def get(self, field, default=None):
+        position = self.layout.index.get(field)
+        return default if position is None else self.values[position]
+
+    def __getitem__(self, field):
+        return self.values[self.layout.index[field]]
+
+    def __setitem__(self, field, value):
+        position = self.layout.index.get(field)
+        if position is None:
+            self.layout = self.layout.extend(field)
+            self.values.append(value)
+        else:
+            self.values[position] = value
+
+    def __contains__(self, field):
+        return field in self.layout.index
+
+    def __iter__(self):
+        return iter(self.layout.fields)
+
+    def __len__(self):
+        return len(self.values)
+
+    def keys(self):
+        return self.layout.fields
+
+    def items(self):
+        return zip(self.layout.fields, self.values)
+
+    def to_dict(self):
+        return dict(zip(self.layout.fields, self.values))
+
+    def __eq__(self, other):
+        if isinstance(other, FactRecord):
+            if self.layout is other.layout:
+                return self.values == other.values
+            other = other.to_dict()
+        return isinstance(other, dict) and self.to_dict() == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"FactRecord({self.to_dict()!r})"
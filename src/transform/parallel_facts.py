@@ -0,0 +1,125 @@
+import os
+import sys
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.join(os.getcwd(), 'src'))
+from utils.tranform_helpers import known_driver_id, team_index
+from transform.raw_loader import RawSeason, group_files_by_season
+
+class _Pending:
+    """Placeholder for an ID a worker could not resolve from the snapshot; `index` points into its pending log"""
+    __slots__ = ('index',)
+
+    def __init__(self, index):
+        self.index = index
+
+class _PendingLog:
+    """Lookups a worker deferred to the merge, in the order the serial transform would make them"""
+
+    def __init__(self):
+        self.entries = []
+        self._placeholders = {}
+
+    def defer(self, key, entry):
+        placeholder = self._placeholders.get(key)
+        if placeholder is None:
+            placeholder = self._placeholders[key] = _Pending(len(self.entries))
+            self.entries.append(entry)
+        return placeholder
+
+class _SnapshotResolver:
+    """DimensionResolver of a worker: names found in the read-only dimension snapshot are resolved
+    right away, every other name is deferred because it would add a driver or team"""
+
+    def __init__(self, drivers, teams, pending):
+        self.drivers = drivers
+        self.teams = teams
+        self.pending = pending
+        self.driver_cache = {}
+
+    def driver(self, driver_name, year):
+        cache_key = f"{driver_name.lower()}|{year}"
+        driver_id = self.driver_cache.get(cache_key)
+        if driver_id is None:
+            driver_id = known_driver_id(driver_name, year, self.drivers) or \
+                self.pending.defer(('driver', cache_key), ('driver', driver_name, year))
+            self.driver_cache[cache_key] = driver_id
+        return driver_id
+
+    def team(self, team_name):
+        return team_index(self.teams).find(team_name) or \
+            self.pending.defer(('team', team_name), ('team', team_name))
+
+class _SnapshotKeys:
+    """KeyRegistry of a worker: assigned keys come from the snapshot, new ones are deferred"""
+
+    def __init__(self, snapshot, pending):
+        self.snapshot = snapshot
+        self.pending = pending
+
+    def get_id(self, namespace, *natural_key):
+        key_id = self.snapshot.get(namespace, {}).get(natural_key)
+        if key_id is None:
+            entry = ('key', namespace, natural_key)
+            key_id = self.pending.defer(entry, entry)
+        return key_id
+
+_worker_context = None
+
+def _init_worker(season_builder, race_id_map, session_id_map, drivers, teams, key_snapshot):
+    global _worker_context
+    _worker_context = (season_builder, race_id_map, session_id_map, drivers, teams, key_snapshot)
+
+def _build_season(year, session_files):
+    season_builder, race_id_map, session_id_map, drivers, teams, key_snapshot = _worker_context
+    pending = _PendingLog()
+    fact_tables = defaultdict(list)
+    # Seasons already run in parallel, so each worker parses its files itself
+    season = RawSeason(year, session_files, workers=1)
+    batches = season_builder(season, race_id_map, session_id_map, _SnapshotResolver(drivers, teams, pending),
+                             fact_tables, _SnapshotKeys(key_snapshot, pending))
+    season.release()
+    return dict(fact_tables), batches, pending.entries
+
+def _replay(entry, resolver, keys):
+    if entry[0] == 'driver':
+        return resolver.driver(entry[1], entry[2])
+    if entry[0] == 'team':
+        return resolver.team(entry[1])
+    return keys.get_id(entry[1], *entry[2])
+
+def transform_seasons_parallel(session_files, season_builder, race_id_map, session_id_map,
+                               resolver, fact_tables, keys, workers):
+    """Build every season's facts in `workers` processes and merge them in season order.
+
+    Workers resolve against a snapshot of the drivers, teams and assigned keys
+    taken before the first season, which only ever grow during the fact stage.
+    Lookups that would add an entry are deferred and replayed here season by
+    season in the order they were made, so new drivers, teams and fact IDs
+    come out exactly as in a serial run. Returns the qualifying batches.
+    """
+    seasons = group_files_by_season(session_files)
+    qualifying_batches = []
+    if not seasons:
+        return qualifying_batches
+
+    dimensions = resolver.dimensions
+    init_args = (season_builder, race_id_map, session_id_map,
+                 dict(dimensions['drivers']), dict(dimensions['teams']), keys.snapshot())
+    with ProcessPoolExecutor(max_workers=min(workers, len(seasons)), initializer=_init_worker,
+                             initargs=init_args) as executor:
+        results = executor.map(_build_season, [year for year, _ in seasons], [files for _, files in seasons])
+        for season_tables, batches, pending in results:
+            resolved = [_replay(entry, resolver, keys) for entry in pending]
+            for table_name, records in season_tables.items():
+                if resolved:
+                    fields = (f'{table_name[:-1]}_id', 'driver_id', 'team_id')
+                    for record in records:
+                        for field in fields:
+                            value = record.get(field)
+                            if type(value) is _Pending:
+                                record[field] = resolved[value.index]
+                fact_tables[table_name].extend(records)
+            qualifying_batches.extend(batches)
+    return qualifying_batches
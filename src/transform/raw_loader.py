@@ -0,0 +1,107 @@
+import os
+import sys
+import atexit
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+sys.path.append(os.path.join(os.getcwd(), 'src'))
+from utils.raw_storage import read_raw_json, raw_json_name
+
+# Files are loaded by a pool of F1_TRANSFORM_WORKERS; "thread" suits I/O and
+# zstd decompression, "process" also spreads JSON decoding over the cores
+TRANSFORM_WORKERS = int(os.getenv("F1_TRANSFORM_WORKERS", str(os.cpu_count() or 1)))
+TRANSFORM_POOL = os.getenv("F1_TRANSFORM_POOL", "thread").lower()
+
+_executors = {}
+
+def _get_executor(pool, workers):
+    key = (pool, workers)
+    if key not in _executors:
+        executor_class = ProcessPoolExecutor if pool == "process" else ThreadPoolExecutor
+        _executors[key] = executor_class(max_workers=workers)
+    return _executors[key]
+
+def shutdown_loader():
+    while _executors:
+        _executors.popitem()[1].shutdown()
+
+atexit.register(shutdown_loader)
+
+def _load_raw_file(file_path):
+    try:
+        return read_raw_json(file_path)
+    except Exception as e:
+        return e
+
+def load_raw_files(file_paths, workers=None, pool=None):
+    """Parse raw files in parallel; results (or the exception raised) come back in input order"""
+    workers = TRANSFORM_WORKERS if workers is None else workers
+    pool = TRANSFORM_POOL if pool is None else pool
+    file_paths = list(file_paths)
+    if workers <= 1 or len(file_paths) <= 1:
+        return [_load_raw_file(file_path) for file_path in file_paths]
+    chunksize = max(1, len(file_paths) // (workers * 4)) if pool == "process" else 1
+    return list(_get_executor(pool, workers).map(_load_raw_file, file_paths, chunksize=chunksize))
+
+def raw_file_key(file_path):
+    """Logical path of a raw file, so race.json and race.json.zst share one key"""
+    return os.path.join(os.path.dirname(file_path), raw_json_name(os.path.basename(file_path)))
+
+def group_files_by_season(session_files):
+    """Group (year, grand_prix, file_path, session_name) tuples by season, keeping discovery order"""
+    seasons = OrderedDict()
+    for entry in session_files:
+        seasons.setdefault(int(entry[0]), []).append(entry)
+    return list(seasons.items())
+
+class RawSeason:
+    """Every raw session file of one season, parsed exactly once.
+
+    Fact building, grid extraction and qualifying combination all read from
+    the same parsed structures. Call release() once the season is done so
+    only one season is held in memory at a time.
+    """
+
+    def __init__(self, year, session_files, workers=None):
+        self.year = year
+        self.session_files = session_files
+        self._data = {}
+        file_paths = {}
+        for _, _, file_path, _ in session_files:
+            file_paths.setdefault(raw_file_key(file_path), file_path)
+        # Errors are kept so the caller reports them where it used to
+        for key, data in zip(file_paths, load_raw_files(file_paths.values(), workers)):
+            self._data[key] = data
+
+    def __contains__(self, file_path):
+        return raw_file_key(file_path) in self._data
+
+    def get(self, file_path):
+        """Parsed content of a season file; raises the error hit while loading it"""
+        key = raw_file_key(file_path)
+        if key not in self._data:
+            raise FileNotFoundError(file_path)
+        data = self._data[key]
+        if isinstance(data, Exception):
+            raise data
+        return data
+
+    def files_named(self, file_name):
+        """(grand_prix, file_path) of every season file with this logical name, e.g. starting_grid.json"""
+        for _, grand_prix, file_path, _ in self.session_files:
+            if raw_json_name(os.path.basename(file_path)) == file_name:
+                yield grand_prix, file_path
+
+    def release(self):
+        self._data = {}
+
+def iter_raw_seasons(session_files):
+    """Yield one loaded RawSeason at a time, releasing the previous one first"""
+    season = None
+    for year, files in group_files_by_season(session_files):
+        if season is not None:
+            season.release()
+        season = RawSeason(year, files)
+        yield season
+    if season is not None:
+        season.release()
@@ -0,0 +1,26 @@
+# Column types of the transformed tables for columnar (parquet/arrow) output.
+# Columns not listed here (e.g. extra session columns) get a type inferred from their values.
+TABLE_SCHEMAS = {
+    'races': {'race_id': 'int64', 'year': 'int64', 'start_date': 'date', 'end_date': 'date'},
+    'sessions': {'session_id': 'int64', 'session_order': 'int64', 'category': 'int64'},
+    'drivers': {'driver_id': 'string', 'driver_name': 'string'},
+    'teams': {'team_id': 'string', 'team_name': 'string'},
+    'countries': {'country_code': 'string', 'country_name': 'string'},
+    'race_results': {'race_result_id': 'int64', 'race_id': 'int64', 'session_id': 'int64', 'position': 'string',
+                     'number': 'int64', 'laps': 'int64', 'time': 'string', 'points': 'float64'},
+    'practice_results': {'practice_result_id': 'int64', 'race_id': 'int64', 'session_id': 'int64',
+                         'position': 'string', 'number': 'int64', 'time': 'string', 'laps': 'int64'},
+    'qualifying_results': {'qualifying_result_id': 'int64', 'race_id': 'int64', 'session_id': 'int64',
+                           'position': 'string', 'number': 'int64', 'q1': 'string', 'q2': 'string', 'q3': 'string',
+                           'qualifying_time': 'string', 'laps': 'int64', 'starting_grid': 'int64'},
+    'fastest_laps': {'fastest_lap_id': 'int64', 'race_id': 'int64', 'session_id': 'int64', 'position': 'string',
+                     'number': 'int64', 'lap': 'int64', 'time': 'string', 'avg_speed': 'float64',
+                     'time_of_day': 'string'},
+    'pit_stops': {'pit_stop_id': 'int64', 'race_id': 'int64', 'session_id': 'int64', 'number': 'int64',
+                  'lap': 'int64', 'stops': 'int64', 'time': 'string', 'total': 'string', 'time_of_day': 'string'},
+    'driver_standings': {'driver_standing_id': 'int64', 'position': 'string', 'points': 'float64', 'year': 'int64'},
+    'team_standings': {'team_standing_id': 'int64', 'position': 'string', 'points': 'float64', 'year': 'int64'},
+}
+
+# Large fact tables written as one partition per season (year=YYYY/) in columnar output
+PARTITIONED_TABLES = ('race_results', 'practice_results', 'qualifying_results')
@@ -1,8 +1,8 @@
 import os
 import json
 from collections import defaultdict
+from itertools import groupby
 import re
-import datetime
 import sys
 import logging
 
@@ -11,12 +11,34 @@ logger = logging.getLogger(__name__)
 
 sys.path.append(os.path.join(os.getcwd(), 'src'))
 
-from utils.tranform_helpers import safe_float, safe_int, get_fact_table_name, generate_team_id, \
-                                generate_unique_driver_id, normalize_driver_name, find_driver_id
+from utils.tranform_helpers import safe_float, safe_int, get_fact_table_name, resolve_team, \
+                                generate_unique_driver_id, normalize_driver_name, find_driver_id, driver_index, race_slug, \
+                                DimensionResolver
 from utils.country_list import country_list
+from utils.raw_storage import read_raw_json, raw_json_name, load_manifest, plan_raw_files
+from utils.key_registry import KeyRegistry
+from utils.date_ranges import parse_date_range
+from utils.table_io import write_table, find_table_file, load_partition_manifest, save_partition_manifest, \
+    OUTPUT_FORMAT, TABLE_SUFFIXES, COLUMNAR_FORMATS, MANIFEST_FILE, MANIFEST_VERSION
 
-from transform.transform_qualifying import extract_starting_grid_positions, is_multi_part_qualifying, process_combined_qualifying, \
-                                 enforce_qualifying_schema, DATA_DIR, RACE_DATA_DIR
+from transform.transform_qualifying import extract_race_grids, is_multi_part_qualifying, collect_combined_qualifying, \
+                                 add_combined_qualifying, enforce_qualifying_schema, DATA_DIR, RACE_DATA_DIR
+from transform.raw_loader import iter_raw_seasons, load_raw_files
+from transform.fact_mapping import MAP_DRIVER, MAP_TEAM, get_record_plan
+from transform.fact_records import FactRecord
+from transform.parallel_facts import transform_seasons_parallel
+from transform.table_schemas import TABLE_SCHEMAS, PARTITIONED_TABLES
+from transform.transform_state import build_state, load_state, save_state, load_previous_output, merge_race_facts, \
+                                 race_input_key
+
+TRANSFORM_DIR = os.path.join(DATA_DIR, "transformed_data")
+# Only recompute races whose raw inputs changed since the previous run (also --incremental)
+TRANSFORM_INCREMENTAL = os.getenv("F1_TRANSFORM_INCREMENTAL", "0").lower() in ("1", "true", "yes")
+# Build the facts of different seasons in this many processes (0 or 1: in this process); output is identical
+TRANSFORM_SEASON_WORKERS = int(os.getenv("F1_TRANSFORM_SEASON_WORKERS", "0"))
+# Output layout: "tables" (one file per table) or "partitioned" (race facts split by season, with a
+# partition manifest so only changed partitions are rewritten and re-uploaded)
+TRANSFORM_LAYOUT = os.getenv("F1_TRANSFORM_LAYOUT", "tables").lower()
 
 def discover_sessions():
     """Discover all session types and their schemas"""
@@ -24,56 +46,49 @@ def discover_sessions():
     session_files = []  # List of (year, grand_prix, file_path, session_name)
     race_metadata = []  # List of (year, grand_prix, file_path)
     
-    # Walk through the directory structure
-    for year_dir in os.listdir(RACE_DATA_DIR):
-        year_path = os.path.join(RACE_DATA_DIR, year_dir)
-        if not os.path.isdir(year_path):
-            continue
-            
+    # Plan from the crawler manifest, or walk the directory structure (and season packs)
+    manifest = load_manifest(RACE_DATA_DIR)
+    planned = []
+    for year_dir, grand_prix, file_name, file_path in plan_raw_files(RACE_DATA_DIR, nested=True, manifest=manifest):
         try:
-            year = int(year_dir)
+            planned.append((int(year_dir), grand_prix, file_name, file_path))
         except ValueError:
             continue
-            
-        for gp_dir in os.listdir(year_path):
-            gp_path = os.path.join(year_path, gp_dir)
-            if not os.path.isdir(gp_path):
-                continue
+    
+    # Without a manifest the files are parsed season by season in parallel
+    for _, entries in groupby(planned, key=lambda entry: entry[0]):
+        entries = list(entries)
+        contents = load_raw_files(entry[3] for entry in entries) if manifest is None else [None] * len(entries)
+        
+        for (year, grand_prix, file_name, file_path), data in zip(entries, contents):
+            try:
+                # The manifest already carries session name and header
+                data = manifest.get(file_path) if manifest is not None else data
+                if isinstance(data, Exception):
+                    raise data
                 
-            grand_prix = gp_dir
-            
-            for file_name in os.listdir(gp_path):
-                if not file_name.endswith('.json'):
+                # Handle race_metadata differently
+                if 'race_metadata' in file_name:
+                    race_metadata.append((year, grand_prix, file_path))
+                    # Still add to session_types for completeness
+                    session_types['race_metadata'].add(())
                     continue
-                    
-                file_path = os.path.join(gp_path, file_name)
                 
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                    
-                    # Handle race_metadata differently
-                    if 'race_metadata' in file_name:
-                        race_metadata.append((year, grand_prix, file_path))
-                        # Still add to session_types for completeness
-                        session_types['race_metadata'].add(())
-                        continue
-                    
-                    # Extract session name and headers
-                    session_name = data.get('session_name', 
-                                           re.sub(r'\.json$', '', file_name))
-                    
-                    headers = tuple(data.get('header', []))
-                    session_types[session_name].add(headers)
-                    
-                    session_files.append((year, grand_prix, file_path, session_name))
-                except Exception as e:
-                    print(f"Error processing {file_path}: {e}")
+                # Extract session name and headers
+                session_name = data.get('session_name') or re.sub(r'\.json$', '', raw_json_name(file_name))
+                
+                headers = tuple(data.get('header') or [])
+                session_types[session_name].add(headers)
+                
+                session_files.append((year, grand_prix, file_path, session_name))
+            except Exception as e:
+                print(f"Error processing {file_path}: {e}")
     
     return session_types, session_files, race_metadata
 
-def extract_race_sessions_dimensions(session_files, race_metadata_files):
-    """Extract dimension data from all files"""
+def extract_race_sessions_dimensions(session_files, race_metadata_files, keys=None):
+    """Extract dimension data from all files; race and session IDs come from the key registry"""
+    keys = keys if keys is not None else KeyRegistry(None)
     races = {}    # race_id -> race_info
     sessions = {} # session_name -> session_id
     
@@ -88,54 +103,18 @@ def extract_race_sessions_dimensions(session_files, race_metadata_files):
     # First process race_metadata to build races dimension
     for year, grand_prix, file_path in race_metadata_files:
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                metadata = json.load(f)
+            metadata = read_raw_json(file_path)
             
-            race_id = len(races) + 1
+            race_id = keys.get_id('races', int(year), race_slug(grand_prix))
             
-            # Convert date string to standard format if possible
+            # Race weekend dates are written as ISO dates
             date_str = metadata.get('date', '')
             try:
-                # Try to handle date ranges like "25 - 27 Oct 2024"
-                if ' - ' in date_str:
-                    # Split the date range
-                    date_parts = date_str.split(' - ')
-                    start_part = date_parts[0]
-                    end_part = date_parts[1]
-                    
-                    # Parse the end date first (which always has complete information)
-                    end_parts = end_part.split()
-                    
-                    # Fix the start part based on what's missing
-                    start_parts = start_part.split()
-                    if len(start_parts) == 2:  # Only day and month
-                        # Check if months are different
-                        if len(end_parts) >= 2 and start_parts[1] != end_parts[1]:
-                            # Different months, just add the year
-                            start_part = f"{start_part} {end_parts[-1]}"
-                        else:
-                            # Same month or can't determine, add month and year from end
-                            start_part = f"{start_parts[0]} {' '.join(end_parts[1:])}"
-                    elif len(start_parts) == 1:  # Only day
-                        # Add month and year from end
-                        start_part = f"{start_part} {' '.join(end_parts[1:])}"
-                    
-                    # Parse both dates
-                    start_date_obj = datetime.datetime.strptime(start_part, '%d %b %Y')
-                    end_date_obj = datetime.datetime.strptime(end_part, '%d %b %Y')
-                    
-                    # Format in standard format
-                    start_date = start_date_obj.strftime('%d-%m-%Y')
-                    end_date = end_date_obj.strftime('%d-%m-%Y')
-                else:
-                    # Single date - use the same for both start and end
-                    date_obj = datetime.datetime.strptime(date_str, '%d %b %Y')
-                    start_date = end_date = date_obj.strftime('%d-%m-%Y')
-                    
-            except Exception as e:
-                # Keep original if parsing fails
+                start_date, end_date = (date.isoformat() for date in parse_date_range(date_str))
+            except ValueError as e:
+                # Unknown dates (e.g. "TBC") stay empty
                 print(f"Date parsing error for '{date_str}': {e}")
-                start_date = end_date = date_str
+                start_date = end_date = None
                 
             races[race_id] = {
                 'race_id': race_id,
@@ -150,7 +129,7 @@ def extract_race_sessions_dimensions(session_files, race_metadata_files):
             print(f"Error processing metadata {file_path}: {e}")
             
             # Create minimal race entry if metadata processing fails
-            race_id = len(races) + 1
+            race_id = keys.get_id('races', int(year), race_slug(grand_prix))
             races[race_id] = {
                 'race_id': race_id,
                 'year': int(year),
@@ -218,7 +197,7 @@ def extract_race_sessions_dimensions(session_files, race_metadata_files):
     session_names = [name for name in session_names if name not in EXCLUDED_SESSIONS]
     
     for session_name in sorted(session_names, key=get_session_category):
-        session_id = len(sessions) + 1
+        session_id = keys.get_id('sessions', session_name)
         session_order = get_session_category(session_name)
         sessions[session_name] = {
             'session_id': session_id,
@@ -236,29 +215,23 @@ def extract_drivers_dimensions():
     drivers = {}
     drivers_data_dir = os.path.join(DATA_DIR, "f1_drivers_data")
     
-    for year_dir in os.listdir(drivers_data_dir):
-        year_path = os.path.join(drivers_data_dir, year_dir)
-        if not os.path.isdir(year_path):
-            continue
+    file_paths = [file_path for _, _, _, file_path in plan_raw_files(drivers_data_dir)]
+    for file_path, driver_data in zip(file_paths, load_raw_files(file_paths)):
+        try:
+            if isinstance(driver_data, Exception):
+                raise driver_data
             
-        for file_name in os.listdir(year_path):
-            if file_name.endswith('.json'):
-                file_path = os.path.join(year_path, file_name)
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        driver_data = json.load(f)
-                    
-                    driver_code = driver_data.get('driver_code')
-                    driver_name = driver_data.get('name')
-                    
-                    if driver_code and driver_name:
-                        drivers[driver_code] = {
-                            'driver_id': driver_code,
-                            'driver_name': normalize_driver_name(driver_name)
-                            # Nationality removed
-                        }
-                except Exception as e:
-                    print(f"Error processing driver file {file_path}: {e}")
+            driver_code = driver_data.get('driver_code')
+            driver_name = driver_data.get('name')
+            
+            if driver_code and driver_name:
+                drivers[driver_code] = {
+                    'driver_id': driver_code,
+                    'driver_name': normalize_driver_name(driver_name)
+                    # Nationality removed
+                }
+        except Exception as e:
+            print(f"Error processing driver file {file_path}: {e}")
     
     return drivers
 
@@ -270,8 +243,7 @@ def extract_driver_standings_facts(dimensions):
     driver_standings = []
     
     try:
-        with open(driver_standings_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = read_raw_json(driver_standings_file)
         
         for idx, row in enumerate(data.get('drivers', []), start=1):
             if len(row) >= 6:
@@ -280,43 +252,8 @@ def extract_driver_standings_facts(dimensions):
                 country_code = row[2]
                 year = safe_int(row[5])
                 
-                # Simple era-based matching for Nelson Piquet
-                driver_id = None
-
-                if driver_name.lower() == "nelson piquet":
-                    # Apply era-based matching using year
-                    if year <= 1991:
-                        # Update Sr. (NELPIQ01)
-                        for d_id, d_info in dimensions['drivers'].items():
-                            if d_info['driver_name'].lower() == driver_name.lower() and "01" in d_id:
-                                driver_id = d_id
-                                break
-                    else:
-                        # Update Jr. (NELPIQ02)
-                        for d_id, d_info in dimensions['drivers'].items():
-                            if d_info['driver_name'].lower() == driver_name.lower() and "02" in d_id:
-                                driver_id = d_id
-                                break
-                elif driver_name.lower() == "robert doornbos":
-                    # Apply era-based matching using year
-                    if year == 2005:
-                        for d_id, d_info in dimensions['drivers'].items():
-                            if d_info['driver_name'].lower() == driver_name.lower() and "02" in d_id:
-                                driver_id = d_id
-                                break
-                    else:
-                        for d_id, d_info in dimensions['drivers'].items():
-                            if d_info['driver_name'].lower() == driver_name.lower() and "01" in d_id:
-                                driver_id = d_id
-                                break
-                            
-                else:
-                    # Regular name matching for other drivers
-                    if not driver_id:
-                        for d_id, d_info in dimensions['drivers'].items():
-                            if d_info['driver_name'].lower() == driver_name.lower():
-                                driver_id = d_id
-                                break
+                # Indexed name matching, era-aware for Nelson Piquet and Robert Doornbos
+                driver_id = driver_index(dimensions['drivers']).find_exact(driver_name, year)
                         
                 # If no driver found, create new one
                 if not driver_id:
@@ -329,21 +266,8 @@ def extract_driver_standings_facts(dimensions):
                         'driver_id': driver_id,
                     }
                 
-                # Handle team matching
-                team_id = None
-                if car_name:  # This check prevents creating empty teams
-                    for t_id, t_info in dimensions['teams'].items():
-                        if t_info['team_name'].lower() == car_name.lower():
-                            team_id = t_id
-                            break
-                    
-                    # Only create new team if car_name exists and no match found
-                    if not team_id:
-                        team_id = generate_team_id(car_name)
-                        dimensions['teams'][team_id] = {
-                            'team_id': team_id,
-                            'team_name': car_name
-                        }
+                # Indexed team matching; an empty car_name never creates a team
+                team_id = resolve_team(car_name, dimensions['teams']) if car_name else None
                     
                 driver_standings.append({
                     'driver_standing_id': idx,
@@ -368,25 +292,13 @@ def extract_team_standings_facts(dimensions):
     team_standings = []
     
     try:
-        with open(team_standings_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = read_raw_json(team_standings_file)
         
         for idx, row in enumerate(data.get('teams', []), start=1):
             if len(row) >= 4:
                 team_name = row[1]
                 
-                team_id = None
-                for t_id, t_info in dimensions['teams'].items():
-                    if t_info['team_name'].lower() == team_name.lower():
-                        team_id = t_id
-                        break
-                
-                if not team_id:
-                    team_id = generate_team_id(team_name)
-                    dimensions['teams'][team_id] = {
-                        'team_id': team_id,
-                        'team_name': team_name
-                    }
+                team_id = resolve_team(team_name, dimensions['teams'])
                 
                 team_standings.append({
                     'team_standing_id': idx,
@@ -405,60 +317,77 @@ def extract_teams_dimensions():
     teams = {}
     teams_data_dir = os.path.join(DATA_DIR, "f1_teams_data")
     
-    for year_dir in os.listdir(teams_data_dir):
-        year_path = os.path.join(teams_data_dir, year_dir)
-        if not os.path.isdir(year_path):
-            continue
+    file_paths = [file_path for _, _, _, file_path in plan_raw_files(teams_data_dir)]
+    for file_path, team_data in zip(file_paths, load_raw_files(file_paths)):
+        try:
+            if isinstance(team_data, Exception):
+                raise team_data
             
-        for file_name in os.listdir(year_path):
-            if file_name.endswith('.json'):
-                file_path = os.path.join(year_path, file_name)
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        team_data = json.load(f)
-                    
-                    team_name = team_data.get('name')
-                    
-                    if team_name:
-                        team_id = generate_team_id(team_name) 
-                        teams[team_id] = {
-                            'team_id': team_id,
-                            'team_name': team_name,
-                            # 'url': team_data.get('url', '')
-                        }
-                except Exception as e:
-                    print(f"Error processing team file {file_path}: {e}")
+            team_name = team_data.get('name')
+            
+            if team_name:
+                # Yearly files of the same team (or an alias) share one entry
+                resolve_team(team_name, teams)
+        except Exception as e:
+            print(f"Error processing team file {file_path}: {e}")
     
     return teams
 
-def transform_race_results_to_facts(session_files, dimensions):
-    """Transform session files into fact records"""
+def transform_race_results_to_facts(session_files, dimensions, keys=None, season_workers=None):
+    """Transform session files into fact records; fact IDs come from the key registry"""
+    keys = keys if keys is not None else KeyRegistry(None)
+    season_workers = TRANSFORM_SEASON_WORKERS if season_workers is None else season_workers
+    
     # Map year+grand_prix to race_id
     race_id_map = {}
     for race_id, race_info in dimensions['races'].items():
-        race_id_map[(race_info['year'], race_info['grand_prix'].lower().replace(' ', '_').replace('-', '_').replace("'", ""))] = race_id
+        race_id_map[(race_info['year'], race_slug(race_info['grand_prix']))] = race_id
     
-    # Build lookup maps
-    team_id_map = {t['team_name']: t['team_id'] for t in dimensions['teams'].values()}
+    # Build lookup maps; teams resolve through the shared team index
     session_id_map = {s['session_name']: s['session_id'] for s in dimensions['sessions'].values()}
     
-    # Track missing drivers to add to dimensions
-    missing_drivers = {}
-    
-    # Create driver cache with year-aware keys for Nelson Piquet
-    driver_cache = {}  # key = "driver_name|year" for Nelson Piquet, just "driver_name" for others
+    # Driver/team IDs; missing drivers are added to the dimension once every season is done
+    resolver = DimensionResolver(dimensions)
     
     # Create fact tables
     fact_tables = defaultdict(list)
-    fact_counters = defaultdict(int)
 
+    if season_workers > 1:
+        # Seasons are built in worker processes and merged back in season order
+        qualifying_batches = transform_seasons_parallel(
+            session_files, transform_season_facts, race_id_map, session_id_map,
+            resolver, fact_tables, keys, season_workers
+        )
+    else:
+        # Qualifying batches are collected season by season
+        qualifying_batches = []
+        
+        # Load one season at a time; each raw file is parsed once and shared below
+        for season in iter_raw_seasons(session_files):
+            qualifying_batches.extend(transform_season_facts(
+                season, race_id_map, session_id_map, resolver, fact_tables, keys
+            ))
+    
+    # Add missing drivers to dimensions
+    dimensions['drivers'].update(resolver.missing_drivers)
+    
+    # Process combined qualifying sessions
+    add_combined_qualifying(qualifying_batches, dimensions, fact_tables, keys)
+
+    # Enforce schema for qualifying_results
+    enforce_qualifying_schema(fact_tables)
+
+    return fact_tables
+
+def transform_season_facts(season, race_id_map, session_id_map, resolver, fact_tables, keys):
+    """Add one loaded season's session facts; returns its combined qualifying batches, resolved later"""
     # Group qualifying sessions by race for combining
     qualifying_sessions = defaultdict(list)  # race_key -> list of (session_name, file_path)
     other_sessions = []
     
     # First pass: separate qualifying sessions from others
-    for year, grand_prix, file_path, session_name in session_files:
-        race_key = (int(year), grand_prix.lower().replace(' ', '_').replace('-', '_').replace("'", ""))
+    for year, grand_prix, file_path, session_name in season.session_files:
+        race_key = (int(year), race_slug(grand_prix))
         
         if session_name == "Starting Grid":
             continue
@@ -469,8 +398,21 @@ def transform_race_results_to_facts(session_files, dimensions):
             other_sessions.append((year, grand_prix, file_path, session_name))
     
     # Process regular sessions normally
+    transform_session_facts(other_sessions, season, race_id_map, session_id_map, resolver, fact_tables, keys)
+    
+    # Starting/sprint grids per race, only needed while this season's qualifying is combined
+    race_grids = extract_race_grids(season, race_id_map)
+    
+    # Combine qualifying sessions; IDs are resolved once every season is done
+    return collect_combined_qualifying(qualifying_sessions, season, race_id_map, session_id_map, race_grids)
+
+def transform_session_facts(other_sessions, season, race_id_map, session_id_map, resolver, fact_tables, keys):
+    """Turn one season's non-qualifying session files into fact records.
+
+    A fact row is identified by (year, race slug, session name, row number).
+    """
     for year, grand_prix, file_path, session_name in other_sessions:
-        race_key = (int(year), grand_prix.lower().replace(' ', '_').replace('-', '_').replace("'", ""))
+        race_key = (int(year), race_slug(grand_prix))
         race_id = race_id_map.get(race_key)
         
         if race_id is None:
@@ -480,153 +422,44 @@ def transform_race_results_to_facts(session_files, dimensions):
         session_id = session_id_map.get(session_name)        
         
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            headers = data.get('header', [])
-            header_indexes = {col: idx for idx, col in enumerate(headers)}
+            data = season.get(file_path)
             
             fact_table = get_fact_table_name(session_name)
             if fact_table is None:
                 continue
             
-            for row in data.get('data', []):
-                fact_counters[fact_table] += 1
-                record = {
-                    f'{fact_table[:-1]}_id': fact_counters[fact_table],
-                    'race_id': race_id,
-                    'session_id': session_id
-                }
-                
-                if fact_table == 'pit_stops':
-                    record.update({
-                        'time' : None,
-                        'total' : None,
-                        'time_of_day' : None,
-                    })
-                    
-                if fact_table == 'fastest_laps':
-                    record.update({
-                        'position': None,
-                        'number': None,
-                        'driver_id': None,
-                        'team_id': None,
-                        'lap': None,
-                        'time': None,
-                        'avg_speed': None,
-                        'time_of_day': None,
-                    })
+            plan = get_record_plan(fact_table, data.get('header', []))
+            defaults = plan.defaults
+            base_size = plan.base_size
+            records = fact_tables[fact_table]
+            
+            for row_number, row in enumerate(data.get('data', []), start=1):
+                values = [keys.get_id(fact_table, race_key[0], race_key[1], session_name, row_number),
+                          race_id, session_id, *defaults]
+                appended = []
                 
-                # Handle practice sessions with specific column mapping
-                if fact_table == 'practice_results':
-                    # Initialize all practice fields to null first
-                    record['position'] = None
-                    record['number'] = None
-                    record['driver_id'] = None
-                    record['team_id'] = None
-                    record['time'] = None
-                    record['laps'] = None
-                    
-                    # Then populate available data
-                    for col, idx in header_indexes.items():
-                        if idx < len(row) and row[idx]:
-                            if col == 'DRIVER':
-                                driver_name = row[idx]
-                                driver_id =  find_driver_id(driver_name, year, driver_cache, dimensions, missing_drivers)
-                                record['driver_id'] = driver_id
-                            elif col == 'TEAM':
-                                team_name = row[idx]
-                                team_id = team_id_map.get(team_name)
-                                if not team_id:
-                                    # Generate team_id and add to dimensions
-                                    team_id = generate_team_id(team_name)
-                                    
-                                    # Add to team dimensions
-                                    dimensions['teams'][team_id] = {
-                                        'team_id': team_id,
-                                        'team_name': team_name
-                                    }
-                                    
-                                    # Update the team_id_map for future lookups
-                                    team_id_map[team_name] = team_id
-                                    
-                                record['team_id'] = team_id
-                            elif col == 'POS':
-                                record['position'] = row[idx]
-                            elif col == 'NO':
-                                record['number'] = safe_int(row[idx])
-                            elif col == 'TIME / GAP':
-                                record['time'] = row[idx]
-                            elif col == 'LAPS':
-                                record['laps'] = safe_int(row[idx])
-                else:
-                    # Handle other session types
-                    for col, idx in header_indexes.items():
-                        if idx < len(row) and row[idx]:
-                            if col == 'DRIVER':
-                                driver_name = row[idx]
-                                driver_id = find_driver_id(driver_name, year, driver_cache, dimensions, missing_drivers)
-                                record['driver_id'] = driver_id
-                            elif col == 'TEAM':
-                                team_name = row[idx]
-                                team_id = team_id_map.get(team_name)
-                                if not team_id:
-                                    # Generate team_id and add to dimensions
-                                    team_id = generate_team_id(team_name)
-                                    
-                                    # Add to team dimensions
-                                    dimensions['teams'][team_id] = {
-                                        'team_id': team_id,
-                                        'team_name': team_name
-                                    }
-                                    
-                                    # Update the team_id_map for future lookups
-                                    team_id_map[team_name] = team_id
-                                    
-                                record['team_id'] = team_id
-                                
-                            elif col == 'TIME':
-                                record['time'] = row[idx]
-                            elif col == 'NO':
-                                record['number'] = safe_int(row[idx])
-                            elif col == 'LAPS':
-                                # Only add 'laps' if not fastest_laps or pit_stop_summary table
-                                if fact_table not in ['fastest_laps', 'pit_stops']:
-                                    record['laps'] = safe_int(row[idx])
-                            elif col == 'LAP':
-                                record['lap'] = safe_int(row[idx])
-                            elif col == 'PTS':
-                                record['points'] = safe_float(row[idx])
-                            elif col == "STOPS":
-                                record['stops'] = safe_int(row[idx])
-                            elif col in ['POS', 'RACE POS']:
-                                record['position'] = row[idx]
-                            elif col == 'TIME / RETIRED':
-                                record['time'] = row[idx]
-                            elif col == 'AVG SPEED':
-                                record['avg_speed'] = safe_float(row[idx])
-                            else:
-                                col_name = col.lower().replace(' ', '_')
-                                record[col_name] = row[idx]
+                row_length = len(row)
+                for idx, field, slot, repeated, convert in plan.entries:
+                    if idx < row_length and row[idx]:
+                        value = row[idx]
+                        if convert is MAP_DRIVER:
+                            value = resolver.driver(value, year)
+                        elif convert is MAP_TEAM:
+                            value = resolver.team(value)
+                        else:
+                            value = convert(value)
+                        # Same placement as setting the field on a dict
+                        if slot is not None:
+                            values[slot] = value
+                        elif repeated and field in appended:
+                            values[base_size + appended.index(field)] = value
+                        else:
+                            appended.append(field)
+                            values.append(value)
                 
-                fact_tables[fact_table].append(record)
+                records.append(FactRecord(plan.layout(appended), values))
         except Exception as e:
             print(f"Error transforming {file_path}: {e}")
-    
-    # Add missing drivers to dimensions
-    dimensions['drivers'].update(missing_drivers)
-    
-    # Extract starting grid positions and times
-    starting_grid_map, starting_grid_times, sprint_grid_map, sprint_grid_times = extract_starting_grid_positions(race_id_map)
-    
-    # Process combined qualifying sessions
-    process_combined_qualifying(qualifying_sessions, dimensions, fact_tables, fact_counters, 
-                              starting_grid_map, starting_grid_times, sprint_grid_map, sprint_grid_times)
-
-    # Enforce schema for qualifying_results
-    enforce_qualifying_schema(fact_tables)
-
-    return fact_tables
 
 def extract_countries_dimensions(country_list):
     """Create countries dimension table from predefined list"""
@@ -641,7 +474,10 @@ def extract_countries_dimensions(country_list):
     logger.info(f"Created {len(countries)} countries")
     return countries
 
-def main():
+def main(incremental=None):
+    """Run the transform; incremental runs only recompute races whose raw inputs changed"""
+    if incremental is None:
+        incremental = TRANSFORM_INCREMENTAL
     logger.info("Starting F1 Data Transformation...")
     
     # Step 1: Discover all sessions
@@ -662,11 +498,25 @@ def main():
     logger.info(f"\nTotal session files: {len(session_files)}")
     logger.info(f"Total race metadata files: {len(race_metadata)}")
     
+    # Stable IDs for races, sessions and fact rows across runs
+    keys = KeyRegistry()
+    
+    state = None
+    if incremental:
+        state = build_state(session_files, race_metadata, RACE_DATA_DIR, DATA_DIR)
+        previous_state = load_state(TRANSFORM_DIR)
+        if previous_state is None:
+            logger.info("No previous transform state, running a full transform")
+        elif (previous_state['code'], previous_state['dimension_inputs']) != (state['code'], state['dimension_inputs']):
+            logger.info("Transform code or driver/team inputs changed, running a full transform")
+        elif transform_incremental(session_files, race_metadata, state, previous_state, keys):
+            return True
+    
     # Step 2: Extract all dimensions
     logger.info("\n2. Extracting dimensions...")
     
     # Extract from f1_data folder
-    race_sessions_dims = extract_race_sessions_dimensions(session_files, race_metadata)
+    race_sessions_dims = extract_race_sessions_dimensions(session_files, race_metadata, keys)
     
     # Extract from dedicated folders
     drivers_dims = extract_drivers_dimensions()
@@ -693,7 +543,7 @@ def main():
     fact_tables['team_standings'] = extract_team_standings_facts(dimensions)
     fact_tables['driver_standings'] = extract_driver_standings_facts(dimensions)
     
-    race_results = transform_race_results_to_facts(session_files, dimensions)
+    race_results = transform_race_results_to_facts(session_files, dimensions, keys)
     fact_tables.update(race_results)
     
     logger.info("Fact tables created:")
@@ -703,34 +553,128 @@ def main():
     # Step 4: Save the results
     logger.info("\n4. Saving transformed data...")
     save_transformed_data(dimensions, fact_tables)
+    if state is not None:
+        save_state(TRANSFORM_DIR, state)
+    keys.close()
     
     logger.info("\n✅ Transformation complete!")
     
     return True
 
-def save_transformed_data(dimensions, facts):
-    """Save transformed data as JSON files"""
-    TRANSFORM_DIR = os.path.join(DATA_DIR, "transformed_data")
-    
-    # Create output directories
-    os.makedirs(os.path.join(TRANSFORM_DIR, "dimensions"), exist_ok=True)
-    os.makedirs(os.path.join(TRANSFORM_DIR, "facts"), exist_ok=True)
-    
-    # Save dimensions
-    for dim_name, dim_data in dimensions.items():
-        dim_path = os.path.join(TRANSFORM_DIR, "dimensions", f'{dim_name}.json')
-        dim_list = list(dim_data.values())
-        
-        with open(dim_path, 'w', encoding='utf-8') as f:
-            json.dump(dim_list, f, indent=2, ensure_ascii=False)
-            logger.info(f"  Saved {len(dim_list)} {dim_name} to {dim_name}.json")
+def transform_incremental(session_files, race_metadata, state, previous_state, keys):
+    """Recompute only races whose inputs changed and merge them into the previous output.
+
+    Returns False when the previous output cannot be used, so the caller falls back
+    to a full transform.
+    """
+    changed = {race for race, race_hash in state['races'].items() if previous_state['races'].get(race) != race_hash}
+    removed = set(previous_state['races']) - set(state['races'])
+    if not changed and not removed and find_table_file(os.path.join(TRANSFORM_DIR, "dimensions"), "races"):
+        logger.info("\nNo raw inputs changed since the last transform, keeping previous output")
+        keys.close()
+        return True
+    
+    previous = load_previous_output(TRANSFORM_DIR)
+    if previous is None:
+        return False
+    previous_dimensions, previous_facts = previous
+    logger.info(f"\nIncremental transform: {len(changed)} changed and {len(removed)} removed of {len(state['races'])} races")
+    
+    # Rows of changed and removed races are replaced
+    replaced_race_ids = set()
+    for race in changed | removed:
+        year, grand_prix = race.split('/', 1)
+        race_id = keys.lookup('races', int(year), race_slug(grand_prix))
+        if race_id is not None:
+            replaced_race_ids.add(race_id)
+    
+    changed_sessions = [entry for entry in session_files if race_input_key(entry[0], entry[1]) in changed]
+    changed_metadata = [entry for entry in race_metadata if race_input_key(entry[0], entry[1]) in changed]
+    
+    # Sessions are rebuilt from every discovered name; races only for the changed metadata
+    race_sessions_dims = extract_race_sessions_dimensions(session_files, changed_metadata, keys)
+    races = {race_id: race for race_id, race in previous_dimensions['races'].items() if race_id not in replaced_race_ids}
+    races.update(race_sessions_dims['races'])
     
-    # Save facts
+    dimensions = {
+        'races': dict(sorted(races.items())),
+        'sessions': race_sessions_dims['sessions'],
+        'drivers': previous_dimensions['drivers'],
+        'teams': previous_dimensions['teams'],
+        'countries': previous_dimensions['countries']
+    }
+    
+    # Missing drivers and new teams of the changed races are added to the previous dimensions
+    race_results = transform_race_results_to_facts(changed_sessions, dimensions, keys)
+    fact_tables = merge_race_facts(previous_facts, race_results, replaced_race_ids)
+    
+    logger.info("Fact tables merged:")
+    for table_name, records in fact_tables.items():
+        logger.info(f"  {table_name}: {len(records)} records")
+    
+    save_transformed_data(dimensions, fact_tables)
+    save_state(TRANSFORM_DIR, state)
+    keys.close()
+    
+    logger.info("\n✅ Incremental transformation complete!")
+    return True
+
+def save_transformed_data(dimensions, facts, output_format=None, layout=None):
+    """Save transformed data as JSON arrays, streamed NDJSON or typed parquet/arrow (F1_TRANSFORM_OUTPUT)"""
+    output_format = output_format or OUTPUT_FORMAT
+    layout = layout or TRANSFORM_LAYOUT
+    if layout not in ("tables", "partitioned"):
+        raise ValueError(f"Unknown transform layout '{layout}' (expected tables or partitioned)")
+    
+    # Fact tables are split into one partition per season: in the partitioned layout every table
+    # keyed by race, otherwise only the large ones in columnar output
+    race_years = {race_id: race['year'] for race_id, race in dimensions['races'].items()}
+    by_year = ('year', lambda record: race_years.get(record.get('race_id')))
+    
+    manifest = None
+    if layout == "partitioned":
+        manifest = load_partition_manifest(TRANSFORM_DIR) or {}
+        if manifest.get('format') != output_format:
+            manifest = {}
+        manifest = {'version': MANIFEST_VERSION, 'format': output_format,
+                    'tables': {group: manifest.get('tables', {}).get(group, {}) for group in ("dimensions", "facts")}}
+    elif os.path.exists(os.path.join(TRANSFORM_DIR, MANIFEST_FILE)):
+        # A stale manifest would make the loader skip tables written since
+        os.remove(os.path.join(TRANSFORM_DIR, MANIFEST_FILE))
+    
+    tables = [("dimensions", dim_name, dim_data.values()) for dim_name, dim_data in dimensions.items()]
     for fact_name, fact_data in facts.items():
-        fact_path = os.path.join(TRANSFORM_DIR, "facts", f'{fact_name}.json')
-        with open(fact_path, 'w', encoding='utf-8') as f:
-            json.dump(fact_data, f, indent=2, ensure_ascii=False)
-            logger.info(f"  Saved {len(fact_data)} records to {fact_name}.json")
+        if manifest is not None:
+            # Same row order from full and incremental runs, so unchanged partitions keep their hash;
+            # sorted in place rather than copied, the fact lists are already the largest thing in memory
+            id_field = f'{fact_name[:-1]}_id'
+            fact_data.sort(key=lambda row: row.get(id_field) or 0)
+        tables.append(("facts", fact_name, fact_data))
+    for group, name, records in tables:
+        schema = TABLE_SCHEMAS.get(name)
+        partitioned = group == "facts" and (
+            (layout == "partitioned" and 'race_id' in (schema or {})) or
+            (output_format in COLUMNAR_FORMATS and name in PARTITIONED_TABLES)
+        )
+        table_manifest = None
+        if manifest is not None:
+            table_manifest = manifest['tables'][group].setdefault(name, {})
+            previous = dict(table_manifest)
+        count = write_table(os.path.join(TRANSFORM_DIR, group), name, records, output_format, schema=schema,
+                            partition=by_year if partitioned else None, manifest=table_manifest)
+        target = f"{name}/" if partitioned else f"{name}{TABLE_SUFFIXES[output_format]}"
+        if table_manifest is None:
+            logger.info(f"  Saved {count} {name if group == 'dimensions' else 'records'} to {target}")
+        else:
+            changed = sum(1 for part, entry in table_manifest.items() if previous.get(part) != entry)
+            logger.info(f"  Saved {count} {name if group == 'dimensions' else 'records'} to {target} "
+                        f"({changed}/{len(table_manifest)} files rewritten)")
+    
+    if manifest is not None:
+        # Tables that were not saved this time are dropped from the manifest
+        for group, names in (("dimensions", dimensions), ("facts", facts)):
+            manifest['tables'][group] = {name: manifest['tables'][group][name] for name in names}
+        save_partition_manifest(TRANSFORM_DIR, manifest)
             
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(incremental=True if "--incremental" in sys.argv else None)
\ No newline at end of file
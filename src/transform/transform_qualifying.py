@@ -1,5 +1,4 @@
 import os
-import json
 import sys
 import logging
 
@@ -9,11 +8,23 @@ logger = logging.getLogger(__name__)
 PROJECT_ROOT = os.path.join(os.getcwd(), 'src')
 sys.path.append(PROJECT_ROOT)
 from crawler.f1_race import PROJECT_ROOT
-from utils.tranform_helpers import normalize_name
+from utils.tranform_helpers import driver_index, resolve_team, race_slug
+from transform.fact_records import FactRecord, record_layout, intern_value
 
 DATA_DIR = os.path.join(PROJECT_ROOT, "data")
 RACE_DATA_DIR = os.path.join(PROJECT_ROOT, "data", "f1_race_data")
 
+# Combined qualifying records while collected, and after enforce_qualifying_schema
+PENDING_QUALIFYING_LAYOUT = record_layout((
+    'race_id', 'session_id', 'driver_id', 'q1', 'q2', 'q3', 'position', 'qualifying_time', 'starting_grid',
+    'team_id', 'number', 'laps'
+))
+QUALIFYING_HEADER = (
+    "qualifying_result_id", "race_id", "session_id", "position", "number", "driver_id",
+    "team_id", "q1", "q2", "q3", "qualifying_time", "laps", "starting_grid"
+)
+QUALIFYING_LAYOUT = record_layout(QUALIFYING_HEADER)
+
 def is_multi_part_qualifying(session_name):
     """Check if this is part of multi-part qualifying or a single qualifying session"""
     session_lower = session_name.lower()
@@ -39,12 +50,18 @@ def is_multi_part_qualifying(session_name):
     
     return is_multi_part or is_single_qualifying
 
-def combine_qualifying_data(qualifying_data, race_id, dimensions, qualifying_session_id=None, 
-                           starting_grid_map=None, starting_grid_times=None,
-                           sprint_grid_map=None, sprint_grid_times=None):
-    """Combine multiple qualifying sessions into unified records"""
-    # Get all drivers across all sessions
-    all_drivers = set()
+def collect_qualifying_records(qualifying_data, race_id, qualifying_session_id=None, grid=None):
+    """Combine multiple qualifying sessions into unified records.
+
+    `grid` is the race's starting grid (sprint grid for sprint qualifying) as
+    driver_name -> (grid position, qualifying time). Returns (driver_name,
+    record) pairs with driver_id unset and team_id holding the raw team name;
+    resolve_qualifying_records fills in the IDs once the driver and team
+    dimensions are complete.
+    """
+    grid = grid or {}
+    # Get all drivers across all sessions, in first-seen order so records (and new IDs) don't depend on hashing
+    all_drivers = {}
     for session_name, data in qualifying_data.items():
         headers = data.get('header', [])
         driver_idx = headers.index('DRIVER') if 'DRIVER' in headers else -1
@@ -52,43 +69,10 @@ def combine_qualifying_data(qualifying_data, race_id, dimensions, qualifying_ses
         if driver_idx >= 0:
             for row in data.get('data', []):
                 if driver_idx < len(row) and row[driver_idx]:
-                    all_drivers.add(row[driver_idx])
+                    all_drivers.setdefault(row[driver_idx])
                     
-    race_year = dimensions['races'][race_id]['year'] if race_id in dimensions['races'] else 0
-
     # Create combined records
     combined_records = []
-    driver_id_map = {}
-    for d in dimensions['drivers'].values():
-        driver_name = d['driver_name']
-        driver_id = d['driver_id']
-        
-        # Special handling for Nelson Piquet based on era
-        if driver_name.lower() == "nelson piquet":
-            # Only add appropriate version based on year
-            if "01" in driver_id and race_year <= 1991:
-                # This is Nelson Piquet Sr. and race is before or in 1991
-                for variant in normalize_name(driver_name):
-                    driver_id_map[variant] = driver_id
-            elif "02" in driver_id and race_year > 1991:
-                # This is Nelson Piquet Jr. and race is after 1991
-                for variant in normalize_name(driver_name):
-                    driver_id_map[variant] = driver_id
-        elif driver_name.lower() == "robert doornbos":
-            # Handle Robert Doornbos based on year
-            if "02" in driver_id and race_year == 2005:
-                # ROBDOO01 for 2005 and earlier
-                for variant in normalize_name(driver_name):
-                    driver_id_map[variant] = driver_id
-            elif "01" in driver_id and race_year == 2006:
-                # ROBDOO02 for 2006 and later
-                for variant in normalize_name(driver_name):
-                    driver_id_map[variant] = driver_id
-        else:
-            # Regular handling for all other drivers
-            for variant in normalize_name(driver_name):
-                driver_id_map[variant] = driver_id
-    team_id_map = {t['team_name']: t['team_id'] for t in dimensions['teams'].values()}
     
     # Helper function for sorting - give priority to actual Q sessions
     def sort_key(item):
@@ -106,96 +90,82 @@ def combine_qualifying_data(qualifying_data, race_id, dimensions, qualifying_ses
     # Determine if this is a sprint qualifying session - FIX THIS LOGIC
     is_sprint_qualifying = any('sprint' in session_name.lower() for session_name in qualifying_data.keys())
     
-    for driver_name in all_drivers:
-        # Choose appropriate grid data based on session type - THIS IS WHERE THE FIX GOES
-        if is_sprint_qualifying:
-            starting_grid = sprint_grid_map.get((race_id, driver_name)) if sprint_grid_map else None
-            starting_grid_quali_time = sprint_grid_times.get((race_id, driver_name)) if sprint_grid_times else None
-        else:
-            starting_grid = starting_grid_map.get((race_id, driver_name)) if starting_grid_map else None
-            starting_grid_quali_time = starting_grid_times.get((race_id, driver_name)) if starting_grid_times else None
-        
-        # Get driver and team IDs
-        driver_id = driver_id_map.get(driver_name)
-        if not driver_id:
+    # Index each session's rows by driver once; a driver's first row in a session wins
+    indexed_sessions = []
+    for session_name, data in sorted(qualifying_data.items(), key=sort_key):
+        headers = data.get('header', [])
+        header_indexes = {col: idx for idx, col in enumerate(headers)}
+        driver_idx = header_indexes.get('DRIVER', -1)
+        if driver_idx < 0:
             continue
         
-        record = {
-            'race_id': race_id,
-            'session_id': qualifying_session_id,
-            'driver_id': driver_id,
-            'q1': None,
-            'q2': None, 
-            'q3': None,
-            'position': None,
-            'qualifying_time': starting_grid_quali_time,
-            'starting_grid': starting_grid,
-            'team_id': None,
-            'number': None,
-            'laps': None
-        }
+        rows_by_driver = {}
+        for row in data.get('data', []):
+            if driver_idx < len(row):
+                rows_by_driver.setdefault(row[driver_idx], row)
+        indexed_sessions.append((session_name, list(header_indexes.items()), rows_by_driver))
+    
+    for driver_name in all_drivers:
+        # The caller passes the grid matching the session type (sprint grid for sprint qualifying)
+        starting_grid, starting_grid_quali_time = grid.get(driver_name, (None, None))
+        
+        record = FactRecord(PENDING_QUALIFYING_LAYOUT, [
+            race_id, qualifying_session_id, None, None, None, None, None,
+            starting_grid_quali_time, starting_grid, None, None, None
+        ])
         
         # Extract individual Q times from qualifying sessions
-        for session_name, data in sorted(qualifying_data.items(), key=sort_key):
-            headers = data.get('header', [])
-            header_indexes = {col: idx for idx, col in enumerate(headers)}
-            
+        for session_name, header_items, rows_by_driver in indexed_sessions:
             # Find this driver's row
-            driver_idx = header_indexes.get('DRIVER', -1)
-            if driver_idx < 0:
+            row = rows_by_driver.get(driver_name)
+            if row is None:
                 continue
-                
-            for row in data.get('data', []):
-                if (driver_idx < len(row) and 
-                    row[driver_idx] == driver_name):
+
+            # Extract data from all available columns
+            for col_name, col_idx in header_items:
+                if col_idx < len(row) and row[col_idx]:
+                    value = row[col_idx]
                     
-                    # Extract data from all available columns
-                    for col_name, col_idx in header_indexes.items():
-                        if col_idx < len(row) and row[col_idx]:
-                            value = row[col_idx]
-                            
-                            if col_name == 'POS' and record['position'] is None:
-                                try:
-                                    record['position'] = value
-                                except (ValueError, TypeError):
-                                    record['position'] = None
-                            
-                            elif col_name == 'NO' and record['number'] is None:
-                                try:
-                                    record['number'] = int(value)
-                                except (ValueError, TypeError):
-                                    record['number'] = None
-                            
-                            elif col_name == 'TEAM' and record['team_id'] is None:
-                                record['team_id'] = team_id_map.get(value, value.replace(' ', '-'))
-                            
-                            elif col_name == 'LAPS' and record['laps'] is None:
-                                record['laps'] = value
-                            
-                            # Handle Q1, Q2, Q3 columns directly
-                            elif col_name == 'Q1' and record['q1'] is None:
-                                record['q1'] = value
-                            elif col_name == 'Q2' and record['q2'] is None:
-                                record['q2'] = value
-                            elif col_name == 'Q3' and record['q3'] is None:
-                                record['q3'] = value
-                            
-                            # Handle generic Time column (for older formats)
-                            elif col_name == 'TIME':
-                                # Determine which Q session this is based on session name
-                                q_column = get_q_column_from_session(session_name)
-                                if q_column and record[q_column] is None:
-                                    record[q_column] = value
-                                elif is_sprint_qualifying and starting_grid_quali_time:
-                                    record['qualifying_time'] = starting_grid_quali_time
-                                elif (session_name.lower() == 'qualifying' or 
-                                    session_name.lower() == 'overall qualifying'):
-                                    # Use session Time if we don't have starting grid time
-                                    if record['qualifying_time'] is None:
-                                        record['qualifying_time'] = value
+                    if col_name == 'POS' and record['position'] is None:
+                        try:
+                            record['position'] = intern_value(value)
+                        except (ValueError, TypeError):
+                            record['position'] = None
                     
-                    break
-        
+                    elif col_name == 'NO' and record['number'] is None:
+                        try:
+                            record['number'] = int(value)
+                        except (ValueError, TypeError):
+                            record['number'] = None
+                    
+                    elif col_name == 'TEAM' and record['team_id'] is None:
+                        record['team_id'] = value
+                    
+                    elif col_name == 'LAPS' and record['laps'] is None:
+                        record['laps'] = value
+                    
+                    # Handle Q1, Q2, Q3 columns directly
+                    elif col_name == 'Q1' and record['q1'] is None:
+                        record['q1'] = value
+                    elif col_name == 'Q2' and record['q2'] is None:
+                        record['q2'] = value
+                    elif col_name == 'Q3' and record['q3'] is None:
+                        record['q3'] = value
+                    
+                    # Handle generic Time column (for older formats)
+                    elif col_name == 'TIME':
+                        # Determine which Q session this is based on session name
+                        q_column = get_q_column_from_session(session_name)
+                        if q_column and record[q_column] is None:
+                            record[q_column] = value
+                        elif is_sprint_qualifying and starting_grid_quali_time:
+                            record['qualifying_time'] = starting_grid_quali_time
+                        elif (session_name.lower() == 'qualifying' or 
+                            session_name.lower() == 'overall qualifying'):
+                            # Use session Time if we don't have starting grid time
+                            if record['qualifying_time'] is None:
+                                record['qualifying_time'] = value
+
         # Fallback: If no starting grid time, use the best available Q time
         if record['qualifying_time'] is None:
             if record['q3'] is not None:
@@ -205,19 +175,42 @@ def combine_qualifying_data(qualifying_data, race_id, dimensions, qualifying_ses
             elif record['q1'] is not None:
                 record['qualifying_time'] = record['q1']
         
-        combined_records.append(record)
+        combined_records.append((driver_name, record))
     
     return combined_records
 
-def process_combined_qualifying(qualifying_sessions, dimensions, fact_tables, fact_counters, 
-                              starting_grid_map, starting_grid_times, sprint_grid_map, sprint_grid_times):
-    """Process qualifying sessions - handle missing sprint qualifying files"""
-    race_id_map = {}
-    for race_id, race_info in dimensions['races'].items():
-        race_key = (race_info['year'], race_info['grand_prix'].lower().replace(' ', '_').replace('-', '_').replace("'", ""))
-        race_id_map[race_key] = race_id
+def resolve_qualifying_records(pending_records, race_id, dimensions):
+    """Attach driver and team IDs to collected (driver_name, record) pairs, dropping unknown drivers"""
+    race_year = dimensions['races'][race_id]['year'] if race_id in dimensions['races'] else 0
+    drivers = driver_index(dimensions['drivers'])
+    
+    combined_records = []
+    for driver_name, record in pending_records:
+        driver_id = drivers.find_variant(driver_name, race_year)
+        if not driver_id:
+            continue
+        
+        record['driver_id'] = driver_id
+        team_name = record['team_id']
+        if team_name is not None:
+            record['team_id'] = resolve_team(team_name, dimensions['teams'])
+        combined_records.append((driver_name, record))
+    
+    return combined_records
+
+def combine_qualifying_data(qualifying_data, race_id, dimensions, qualifying_session_id=None, grid=None):
+    """Combine multiple qualifying sessions into unified records"""
+    pending_records = collect_qualifying_records(qualifying_data, race_id, qualifying_session_id, grid)
+    return [record for _, record in resolve_qualifying_records(pending_records, race_id, dimensions)]
+
+def collect_combined_qualifying(qualifying_sessions, season, race_id_map, session_id_map, race_grids):
+    """Combine one season's qualifying sessions - handle missing sprint qualifying files.
 
-    session_id_map = {s['session_name']: s['session_id'] for s in dimensions['sessions'].values()}
+    Reads from the already parsed RawSeason and the season's race_grids
+    (see extract_race_grids) and returns (race_key, kind, race_id, session_id,
+    pending_records) batches in race order for add_combined_qualifying.
+    """
+    batches = []
 
     for race_key, session_files in qualifying_sessions.items():
         year, grand_prix = race_key
@@ -233,8 +226,7 @@ def process_combined_qualifying(qualifying_sessions, dimensions, fact_tables, fa
         
         for session_name, file_path in session_files:
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+                data = season.get(file_path)
                 
                 # Separate sprint and regular qualifying
                 if 'sprint' in session_name.lower():
@@ -246,24 +238,20 @@ def process_combined_qualifying(qualifying_sessions, dimensions, fact_tables, fa
                 print(f"Error loading {file_path}: {e}")
                 continue
 
-        # Check if this race has sprint grid but no sprint qualifying
-        race_folder = os.path.join(RACE_DATA_DIR, str(year), grand_prix)
-        sprint_grid_file = os.path.join(race_folder, 'sprint_grid.json')
-        has_sprint_grid = os.path.exists(sprint_grid_file)
+        grids = race_grids.get(race_id) or RaceGrids()
         
         # If no sprint qualifying but has sprint grid, create qualifying from grid data
-        if not sprint_sessions and has_sprint_grid:
+        if not sprint_sessions and grids.sprint_grid_file:
             logger.info(f"Race {race_id} ({year} {grand_prix}): No sprint qualifying file, using sprint_grid.json")
             try:
-                with open(sprint_grid_file, 'r', encoding='utf-8') as f:
-                    sprint_grid_data = json.load(f)
+                sprint_grid_data = season.get(grids.sprint_grid_file)
                 
                 # Convert sprint grid to qualifying format
                 sprint_qualifying_data = convert_sprint_grid_to_qualifying(sprint_grid_data)
                 sprint_sessions['Sprint Qualifying'] = sprint_qualifying_data
                 
             except Exception as e:
-                print(f"Error loading sprint grid {sprint_grid_file}: {e}")
+                print(f"Error loading sprint grid {grids.sprint_grid_file}: {e}")
 
         # Process sprint qualifying sessions (including converted ones)
         if sprint_sessions:            
@@ -276,32 +264,28 @@ def process_combined_qualifying(qualifying_sessions, dimensions, fact_tables, fa
                 qualifying_session_id = session_id_map.get('Sprint Qualifying')
             
             # Process sprint qualifying
-            combined_records = combine_qualifying_data(
-                sprint_sessions, race_id, dimensions, qualifying_session_id, 
-                starting_grid_map, starting_grid_times, sprint_grid_map, sprint_grid_times
-            )
-
-            # Add sprint qualifying records to fact table
-            for record in combined_records:
-                fact_counters['qualifying_results'] += 1
-                record['qualifying_result_id'] = fact_counters['qualifying_results']
-                fact_tables['qualifying_results'].append(record)
+            pending_records = collect_qualifying_records(sprint_sessions, race_id, qualifying_session_id, grids.sprint)
+            batches.append((race_key, 'sprint', race_id, qualifying_session_id, pending_records))
 
         # Process regular qualifying sessions
         if regular_sessions:            
             qualifying_session_id = session_id_map.get('Qualifying')
                         
             # Process regular qualifying
-            combined_records = combine_qualifying_data(
-                regular_sessions, race_id, dimensions, qualifying_session_id, 
-                starting_grid_map, starting_grid_times, sprint_grid_map, sprint_grid_times
-            )
+            pending_records = collect_qualifying_records(regular_sessions, race_id, qualifying_session_id, grids.starting)
+            batches.append((race_key, 'qualifying', race_id, qualifying_session_id, pending_records))
+
+    return batches
 
-            # Add regular qualifying records to fact table
-            for record in combined_records:
-                fact_counters['qualifying_results'] += 1
-                record['qualifying_result_id'] = fact_counters['qualifying_results']
-                fact_tables['qualifying_results'].append(record)
+def add_combined_qualifying(batches, dimensions, fact_tables, keys):
+    """Resolve collected qualifying batches against the final dimensions and add them to the fact table.
+
+    A combined record is identified by (year, race slug, sprint/qualifying, driver name).
+    """
+    for (year, grand_prix), kind, race_id, qualifying_session_id, pending_records in batches:
+        for driver_name, record in resolve_qualifying_records(pending_records, race_id, dimensions):
+            record['qualifying_result_id'] = keys.get_id('qualifying_results', year, grand_prix, kind, driver_name)
+            fact_tables['qualifying_results'].append(record)
 
 def convert_sprint_grid_to_qualifying(sprint_grid_data):
     """Convert sprint_grid.json data to qualifying session format with same columns as regular qualifying"""
@@ -358,41 +342,37 @@ def convert_sprint_grid_to_qualifying(sprint_grid_data):
     return qualifying_data
 
 def enforce_qualifying_schema(fact_tables):
-    QUALIFYING_HEADER = [
-        "qualifying_result_id", "race_id", "session_id", "position", "number", "driver_id",
-        "team_id", "q1", "q2", "q3", "qualifying_time", "laps", "starting_grid"
-    ]
     if "qualifying_results" in fact_tables:
         new_records = []
         for rec_id, rec in enumerate(fact_tables["qualifying_results"], start=1):
-            new_rec = {}
+            values = []
             for col in QUALIFYING_HEADER:
                 if col == "qualifying_result_id":
-                    new_rec[col] = rec.get(col, rec_id)
+                    values.append(rec.get(col, rec_id))
                 elif col == "number":
                     # Convert 'no' to int, handle non-numeric values
                     no_value = rec.get(col)
                     if no_value is not None:
                         try:
-                            new_rec[col] = int(no_value)
+                            values.append(int(no_value))
                         except (ValueError, TypeError):
-                            new_rec[col] = None
+                            values.append(None)
                     else:
-                        new_rec[col] = None
+                        values.append(None)
                 elif col == "laps":
                     # Convert 'laps' to int, handle non-numeric values
                     laps_value = rec.get(col)
                     if laps_value is not None:
                         try:
-                            new_rec[col] = int(laps_value)
+                            values.append(int(laps_value))
                         except (ValueError, TypeError):
-                            new_rec[col] = None
+                            values.append(None)
                     else:
-                        new_rec[col] = None
+                        values.append(None)
                 else:
-                    new_rec[col] = rec.get(col, None)
+                    values.append(rec.get(col, None))
             
-            new_records.append(new_rec)
+            new_records.append(FactRecord(QUALIFYING_LAYOUT, values))
         fact_tables["qualifying_results"] = new_records
 
 def get_q_column_from_session(session_name):
@@ -407,98 +387,59 @@ def get_q_column_from_session(session_name):
     else:
         return None  # Don't map overall_qualifying to any q-column
 
-def extract_starting_grid_positions(race_id_map):
-    """Extract starting grid positions and qualifying times for each race"""
-    starting_grid_map = {}  # (race_id, driver_name) -> grid_position
-    starting_grid_times = {}  # (race_id, driver_name) -> qualifying_time
-    sprint_grid_map = {}  # (race_id, driver_name) -> sprint_grid_position
-    sprint_grid_times = {}  # (race_id, driver_name) -> sprint_qualifying_time
-    
-    logger.info("Extracting starting grid positions and times...")
-    
-    for year_dir in os.listdir(RACE_DATA_DIR):
-        year_path = os.path.join(RACE_DATA_DIR, year_dir)
-        if not os.path.isdir(year_path):
-            continue
-            
-        try:
-            year = int(year_dir)
-        except ValueError:
-            continue
-            
-        for gp_dir in os.listdir(year_path):
-            gp_path = os.path.join(year_path, gp_dir)
-            if not os.path.isdir(gp_path):
-                continue
+class RaceGrids:
+    """Starting and sprint grid of one race, each driver_name -> (grid position, qualifying time)"""
+    __slots__ = ('starting', 'sprint', 'sprint_grid_file')
+
+    def __init__(self):
+        self.starting = {}
+        self.sprint = {}
+        self.sprint_grid_file = None
+
+def add_grid_positions(grid_data, grid):
+    """Add one grid file's positions and qualifying times to a driver_name -> (position, time) grid"""
+    headers = grid_data.get('header', [])
+    driver_idx = headers.index('DRIVER') if 'DRIVER' in headers else -1
+    pos_idx = headers.index('POS') if 'POS' in headers else -1
+    time_idx = headers.index('TIME') if 'TIME' in headers else -1
+
+    if driver_idx >= 0 and pos_idx >= 0:
+        for row in grid_data.get('data', []):
+            if len(row) > max(driver_idx, pos_idx):
+                driver_name = row[driver_idx]
+                grid_pos = row[pos_idx]
+                quali_time = row[time_idx] if time_idx >= 0 and len(row) > time_idx else None
                 
-            race_key = (year, gp_dir.lower().replace(' ', '_').replace('-', '_').replace("'", ""))
+                # Convert position to integer
+                try:
+                    grid_pos = int(grid_pos)
+                except (ValueError, TypeError):
+                    grid_pos = None
+                
+                # A repeated driver keeps the last position and the last non-empty time
+                if not quali_time:
+                    quali_time = grid.get(driver_name, (None, None))[1]
+                grid[driver_name] = (grid_pos, quali_time)
+
+def extract_race_grids(season, race_id_map):
+    """Starting and sprint grids of every race of a loaded season, as race_id -> RaceGrids"""
+    race_grids = {}
+    for grid_name, label in (('starting_grid.json', 'starting grid'), ('sprint_grid.json', 'sprint grid')):
+        for gp_dir, grid_file in season.files_named(grid_name):
+            race_key = (season.year, race_slug(gp_dir))
             race_id = race_id_map.get(race_key)
             
             if not race_id:
                 continue
-                
-            # Look for regular starting_grid.json
-            grid_file = os.path.join(gp_path, 'starting_grid.json')
-            if os.path.exists(grid_file):
-                try:
-                    with open(grid_file, 'r', encoding='utf-8') as f:
-                        grid_data = json.load(f)
-                    
-                    headers = grid_data.get('header', [])
-                    driver_idx = headers.index('DRIVER') if 'DRIVER' in headers else -1
-                    pos_idx = headers.index('POS') if 'POS' in headers else -1
-                    time_idx = headers.index('TIME') if 'TIME' in headers else -1
-
-                    if driver_idx >= 0 and pos_idx >= 0:
-                        for row in grid_data.get('data', []):
-                            if len(row) > max(driver_idx, pos_idx):
-                                driver_name = row[driver_idx]
-                                grid_pos = row[pos_idx]
-                                quali_time = row[time_idx] if time_idx >= 0 and len(row) > time_idx else None
-                                
-                                # Convert position to integer
-                                try:
-                                    grid_pos = int(grid_pos)
-                                except (ValueError, TypeError):
-                                    grid_pos = None
-                                
-                                starting_grid_map[(race_id, driver_name)] = grid_pos
-                                if quali_time:
-                                    starting_grid_times[(race_id, driver_name)] = quali_time
-                                                        
-                except Exception as e:
-                    print(f"Error processing starting grid {grid_file}: {e}")
             
-            # Look for sprint_grid.json
-            sprint_grid_file = os.path.join(gp_path, 'sprint_grid.json')
-            if os.path.exists(sprint_grid_file):
-                try:
-                    with open(sprint_grid_file, 'r', encoding='utf-8') as f:
-                        sprint_data = json.load(f)
-                    
-                    headers = sprint_data.get('header', [])
-                    driver_idx = headers.index('DRIVER') if 'DRIVER' in headers else -1
-                    pos_idx = headers.index('POS') if 'POS' in headers else -1
-                    time_idx = headers.index('TIME') if 'TIME' in headers else -1
-
-                    if driver_idx >= 0 and pos_idx >= 0:
-                        for row in sprint_data.get('data', []):
-                            if len(row) > max(driver_idx, pos_idx):
-                                driver_name = row[driver_idx]
-                                grid_pos = row[pos_idx]
-                                sprint_time = row[time_idx] if time_idx >= 0 and len(row) > time_idx else None
-                                
-                                # Convert position to integer
-                                try:
-                                    grid_pos = int(grid_pos)
-                                except (ValueError, TypeError):
-                                    grid_pos = None
-                                
-                                sprint_grid_map[(race_id, driver_name)] = grid_pos
-                                if sprint_time:
-                                    sprint_grid_times[(race_id, driver_name)] = sprint_time
-                                                        
-                except Exception as e:
-                    print(f"Error processing sprint grid {sprint_grid_file}: {e}")
-    
-    return starting_grid_map, starting_grid_times, sprint_grid_map, sprint_grid_times
+            grids = race_grids.setdefault(race_id, RaceGrids())
+            if grid_name == 'sprint_grid.json':
+                grids.sprint_grid_file = grid_file
+                grid = grids.sprint
+            else:
+                grid = grids.starting
+            try:
+                add_grid_positions(season.get(grid_file), grid)
+            except Exception as e:
+                print(f"Error processing {label} {grid_file}: {e}")
+    return race_grids
@@ -0,0 +1,137 @@
+import os
+import sys
+import json
+import hashlib
+
+sys.path.append(os.path.join(os.getcwd(), 'src'))
+from utils.raw_storage import load_manifest, plan_raw_files, plan_content_hash, raw_exists
+from utils.table_io import find_table_file, iter_records, list_tables
+from transform.fact_records import FactRecord
+
+STATE_FILE = "transform_state.json"
+STATE_VERSION = 1
+
+# Field that identifies a row of each saved dimension
+DIMENSION_KEYS = {
+    'races': 'race_id',
+    'sessions': 'session_name',
+    'drivers': 'driver_id',
+    'teams': 'team_id',
+    'countries': 'country_code'
+}
+
+# Sources whose changes invalidate previous output as a whole
+CODE_FILES = [
+    os.path.join('transform', 'transform_data.py'),
+    os.path.join('transform', 'transform_qualifying.py'),
+    os.path.join('transform', 'raw_loader.py'),
+    os.path.join('transform', 'fact_mapping.py'),
+    os.path.join('transform', 'fact_records.py'),
+    os.path.join('utils', 'tranform_helpers.py'),
+    os.path.join('utils', 'driver_rules.py'),
+    os.path.join('utils', 'date_ranges.py'),
+    os.path.join('utils', 'team_aliases.py'),
+    os.path.join('utils', 'country_list.py'),
+]
+
+def race_input_key(year, grand_prix):
+    """State key of a race directory, e.g. 2024/bahrain"""
+    return f"{year}/{grand_prix}"
+
+def _digest(hashes):
+    return hashlib.sha256("\n".join(hashes).encode('utf-8')).hexdigest()
+
+def race_input_hashes(session_files, race_metadata, race_data_dir):
+    """Content hash per race over its metadata and session files"""
+    manifest = load_manifest(race_data_dir)
+    race_files = {}
+    for year, grand_prix, file_path, _ in session_files:
+        race_files.setdefault(race_input_key(year, grand_prix), []).append(file_path)
+    for year, grand_prix, file_path in race_metadata:
+        race_files.setdefault(race_input_key(year, grand_prix), []).append(file_path)
+
+    hashes = {}
+    for race, file_paths in race_files.items():
+        file_hashes = sorted(
+            f"{os.path.basename(file_path)}:{plan_content_hash(file_path, manifest)}" for file_path in file_paths
+        )
+        hashes[race] = _digest(file_hashes)
+    return hashes
+
+def dimension_input_hash(data_dir):
+    """Hash over everything the driver/team dimensions and standings are built from"""
+    file_hashes = []
+    for dir_name, standings_name in (("f1_drivers_data", "race_standing.json"),
+                                     ("f1_teams_data", "team_standing.json")):
+        base_dir = os.path.join(data_dir, dir_name)
+        manifest = load_manifest(base_dir)
+        for _, _, _, file_path in plan_raw_files(base_dir, manifest=manifest):
+            file_hashes.append(f"{os.path.relpath(file_path, data_dir)}:{plan_content_hash(file_path, manifest)}")
+        standings_file = os.path.join(base_dir, standings_name)
+        if raw_exists(standings_file):
+            file_hashes.append(f"{standings_name}:{plan_content_hash(standings_file, manifest)}")
+    return _digest(sorted(file_hashes))
+
+def code_fingerprint():
+    src_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sha = hashlib.sha256()
+    for code_file in CODE_FILES:
+        with open(os.path.join(src_dir, code_file), 'rb') as f:
+            sha.update(f.read())
+    return sha.hexdigest()[:16]
+
+def build_state(session_files, race_metadata, race_data_dir, data_dir):
+    return {
+        'version': STATE_VERSION,
+        'code': code_fingerprint(),
+        'dimension_inputs': dimension_input_hash(data_dir),
+        'races': race_input_hashes(session_files, race_metadata, race_data_dir)
+    }
+
+def load_state(transform_dir):
+    """State saved by the previous transform, or None"""
+    try:
+        with open(os.path.join(transform_dir, STATE_FILE), 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return state if state.get('version') == STATE_VERSION else None
+
+def save_state(transform_dir, state):
+    os.makedirs(transform_dir, exist_ok=True)
+    tmp_path = os.path.join(transform_dir, STATE_FILE + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, os.path.join(transform_dir, STATE_FILE))
+
+def load_previous_output(transform_dir):
+    """Dimensions (keyed like a fresh transform) and facts saved by the previous run, or None"""
+    dimensions = {}
+    facts = {}
+    try:
+        dimensions_dir = os.path.join(transform_dir, "dimensions")
+        for dim_name, key_field in DIMENSION_KEYS.items():
+            dim_path = find_table_file(dimensions_dir, dim_name)
+            if dim_path is None:
+                raise FileNotFoundError(os.path.join(dimensions_dir, dim_name))
+            dimensions[dim_name] = {row[key_field]: row for row in iter_records(dim_path)}
+        for fact_name, fact_path in list_tables(os.path.join(transform_dir, "facts")):
+            facts[fact_name] = [FactRecord.from_dict(row) for row in iter_records(fact_path)]
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Previous transform output unusable: {e}")
+        return None
+    return dimensions, facts
+
+def merge_race_facts(previous_facts, new_facts, replaced_race_ids):
+    """Previous fact rows outside the replaced races plus the recomputed ones, ordered by fact ID"""
+    merged = {}
+    for table_name in list(previous_facts) + [t for t in new_facts if t not in previous_facts]:
+        rows = [row for row in previous_facts.get(table_name, [])
+                if row.get('race_id') not in replaced_race_ids]
+        new_rows = new_facts.get(table_name, [])
+        if not new_rows and len(rows) == len(previous_facts.get(table_name, [])):
+            merged[table_name] = rows
+            continue
+        id_field = f'{table_name[:-1]}_id'
+        merged[table_name] = sorted(rows + list(new_rows), key=lambda row: row.get(id_field) or 0)
+    return merged
@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+
+logger = logging.getLogger(__name__)
+
+# Resources the crawlers never look at - blocking them keeps page loads cheap
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media"}
+BLOCKED_URL_PATTERNS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "facebook.net",
+    "hotjar.com",
+    "optimizely.com",
+    "onetrust.com",
+    "cookielaw.org",
+    "adobedtm.com",
+    "omtrdc.net",
+    "demdex.net",
+    "chartbeat.com",
+)
+
+BROWSER_POOL_SIZE = int(os.getenv("F1_BROWSER_POOL_SIZE", "4"))
+BROWSER_CHANNEL = os.getenv("F1_BROWSER_CHANNEL") or None  # e.g. "chrome" to reuse an installed Chrome
+NAVIGATION_TIMEOUT_MS = 30000
+SELECTOR_TIMEOUT_MS = 10000
+
+async def block_unneeded_requests(route):
+    """Abort images, fonts and analytics calls, let everything else through"""
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or any(p in request.url for p in BLOCKED_URL_PATTERNS):
+        await route.abort()
+    else:
+        await route.continue_()
+
+async def new_blocking_context(browser, user_agent=None):
+    """Create a browser context with request interception enabled"""
+    context = await browser.new_context(user_agent=user_agent, java_script_enabled=True)
+    context.set_default_navigation_timeout(NAVIGATION_TIMEOUT_MS)
+    await context.route("**/*", block_unneeded_requests)
+    return context
+
+async def load_page_html(page, url, wait_for_selector=None):
+    """Navigate and return the rendered HTML, waiting for the selector if given"""
+    await page.goto(url, wait_until="domcontentloaded")
+    if wait_for_selector:
+        from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+        try:
+            await page.wait_for_selector(wait_for_selector, state="attached", timeout=SELECTOR_TIMEOUT_MS)
+        except PlaywrightTimeoutError:
+            # Some pages genuinely have no such element - return what was rendered
+            pass
+    return await page.content()
+
+class BrowserPool:
+    """Fixed pool of reusable headless browser contexts.
+
+    One Chromium process is started lazily on first use and shared by `size`
+    contexts. A page is borrowed from a free context per request, so at most
+    `size` pages render concurrently and browser startup is paid only once.
+    """
+
+    def __init__(self, size=BROWSER_POOL_SIZE, headless=True, channel=BROWSER_CHANNEL, user_agent=None):
+        self.size = size
+        self.headless = headless
+        self.channel = channel
+        self.user_agent = user_agent
+        self.pages_rendered = 0
+        self._playwright = None
+        self._browser = None
+        self._contexts = []
+        self._free = None
+        self._start_error = None
+        self._start_lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    @property
+    def started(self):
+        return self._browser is not None
+
+    async def start(self):
+        """Launch the browser and create the contexts (no-op if already running)"""
+        async with self._start_lock:
+            if self.started:
+                return
+            if self._start_error is not None:
+                # Don't relaunch a browser that already failed for every waiting page
+                raise self._start_error
+            from playwright.async_api import async_playwright
+
+            self._playwright = await async_playwright().start()
+            try:
+                self._browser = await self._playwright.chromium.launch(headless=self.headless, channel=self.channel)
+                self._free = asyncio.Queue()
+                for _ in range(self.size):
+                    context = await new_blocking_context(self._browser, self.user_agent)
+                    self._contexts.append(context)
+                    self._free.put_nowait(context)
+            except Exception as e:
+                self._start_error = e
+                await self.close()
+                raise
+            logger.info(f"Started browser pool with {self.size} contexts")
+
+    async def close(self):
+        """Close all contexts, the browser and the Playwright driver"""
+        for context in self._contexts:
+            try:
+                await context.close()
+            except Exception:
+                pass
+        self._contexts = []
+        if self._browser is not None:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+        if self.pages_rendered:
+            logger.info(f"Browser pool closed after rendering {self.pages_rendered} pages")
+
+    @asynccontextmanager
+    async def page(self):
+        """Borrow a fresh page from a free context, waiting if all are busy"""
+        await self.start()
+        context = await self._free.get()
+        page = None
+        try:
+            page = await context.new_page()
+            yield page
+        finally:
+            if page is not None:
+                await page.close()
+            self._free.put_nowait(context)
+
+    async def fetch_html(self, url, wait_for_selector=None):
+        """Render a URL in the pool and return its HTML"""
+        async with self.page() as page:
+            html = await load_page_html(page, url, wait_for_selector)
+        self.pages_rendered += 1
+        return html
+
+async def render_html(browser, url, wait_for_selector=None):
+    """Render a URL with either a BrowserPool or a plain Playwright browser"""
+    if isinstance(browser, BrowserPool):
+        return await browser.fetch_html(url, wait_for_selector)
+
+    context = await new_blocking_context(browser)
+    try:
+        page = await context.new_page()
+        return await load_page_html(page, url, wait_for_selector)
+    finally:
+        await context.close()
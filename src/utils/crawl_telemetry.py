@@ -0,0 +1,278 @@
+import heapq
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+PHASES = ["dns", "connect", "ttfb", "download", "parse", "total"]
+
+# Histogram upper bounds in seconds (Prometheus style, +Inf is implicit)
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0]
+
+# Slowest request attempts kept for the JSON report; everything else is aggregated
+SLOWEST_REQUESTS = 20
+
+class RequestTiming:
+    """Timings for one HTTP attempt, filled in by the trace hooks and fetch layer"""
+
+    __slots__ = ("url", "crawler", "page_type", "attempt", "started", "dns", "connect",
+                 "ttfb", "download", "parse", "total", "status", "bytes", "encoding", "error", "_marks")
+
+    def __init__(self, url, crawler, page_type, attempt=0):
+        self.url = url
+        self.crawler = crawler
+        self.page_type = page_type
+        self.attempt = attempt
+        self.started = time.perf_counter()
+        self.dns = None
+        self.connect = None
+        self.ttfb = None
+        self.download = None
+        self.parse = None
+        self.total = None
+        self.status = None
+        self.bytes = 0
+        self.encoding = None
+        self.error = None
+        self._marks = {}
+
+    def as_dict(self):
+        return {
+            "url": self.url,
+            "crawler": self.crawler,
+            "page_type": self.page_type,
+            "attempt": self.attempt,
+            "status": self.status,
+            "bytes": self.bytes,
+            "encoding": self.encoding,
+            "error": self.error,
+            **{phase: getattr(self, phase) for phase in PHASES},
+        }
+
+class Histogram:
+    """Cumulative-bucket histogram with sum, count and max"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = None
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        if self.max is None or value > self.max:
+            self.max = value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets + [float("inf")], self.counts):
+            total += count
+            yield bound, total
+
+    def quantile(self, q):
+        """Estimated q-quantile (0..1), interpolated within its bucket like Prometheus' histogram_quantile"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        lower, seen = 0.0, 0
+        for bound, count in zip(self.buckets + [float("inf")], self.counts):
+            if count and seen + count >= rank:
+                if bound == float("inf"):
+                    return self.max
+                return min(lower + (bound - lower) * (rank - seen) / count, self.max)
+            seen += count
+            lower = bound
+        return self.max
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+class CrawlTelemetry:
+    """Collects per-request crawl timings and exports them as reports.
+
+    Timings are folded into histograms and counters as they arrive; only the
+    SLOWEST_REQUESTS slowest attempts are kept whole, so memory stays flat
+    over a long crawl.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.total_requests = 0
+        self.request_counts = defaultdict(int)     # (crawler, page_type) -> attempts
+        self.slowest = []                          # min-heap of (total, sequence, request dict)
+        self.histograms = defaultdict(Histogram)   # (crawler, page_type, phase) -> Histogram
+        self.status_counts = defaultdict(int)      # (crawler, page_type, status) -> count
+        self.bytes_total = defaultdict(int)        # (crawler, page_type) -> bytes
+        self.retries = defaultdict(int)            # (crawler, page_type) -> retry count
+        self.stages = {}                           # stage name -> seconds
+        self.started_at = time.time()
+
+    def record(self, timing):
+        """Aggregate one finished request attempt"""
+        key = (timing.crawler, timing.page_type)
+        self.total_requests += 1
+        self.request_counts[key] += 1
+        if timing.total is not None:
+            entry = (timing.total, self.total_requests, timing.as_dict())
+            if len(self.slowest) < SLOWEST_REQUESTS:
+                heapq.heappush(self.slowest, entry)
+            elif entry[0] > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, entry)
+        self.status_counts[key + (str(timing.status or timing.error),)] += 1
+        self.bytes_total[key] += timing.bytes
+        if timing.attempt:
+            self.retries[key] += 1
+        for phase in PHASES:
+            value = getattr(timing, phase)
+            if value is not None:
+                self.histograms[key + (phase,)].observe(value)
+
+    @contextmanager
+    def stage(self, name):
+        """Time a named crawl stage, e.g. one phase of scrape_f1_data_with_checkpoints"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_stage(name, time.perf_counter() - start)
+
+    def record_stage(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def trace_config(self):
+        """aiohttp TraceConfig filling in DNS/connect/TTFB for RequestTiming contexts"""
+        def mark(name):
+            async def hook(session, ctx, params):
+                timing = ctx.trace_request_ctx
+                if isinstance(timing, RequestTiming):
+                    timing._marks[name] = time.perf_counter()
+            return hook
+
+        def span(phase, start_mark):
+            async def hook(session, ctx, params):
+                timing = ctx.trace_request_ctx
+                if isinstance(timing, RequestTiming) and start_mark in timing._marks:
+                    setattr(timing, phase, time.perf_counter() - timing._marks[start_mark])
+            return hook
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(mark("request"))
+        trace_config.on_dns_resolvehost_start.append(mark("dns"))
+        trace_config.on_dns_resolvehost_end.append(span("dns", "dns"))
+        trace_config.on_connection_create_start.append(mark("connect"))
+        trace_config.on_connection_create_end.append(span("connect", "connect"))
+        trace_config.on_request_end.append(span("ttfb", "request"))
+        return trace_config
+
+    def summary(self):
+        """Per crawler/page type aggregates for the JSON run report (percentiles are histogram estimates)"""
+        summary = []
+        for crawler, page_type in sorted(self.request_counts):
+            key = (crawler, page_type)
+            phases = {}
+            for phase in PHASES:
+                hist = self.histograms.get(key + (phase,))
+                if hist is not None and hist.count:
+                    phases[phase] = {
+                        "count": hist.count,
+                        "sum_s": round(hist.sum, 4),
+                        "p50_s": round(hist.quantile(0.5), 4),
+                        "p99_s": round(hist.quantile(0.99), 4),
+                        "max_s": round(hist.max, 4),
+                    }
+            statuses = {status: count for (c, p, status), count in sorted(self.status_counts.items())
+                        if (c, p) == key}
+            summary.append({
+                "crawler": crawler,
+                "page_type": page_type,
+                "requests": self.request_counts[key],
+                "retries": self.retries[key],
+                "bytes": self.bytes_total[key],
+                "statuses": statuses,
+                "phases": phases,
+            })
+        return summary
+
+    def json_report(self, slowest=SLOWEST_REQUESTS):
+        slow = sorted(self.slowest, key=lambda entry: (-entry[0], entry[1]))
+        return {
+            "started_at": self.started_at,
+            "finished_at": time.time(),
+            "total_requests": self.total_requests,
+            "stages_s": {name: round(seconds, 3) for name, seconds in self.stages.items()},
+            "page_types": self.summary(),
+            "slowest_requests": [request for _, _, request in slow[:slowest]],
+        }
+
+    def prometheus_text(self):
+        """Render all metrics in the Prometheus text exposition format"""
+        lines = [
+            "# HELP f1_crawl_phase_seconds Time spent per request phase.",
+            "# TYPE f1_crawl_phase_seconds histogram",
+        ]
+        for (crawler, page_type, phase), hist in sorted(self.histograms.items()):
+            labels = f'crawler="{crawler}",page_type="{page_type}",phase="{phase}"'
+            for bound, count in hist.cumulative():
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'f1_crawl_phase_seconds_bucket{{{labels},le="{le}"}} {count}')
+            lines.append(f"f1_crawl_phase_seconds_sum{{{labels}}} {hist.sum:.6f}")
+            lines.append(f"f1_crawl_phase_seconds_count{{{labels}}} {hist.count}")
+
+        lines += ["# HELP f1_crawl_requests_total Requests by response status.", "# TYPE f1_crawl_requests_total counter"]
+        for (crawler, page_type, status), count in sorted(self.status_counts.items()):
+            lines.append(f'f1_crawl_requests_total{{crawler="{crawler}",page_type="{page_type}",status="{status}"}} {count}')
+
+        lines += ["# HELP f1_crawl_response_bytes_total Response body bytes.", "# TYPE f1_crawl_response_bytes_total counter"]
+        for (crawler, page_type), count in sorted(self.bytes_total.items()):
+            lines.append(f'f1_crawl_response_bytes_total{{crawler="{crawler}",page_type="{page_type}"}} {count}')
+
+        lines += ["# HELP f1_crawl_retries_total Retried request attempts.", "# TYPE f1_crawl_retries_total counter"]
+        for (crawler, page_type), count in sorted(self.retries.items()):
+            lines.append(f'f1_crawl_retries_total{{crawler="{crawler}",page_type="{page_type}"}} {count}')
+
+        lines += ["# HELP f1_crawl_stage_seconds Wall time per crawl stage.", "# TYPE f1_crawl_stage_seconds gauge"]
+        for name, seconds in sorted(self.stages.items()):
+            lines.append(f'f1_crawl_stage_seconds{{stage="{name}"}} {seconds:.3f}')
+        return "\n".join(lines) + "\n"
+
+    def write_reports(self, output_dir, formats=("json", "prometheus")):
+        """Write the JSON run report and/or Prometheus textfile to output_dir"""
+        os.makedirs(output_dir, exist_ok=True)
+        written = []
+        if "json" in formats:
+            path = os.path.join(output_dir, "crawl_report.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.json_report(), f, indent=2)
+            written.append(path)
+        if "prometheus" in formats:
+            # Write then rename so a node_exporter textfile collector never sees a partial file
+            path = os.path.join(output_dir, "crawl_metrics.prom")
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                f.write(self.prometheus_text())
+            os.replace(path + ".tmp", path)
+            written.append(path)
+        logger.info(f"Crawl telemetry: {self.total_requests} requests written to {', '.join(written)}")
+        return written
+
+# Shared by every crawler in the process
+telemetry = CrawlTelemetry()
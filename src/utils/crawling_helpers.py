@@ -1,21 +1,100 @@
 from datetime import datetime
+from bs4 import BeautifulSoup
+import asyncio
 import certifi
 import aiohttp
+import os
 import ssl
+import time
 import unicodedata
 
+from src.utils.crawl_telemetry import RequestTiming, telemetry
+
 ssl_context = ssl.create_default_context(cafile=certifi.where())
 
-head = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3"}
-base_url = "https://www.formula1.com"
+# aiohttp only decodes brotli when one of these packages is installed
+try:
+    import brotli  # noqa: F401
+    HAS_BROTLI = True
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        HAS_BROTLI = True
+    except ImportError:
+        HAS_BROTLI = False
+
+head = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3",
+    "Accept-Encoding": "br, gzip, deflate" if HAS_BROTLI else "gzip, deflate",
+}
+# Overridable so crawlers can be pointed at a local fixture server
+base_url = os.getenv("F1_BASE_URL", "https://www.formula1.com").rstrip("/")
+
+# Extra aiohttp TraceConfigs attached to every crawler session (e.g. for benchmarking)
+session_trace_configs = []
+
+# Transient failures are retried with exponential backoff
+FETCH_RETRIES = int(os.getenv("F1_FETCH_RETRIES", "2"))
+FETCH_BACKOFF_SECONDS = float(os.getenv("F1_FETCH_BACKOFF_SECONDS", "0.5"))
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Crawl telemetry reports are written here at the end of a run
+TELEMETRY_DIR = os.getenv("F1_TELEMETRY_DIR", os.path.join("data", "telemetry"))
 
 # Get years that statistics have been published
 current_year = datetime.now().year
 years = [year for year in range(1950, current_year + 1)]
 
-async def test_function(param, functions):
+def create_session(timeout=None):
+    """Create an aiohttp session with the shared SSL context and trace hooks"""
     connector = aiohttp.TCPConnector(ssl=ssl_context)
-    async with aiohttp.ClientSession(connector=connector) as session:
+    kwargs = {"connector": connector}
+    if timeout is not None:
+        kwargs["timeout"] = timeout
+    kwargs["trace_configs"] = [telemetry.trace_config()] + session_trace_configs
+    return aiohttp.ClientSession(**kwargs)
+
+async def fetch_soup(session, url, crawler, page_type, retries=FETCH_RETRIES):
+    """GET a page and parse it, recording per-attempt timings in the crawl telemetry.
+
+    Returns (status, soup); soup is None unless the final status is 200.
+    Connection errors are re-raised once the retries are used up.
+    """
+    for attempt in range(retries + 1):
+        timing = RequestTiming(url, crawler, page_type, attempt)
+        try:
+            async with session.get(url, headers=head, trace_request_ctx=timing) as response:
+                timing.status = response.status
+                timing.encoding = response.headers.get("Content-Encoding")
+                download_start = time.perf_counter()
+                body = await response.read()
+                timing.download = time.perf_counter() - download_start
+                timing.bytes = len(body)
+                soup = None
+                if response.status == 200:
+                    html = await response.text()
+                    parse_start = time.perf_counter()
+                    soup = BeautifulSoup(html, 'lxml')
+                    timing.parse = time.perf_counter() - parse_start
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            timing.error = type(e).__name__
+            timing.total = time.perf_counter() - timing.started
+            telemetry.record(timing)
+            if attempt == retries:
+                raise
+        else:
+            timing.total = time.perf_counter() - timing.started
+            telemetry.record(timing)
+            if response.status not in RETRY_STATUSES or attempt == retries:
+                return response.status, soup
+        await asyncio.sleep(FETCH_BACKOFF_SECONDS * 2 ** attempt)
+
+def write_crawl_telemetry(output_dir=TELEMETRY_DIR):
+    """Export the crawl telemetry as a JSON run report and Prometheus textfile"""
+    return telemetry.write_reports(output_dir)
+
+async def test_function(param, functions):
+    async with create_session() as session:
         result = await functions(session, param)
         return result
     
@@ -0,0 +1,79 @@
+import datetime
+import re
+from functools import lru_cache
+
+# Month names as they appear on formula1.com, abbreviated or in full
+MONTHS = {
+    'jan': 1, 'january': 1,
+    'feb': 2, 'february': 2,
+    'mar': 3, 'march': 3,
+    'apr': 4, 'april': 4,
+    'may': 5,
+    'jun': 6, 'june': 6,
+    'jul': 7, 'july': 7,
+    'aug': 8, 'august': 8,
+    'sep': 9, 'sept': 9, 'september': 9,
+    'oct': 10, 'october': 10,
+    'nov': 11, 'november': 11,
+    'dec': 12, 'december': 12,
+}
+
+_DAY = r'(\d{1,2})'
+_MONTH = r'([A-Za-z]+)\.?'
+_YEAR = r'(\d{4})'
+_DASH = r'\s*[-–—]\s*'
+
+# "27 May 2024"
+_SINGLE = re.compile(rf'{_DAY}\s+{_MONTH}\s+{_YEAR}')
+# "25 - 27 Oct 2024"
+_SAME_MONTH = re.compile(rf'{_DAY}{_DASH}{_DAY}\s+{_MONTH}\s+{_YEAR}')
+# "29 Feb - 02 Mar 2024", "30 Dec - 01 Jan 2025"
+_CROSS_MONTH = re.compile(rf'{_DAY}\s+{_MONTH}{_DASH}{_DAY}\s+{_MONTH}\s+{_YEAR}')
+# "30 Dec 2024 - 01 Jan 2025"
+_CROSS_YEAR = re.compile(rf'{_DAY}\s+{_MONTH}\s+{_YEAR}{_DASH}{_DAY}\s+{_MONTH}\s+{_YEAR}')
+
+def _month(name):
+    month = MONTHS.get(name.lower())
+    if month is None:
+        raise ValueError(f"unknown month '{name}'")
+    return month
+
+def _date(day, month_name, year):
+    return datetime.date(int(year), _month(month_name), int(day))
+
+@lru_cache(maxsize=4096)
+def parse_date_range(text):
+    """(start, end) dates of a race weekend such as "25 - 27 Oct 2024",
+    "29 Feb - 02 Mar 2024" or a single day "07 Apr 1985" (start == end).
+
+    Missing parts of the start are taken from the end, and a start month
+    after the end month falls in the previous year. Raises ValueError for
+    anything else (e.g. "TBC").
+    """
+    value = text.strip() if isinstance(text, str) else ''
+    match = _SAME_MONTH.fullmatch(value)
+    if match:
+        start_day, end_day, month_name, year = match.groups()
+        return _date(start_day, month_name, year), _date(end_day, month_name, year)
+    match = _CROSS_MONTH.fullmatch(value)
+    if match:
+        start_day, start_month, end_day, end_month, year = match.groups()
+        end = _date(end_day, end_month, year)
+        start_year = end.year - 1 if _month(start_month) > end.month else end.year
+        return _date(start_day, start_month, start_year), end
+    match = _CROSS_YEAR.fullmatch(value)
+    if match:
+        start_day, start_month, start_year, end_day, end_month, year = match.groups()
+        return _date(start_day, start_month, start_year), _date(end_day, end_month, year)
+    match = _SINGLE.fullmatch(value)
+    if match:
+        date = _date(*match.groups())
+        return date, date
+    raise ValueError(f"unrecognised date '{text}'")
+
+def parse_date(text):
+    """Date of a single day such as "27 May 2024"; raises ValueError otherwise"""
+    start, end = parse_date_range(text)
+    if start != end:
+        raise ValueError(f"'{text}' is a date range, not a single date")
+    return start
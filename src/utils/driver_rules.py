@@ -0,0 +1,8 @@
+# Drivers that share a name across eras: (name, first year, last year, driver_id).
+# None leaves the range open; the first matching rule for a name wins.
+driver_rules = [
+    ('Nelson Piquet', None, 1991, 'NELPIQ01'),  # Sr.
+    ('Nelson Piquet', 1992, None, 'NELPIQ02'),  # Jr.
+    ('Robert Doornbos', 2005, 2005, 'ROBDOO02'),  # 2005 Monaco entry
+    ('Robert Doornbos', None, None, 'ROBDOO01'),  # 2006+ Netherlands
+]
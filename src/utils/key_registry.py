@@ -0,0 +1,78 @@
+import json
+import os
+import sqlite3
+
+PROJECT_ROOT = os.getenv('GITHUB_WORKSPACE', os.getcwd())
+# Persisted natural key -> surrogate ID assignments; "" or ":memory:" keeps them in memory only
+KEY_REGISTRY_PATH = os.getenv("F1_KEY_REGISTRY", os.path.join(PROJECT_ROOT, "data", "key_registry.sqlite"))
+
+class KeyRegistry:
+    """Stable surrogate keys for races, sessions and fact rows.
+
+    Each namespace (e.g. "races", "race_results") maps natural keys such as
+    (year, race slug) to integer IDs. A key seen for the first time gets the
+    next ID of its namespace and keeps it in every later run, so partial or
+    reordered runs do not renumber what was loaded before.
+    """
+
+    def __init__(self, path=KEY_REGISTRY_PATH):
+        self.path = path
+        self._keys = {}  # namespace -> {natural key tuple: id}
+        self._next = {}  # namespace -> next free id
+        self._new = []
+        self._conn = None
+        if path and path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._conn = sqlite3.connect(path)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS surrogate_keys ("
+                "namespace TEXT NOT NULL, natural_key TEXT NOT NULL, id INTEGER NOT NULL, "
+                "PRIMARY KEY (namespace, natural_key))"
+            )
+            for namespace, natural_key, key_id in self._conn.execute(
+                    "SELECT namespace, natural_key, id FROM surrogate_keys"):
+                self._keys.setdefault(namespace, {})[self.decode(natural_key)] = key_id
+                self._next[namespace] = max(self._next.get(namespace, 1), key_id + 1)
+
+    @staticmethod
+    def encode(natural_key):
+        """Text form of a natural key tuple as stored in SQLite"""
+        return json.dumps(list(natural_key), ensure_ascii=False, separators=(',', ':'))
+
+    @staticmethod
+    def decode(natural_key):
+        return tuple(json.loads(natural_key))
+
+    def get_id(self, namespace, *natural_key):
+        """Surrogate ID of a natural key, assigning the next free one if it is new"""
+        keys = self._keys.setdefault(namespace, {})
+        key_id = keys.get(natural_key)
+        if key_id is None:
+            key_id = keys[natural_key] = self._next.get(namespace, 1)
+            self._next[namespace] = key_id + 1
+            self._new.append((namespace, natural_key, key_id))
+        return key_id
+
+    def lookup(self, namespace, *natural_key):
+        """Surrogate ID of a natural key, or None if it was never assigned"""
+        return self._keys.get(namespace, {}).get(natural_key)
+
+    def snapshot(self):
+        """Copy of the assigned keys as {namespace: {natural key tuple: id}}, e.g. for worker processes"""
+        return {namespace: dict(keys) for namespace, keys in self._keys.items()}
+
+    def save(self):
+        """Persist the keys assigned since the last save"""
+        if self._conn is not None and self._new:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO surrogate_keys (namespace, natural_key, id) VALUES (?, ?, ?)",
+                    [(namespace, self.encode(natural_key), key_id) for namespace, natural_key, key_id in self._new]
+                )
+        self._new = []
+
+    def close(self):
+        self.save()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,543 @@
+import atexit
+import hashlib
+import json
+import logging
+import mmap
+import os
+import sys
+import threading
+import time
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# "json" keeps the pretty-printed files, "zstd" writes compact JSON compressed to <name>.json.zst
+RAW_FORMAT = os.getenv("F1_RAW_FORMAT", "json").lower()
+ZSTD_LEVEL = int(os.getenv("F1_RAW_ZSTD_LEVEL", "10"))
+ZSTD_SUFFIX = ".zst"
+
+# "files" writes one file per page, "packed" appends everything below a season
+# directory to a single <year>.jsonl next to it, with an offset index
+RAW_LAYOUT = os.getenv("F1_RAW_LAYOUT", "files").lower()
+PACK_SUFFIX = ".jsonl"
+PACK_INDEX_SUFFIX = ".idx.json"
+
+# One row per logical output file, kept next to the season directories
+MANIFEST_NAME = "manifest.jsonl"
+ROW_KEYS = ("data", "race_results", "drivers", "teams")
+
+def json_loads(payload):
+    """Decode JSON text or bytes, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("zstd raw storage needs the 'zstandard' package (pip install f1-projekt[compression])")
+    return zstandard
+
+def is_raw_json(file_name):
+    """True for plain or zstd-compressed raw JSON files (not pack indexes)"""
+    if file_name.endswith(PACK_INDEX_SUFFIX):
+        return False
+    return file_name.endswith('.json') or file_name.endswith('.json' + ZSTD_SUFFIX)
+
+def raw_json_name(file_name):
+    """File name without the compression suffix, e.g. race.json.zst -> race.json"""
+    if file_name.endswith(ZSTD_SUFFIX):
+        return file_name[:-len(ZSTD_SUFFIX)]
+    return file_name
+
+def resolve_raw_path(path):
+    """Return the file actually on disk for a logical .json path, or None"""
+    if os.path.exists(path):
+        return path
+    if os.path.exists(path + ZSTD_SUFFIX):
+        return path + ZSTD_SUFFIX
+    return None
+
+def is_pack_name(file_name):
+    """True for season pack names (<4-digit year>.jsonl), not other .jsonl files such as the manifest"""
+    year = file_name[:-len(PACK_SUFFIX)]
+    return file_name.endswith(PACK_SUFFIX) and len(year) == 4 and year.isdigit()
+
+def pack_location(path):
+    """Split a logical path into (pack_path, key) using its season directory.
+
+    data/f1_race_data/2024/bahrain/race_result.json lives in
+    data/f1_race_data/2024.jsonl under the key "bahrain/race_result.json".
+    Paths outside a season directory return (None, None).
+    """
+    parts = os.path.normpath(path).split(os.sep)
+    for i in range(len(parts) - 2, -1, -1):
+        if len(parts[i]) == 4 and parts[i].isdigit():
+            base_dir = os.sep.join(parts[:i]) or os.sep
+            return os.path.join(base_dir, parts[i] + PACK_SUFFIX), "/".join(parts[i + 1:])
+    return None, None
+
+def _encode_record(key, data):
+    return (json.dumps({"key": key, "data": data}, ensure_ascii=False, separators=(',', ':')) + "\n").encode('utf-8')
+
+def _write_pack_index(pack_path, index):
+    """Persist {key: [offset, length]} together with the pack size it describes"""
+    payload = {
+        "size": os.path.getsize(pack_path),
+        "entries": [[key, offset, length] for key, (offset, length) in index.items()],
+    }
+    tmp_path = pack_path + PACK_INDEX_SUFFIX + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, separators=(',', ':'))
+    os.replace(tmp_path, pack_path + PACK_INDEX_SUFFIX)
+
+def _scan_pack(pack_path):
+    """Rebuild the offset index by reading the pack sequentially (last write wins)"""
+    index = {}
+    offset = 0
+    with open(pack_path, 'rb') as f:
+        for line in f:
+            if line.endswith(b"\n"):
+                index[json.loads(line)["key"]] = [offset, len(line)]
+            offset += len(line)
+    return index
+
+def load_pack_index(pack_path):
+    """Offset index of a pack, rebuilt if it is missing or out of date"""
+    if not os.path.exists(pack_path):
+        return {}
+    try:
+        with open(pack_path + PACK_INDEX_SUFFIX, 'r', encoding='utf-8') as f:
+            payload = json.load(f)
+        if payload["size"] == os.path.getsize(pack_path):
+            return {key: [offset, length] for key, offset, length in payload["entries"]}
+    except (OSError, ValueError, KeyError):
+        pass
+    # Crawl was interrupted before the index was written
+    return _scan_pack(pack_path)
+
+class PackWriter:
+    """Append-only writer for one season pack"""
+
+    def __init__(self, pack_path):
+        self.pack_path = pack_path
+        self.index = load_pack_index(pack_path)
+        self.dead_records = 0
+        self._file = open(pack_path, 'ab')
+
+    def write(self, key, data):
+        record = _encode_record(key, data)
+        offset = self._file.tell()
+        self._file.write(record)
+        if key in self.index:
+            self.dead_records += 1
+        # Re-written keys keep their original position so iteration order stays stable
+        self.index[key] = [offset, len(record)]
+
+    def close(self):
+        self._file.close()
+        if self.dead_records:
+            self._compact()
+        _write_pack_index(self.pack_path, self.index)
+
+    def _compact(self):
+        """Drop superseded records left behind by re-crawls"""
+        tmp_path = self.pack_path + ".tmp"
+        new_index = {}
+        with open(self.pack_path, 'rb') as src, open(tmp_path, 'wb') as dst:
+            for key, (offset, length) in self.index.items():
+                src.seek(offset)
+                new_index[key] = [dst.tell(), length]
+                dst.write(src.read(length))
+        os.replace(tmp_path, self.pack_path)
+        self.index = new_index
+        self.dead_records = 0
+
+class PackReader:
+    """Memory-mapped read access to one season pack"""
+
+    def __init__(self, pack_path):
+        self.pack_path = pack_path
+        self.index = load_pack_index(pack_path)
+        self._file = open(pack_path, 'rb')
+        size = os.path.getsize(pack_path)
+        self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def keys(self):
+        return list(self.index)
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def get(self, key):
+        offset, length = self.index[key]
+        return json_loads(self._buffer[offset:offset + length])["data"]
+
+    def close(self):
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+        self._file.close()
+
+_pack_writers = {}
+_pack_readers = {}
+# The transform reads packs from a thread pool
+_pack_lock = threading.Lock()
+
+def _get_pack_writer(pack_path):
+    if pack_path not in _pack_writers:
+        # A cached reader would not see the new records
+        reader = _pack_readers.pop(pack_path, None)
+        if reader is not None:
+            reader.close()
+        _pack_writers[pack_path] = PackWriter(pack_path)
+    return _pack_writers[pack_path]
+
+def _get_pack_reader(pack_path):
+    with _pack_lock:
+        if pack_path in _pack_writers:
+            _pack_writers.pop(pack_path).close()
+        if pack_path not in _pack_readers:
+            if not os.path.exists(pack_path):
+                return None
+            _pack_readers[pack_path] = PackReader(pack_path)
+        return _pack_readers[pack_path]
+
+def split_raw_path(path):
+    """Split a logical path into (base_dir, relative key, year or None).
+
+    The base dir is the crawler data directory holding the season
+    directories; files outside a season directory belong to their parent.
+    """
+    pack_path, key = pack_location(path)
+    if pack_path is not None:
+        base_dir, pack_name = os.path.split(pack_path)
+        return base_dir, pack_name[:-len(PACK_SUFFIX)] + "/" + key, int(pack_name[:-len(PACK_SUFFIX)])
+    base_dir, file_name = os.path.split(os.path.normpath(path))
+    return base_dir, file_name, None
+
+def content_hash(data):
+    """Hash of the parsed content, independent of the storage format"""
+    return hashlib.sha256(json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')).hexdigest()
+
+def header_fingerprint(header):
+    return hashlib.sha1("\x1f".join(header).encode('utf-8')).hexdigest()[:12] if header else None
+
+def manifest_entry(key, year, data, mtime=None):
+    """Manifest row describing one raw output"""
+    parts = key.split("/")
+    header = None
+    rows = None
+    session_name = None
+    if isinstance(data, dict):
+        header = data.get('header', data.get('headers'))
+        session_name = data.get('session_name')
+        rows = next((len(data[k]) for k in ROW_KEYS if isinstance(data.get(k), list)), None)
+    return {
+        "path": key,
+        "year": year,
+        # Race data is <year>/<race slug>/<session>.json
+        "race": parts[1] if len(parts) == 3 else None,
+        "file": parts[-1],
+        "session_name": session_name,
+        "header": header,
+        "header_fingerprint": header_fingerprint(header),
+        "content_hash": content_hash(data),
+        "mtime": round(mtime if mtime is not None else time.time(), 3),
+        "rows": rows,
+    }
+
+class RawManifest:
+    """Ordered manifest of the raw outputs below one crawler data directory"""
+
+    def __init__(self, base_dir, entries=None):
+        self.base_dir = base_dir
+        self.entries = entries if entries is not None else {}  # key -> entry
+        self.dirty = False
+
+    @property
+    def path(self):
+        return os.path.join(self.base_dir, MANIFEST_NAME)
+
+    @classmethod
+    def load(cls, base_dir):
+        """Read base_dir/manifest.jsonl, or None if the crawler never wrote one"""
+        manifest_path = os.path.join(base_dir, MANIFEST_NAME)
+        if not os.path.exists(manifest_path):
+            return None
+        entries = {}
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    entries[entry["path"]] = entry
+        return cls(base_dir, entries)
+
+    def update(self, key, year, data, mtime=None):
+        # Re-crawled files keep their position so planning order stays stable
+        self.entries[key] = manifest_entry(key, year, data, mtime)
+        self.dirty = True
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for entry in self.entries.values():
+                f.write(json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + "\n")
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+    def file_path(self, key):
+        return os.path.join(self.base_dir, *key.split("/"))
+
+    def get(self, file_path):
+        """Entry for a path under base_dir (loose, compressed or packed), or None"""
+        key = os.path.relpath(raw_json_name(file_path), self.base_dir).replace(os.sep, "/")
+        return self.entries.get(key)
+
+    def season_keys(self):
+        return {key for key in self.entries if key.split("/", 1)[0].isdigit()}
+
+    def verify(self):
+        """Compare the season files listed here with the tree on disk.
+
+        An interrupted crawl saves a partial manifest, and files written before
+        manifests existed are not listed at all; such a manifest must not be
+        used for planning. Returns True when both list the same files.
+        """
+        on_disk = season_file_keys(self.base_dir)
+        listed = self.season_keys()
+        missing = sorted(on_disk - listed)
+        gone = sorted(listed - on_disk)
+        if not missing and not gone:
+            return True
+        if self.path not in _reported_manifests:
+            _reported_manifests.add(self.path)
+            problems = [f"{len(paths)} {what}, e.g. {', '.join(paths[:3])}"
+                        for paths, what in ((missing, "files not listed"), (gone, "listed files missing")) if paths]
+            nested = " --nested" if any(key.count("/") == 2 for key in on_disk) else ""
+            logger.warning(f"Raw manifest {self.path} is out of date ({'; '.join(problems)}), planning from the "
+                           f"directory tree instead. Repair it with: "
+                           f"python src/utils/raw_storage.py rebuild-manifest {self.base_dir}{nested}")
+        return False
+
+    def files(self, nested=False):
+        """Same rows as iter_raw_files, planned from the manifest alone"""
+        for key in self.entries:
+            parts = key.split("/")
+            if len(parts) != (3 if nested else 2) or not parts[0].isdigit():
+                continue
+            yield parts[0], (parts[1] if nested else None), parts[-1], self.file_path(key)
+
+_manifests = {}
+# Out-of-date manifests are reported once per process
+_reported_manifests = set()
+
+def _get_manifest(base_dir):
+    base_dir = os.path.normpath(base_dir)
+    if base_dir not in _manifests:
+        _manifests[base_dir] = RawManifest.load(base_dir) or RawManifest(base_dir)
+    return _manifests[base_dir]
+
+def load_manifest(base_dir):
+    """Manifest for planning a transform; None means fall back to walking the tree,
+    also when the manifest does not list exactly the files on disk"""
+    base_dir = os.path.normpath(base_dir)
+    manifest = _manifests.get(base_dir) or RawManifest.load(base_dir)
+    if manifest is None or not manifest.verify():
+        return None
+    return manifest
+
+def plan_raw_files(base_dir, nested=False, manifest=None):
+    """Rows of iter_raw_files, taken from the manifest when the crawler wrote one"""
+    if manifest is None:
+        manifest = load_manifest(base_dir)
+    if manifest is not None:
+        return manifest.files(nested)
+    return iter_raw_files(base_dir, nested)
+
+def plan_raw_dirs(base_dir, manifest=None):
+    """Unique (year_dir, sub_dir) pairs holding raw files, loose or packed"""
+    seen = set()
+    for year_dir, sub_dir, _, _ in plan_raw_files(base_dir, nested=True, manifest=manifest):
+        if (year_dir, sub_dir) not in seen:
+            seen.add((year_dir, sub_dir))
+            yield year_dir, sub_dir
+
+def plan_has_raw_file(path, manifest=None):
+    """raw_exists answered from the manifest when there is one"""
+    if manifest is not None:
+        return manifest.get(path) is not None
+    return raw_exists(path)
+
+def plan_content_hash(path, manifest=None):
+    """content_hash of a raw file, from the manifest when it lists the file"""
+    entry = manifest.get(path) if manifest is not None else None
+    if entry is not None and entry.get("content_hash"):
+        return entry["content_hash"]
+    return content_hash(read_raw_json(path))
+
+def rebuild_manifest(base_dir, nested=False):
+    """Create a manifest for a tree written before manifests existed"""
+    manifest = RawManifest(base_dir)
+    for year_dir, sub_dir, file_name, file_path in iter_raw_files(base_dir, nested):
+        if len(year_dir) == 4 and year_dir.isdigit():
+            key = "/".join(p for p in (year_dir, sub_dir, raw_json_name(file_name)) if p)
+            mtime = os.path.getmtime(file_path) if os.path.exists(file_path) else None
+            manifest.update(key, int(year_dir), read_raw_json(file_path), mtime)
+    for file_name in sorted(os.listdir(base_dir)):
+        if is_raw_json(file_name) and os.path.isfile(os.path.join(base_dir, file_name)):
+            file_path = os.path.join(base_dir, file_name)
+            manifest.update(raw_json_name(file_name), None, read_raw_json(file_path), os.path.getmtime(file_path))
+    manifest.save()
+    return manifest
+
+def season_file_keys(base_dir):
+    """Manifest keys of every raw file below the season directories and in season packs.
+
+    Only names are listed (and pack indexes read), no file is parsed.
+    """
+    keys = set()
+    if not os.path.isdir(base_dir):
+        return keys
+    for name in os.listdir(base_dir):
+        path = os.path.join(base_dir, name)
+        if name.isdigit() and os.path.isdir(path):
+            for root, _, file_names in os.walk(path):
+                for file_name in file_names:
+                    if is_raw_json(file_name):
+                        rel_path = os.path.relpath(os.path.join(root, raw_json_name(file_name)), base_dir)
+                        keys.add(rel_path.replace(os.sep, "/"))
+        elif is_pack_name(name):
+            keys.update(f"{name[:-len(PACK_SUFFIX)]}/{key}" for key in load_pack_index(path))
+    return keys
+
+def close_raw_storage():
+    """Flush pack indexes and manifests, and release memory maps"""
+    while _pack_writers:
+        _pack_writers.popitem()[1].close()
+    while _pack_readers:
+        _pack_readers.popitem()[1].close()
+    while _manifests:
+        manifest = _manifests.popitem()[1]
+        if manifest.dirty:
+            manifest.save()
+
+atexit.register(close_raw_storage)
+
+def _packed_entry(path):
+    pack_path, key = pack_location(path)
+    if pack_path is None:
+        return None, None
+    reader = _get_pack_reader(pack_path)
+    if reader is None or key not in reader:
+        return None, None
+    return reader, key
+
+def raw_exists(path):
+    if resolve_raw_path(path) is not None:
+        return True
+    reader, _ = _packed_entry(path)
+    return reader is not None
+
+def write_raw_json(path, data, raw_format=None, layout=None):
+    """Write a crawler output to a logical .json path in the configured raw format"""
+    raw_format = raw_format or RAW_FORMAT
+    layout = layout or RAW_LAYOUT
+
+    base_dir, key, year = split_raw_path(path)
+    _get_manifest(base_dir).update(key, year, data)
+
+    if layout == "packed":
+        pack_path, key = pack_location(path)
+        if pack_path is not None:
+            _get_pack_writer(pack_path).write(key, data)
+            # Loose files take precedence on read, so don't leave old ones behind
+            for stale_path in (path, path + ZSTD_SUFFIX):
+                if os.path.exists(stale_path):
+                    os.remove(stale_path)
+            return
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if raw_format == "zstd":
+        payload = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        with open(path + ZSTD_SUFFIX, 'wb') as f:
+            f.write(_zstandard().ZstdCompressor(level=ZSTD_LEVEL).compress(payload))
+        stale_path = path
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        stale_path = path + ZSTD_SUFFIX
+
+    # Never leave both variants behind, the reader would pick up the old one
+    if os.path.exists(stale_path):
+        os.remove(stale_path)
+
+def read_raw_json(path):
+    """Load a raw JSON file, decompressing .zst and reading from season packs transparently.
+
+    `path` may be the logical .json path; the compressed variant or the packed
+    record is used if there is no plain file.
+    """
+    actual_path = resolve_raw_path(path)
+    if actual_path is None:
+        reader, key = _packed_entry(path)
+        if reader is None:
+            raise FileNotFoundError(path)
+        return reader.get(key)
+    if actual_path.endswith(ZSTD_SUFFIX):
+        with open(actual_path, 'rb') as f:
+            payload = _zstandard().ZstdDecompressor().decompressobj().decompress(f.read())
+        return json_loads(payload)
+    with open(actual_path, 'rb') as f:
+        return json_loads(f.read())
+
+def iter_raw_files(base_dir, nested=False):
+    """Yield (year_dir, sub_dir, file_name, file_path) for every raw JSON file.
+
+    Walks base_dir/<year>/<file> (or base_dir/<year>/<sub_dir>/<file> when
+    `nested`) in directory order, then the records of base_dir/<year>.jsonl
+    packs that are not shadowed by a loose file. `sub_dir` is None when not
+    nested; `file_path` can always be passed to read_raw_json.
+    """
+    if not os.path.isdir(base_dir):
+        return
+    seen = set()
+    for year_dir in os.listdir(base_dir):
+        year_path = os.path.join(base_dir, year_dir)
+        if not os.path.isdir(year_path):
+            continue
+        sub_dirs = os.listdir(year_path) if nested else [None]
+        for sub_dir in sub_dirs:
+            dir_path = os.path.join(year_path, sub_dir) if sub_dir is not None else year_path
+            if not os.path.isdir(dir_path):
+                continue
+            for file_name in os.listdir(dir_path):
+                if is_raw_json(file_name):
+                    file_path = os.path.join(dir_path, file_name)
+                    seen.add(os.path.join(dir_path, raw_json_name(file_name)))
+                    yield year_dir, sub_dir, file_name, file_path
+
+    for pack_name in sorted(os.listdir(base_dir)):
+        if not is_pack_name(pack_name):
+            continue
+        year_dir = pack_name[:-len(PACK_SUFFIX)]
+        reader = _get_pack_reader(os.path.join(base_dir, pack_name))
+        for key in reader.keys():
+            parts = key.split("/")
+            if len(parts) != (2 if nested else 1):
+                continue
+            file_path = os.path.join(base_dir, year_dir, *parts)
+            if file_path not in seen:
+                yield year_dir, (parts[0] if nested else None), parts[-1], file_path
+
+if __name__ == "__main__":
+    # python src/utils/raw_storage.py rebuild-manifest data/f1_race_data [--nested]
+    if len(sys.argv) >= 3 and sys.argv[1] == "rebuild-manifest":
+        rebuilt = rebuild_manifest(sys.argv[2], nested="--nested" in sys.argv)
+        print(f"Wrote {len(rebuilt.entries)} entries to {rebuilt.path}")
+    else:
+        print("usage: raw_storage.py rebuild-manifest <data dir> [--nested]")
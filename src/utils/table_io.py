@@ -0,0 +1,382 @@
+import datetime
+import gzip
+import hashlib
+import io
+import json
+import os
+import shutil
+
+# Transformed table files: "json" writes one pretty-printed array per table,
+# "ndjson" streams one record per line and "ndjson.gz" gzips those lines;
+# "parquet" and "arrow" (Arrow IPC) write typed columnar files
+OUTPUT_FORMAT = os.getenv("F1_TRANSFORM_OUTPUT", "json").lower()
+GZIP_LEVEL = int(os.getenv("F1_TRANSFORM_GZIP_LEVEL", "6"))
+
+TABLE_SUFFIXES = {
+    "json": ".json",
+    "ndjson": ".ndjson",
+    "ndjson.gz": ".ndjson.gz",
+    "parquet": ".parquet",
+    "arrow": ".arrow",
+}
+COLUMNAR_FORMATS = ("parquet", "arrow")
+
+# Partitioned tables are directories of <column>=<value>/part-0<suffix> files (Hive layout)
+PARTITION_FILE = "part-0"
+NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+# Per-partition row counts and content hashes of the partitioned layout, next to the tables
+MANIFEST_FILE = "partitions.json"
+MANIFEST_VERSION = 1
+
+# Dates in transformed records are ISO (yyyy-mm-dd) strings; columnar output stores them as dates
+DATE_FORMAT = "%Y-%m-%d"
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("parquet/arrow output needs the 'pyarrow' package (pip install f1-projekt[columnar])")
+    return pyarrow
+
+def table_format(file_name):
+    """Output format of a table file name, or None for other files"""
+    for fmt, suffix in TABLE_SUFFIXES.items():
+        if file_name.endswith(suffix):
+            return fmt
+    return None
+
+def table_name(file_name):
+    """Table a file holds, e.g. race_results.ndjson.gz -> race_results"""
+    fmt = table_format(file_name)
+    return file_name[:-len(TABLE_SUFFIXES[fmt])] if fmt else None
+
+def partition_files(table_dir):
+    """Sorted part files below a partitioned table directory"""
+    files = []
+    for root, dirs, file_names in os.walk(table_dir):
+        dirs.sort()
+        files.extend(os.path.join(root, file_name) for file_name in sorted(file_names) if table_format(file_name))
+    return files
+
+def find_table_file(directory, name):
+    """Path of the file (or partitioned directory) holding table `name`, or None"""
+    for suffix in TABLE_SUFFIXES.values():
+        path = os.path.join(directory, name + suffix)
+        if os.path.exists(path):
+            return path
+    path = os.path.join(directory, name)
+    if os.path.isdir(path) and partition_files(path):
+        return path
+    return None
+
+def list_tables(directory):
+    """[(table name, path)] of every table file or partitioned directory, sorted by name"""
+    tables = []
+    for file_name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, file_name)
+        name = file_name if os.path.isdir(path) and partition_files(path) else table_name(file_name)
+        if name:
+            tables.append((name, path))
+    return tables
+
+def _open_text(path, mode):
+    if path.endswith(".gz"):
+        # mtime=0 keeps identical content byte-identical across runs
+        raw = open(path, mode + "b")
+        try:
+            compressed = gzip.GzipFile(filename="", mode=mode + "b", fileobj=raw, compresslevel=GZIP_LEVEL, mtime=0)
+        except Exception:
+            raw.close()
+            raise
+        compressed.myfileobj = raw  # closed together with the gzip stream
+        return io.TextIOWrapper(compressed, encoding="utf-8", newline="\n")
+    return open(path, mode, encoding="utf-8", newline="\n" if mode == "w" else None)
+
+def read_arrow_table(path):
+    """pyarrow Table of one parquet or Arrow IPC file"""
+    pa = _pyarrow()
+    if table_format(os.path.basename(path)) == "parquet":
+        return pa.parquet.read_table(path)
+    with pa.memory_map(path, "r") as source:
+        return pa.ipc.open_file(source).read_all()
+
+def columnar_row_count(path):
+    """Row count of a parquet or Arrow IPC file without decoding its columns"""
+    pa = _pyarrow()
+    if table_format(os.path.basename(path)) == "parquet":
+        return pa.parquet.ParquetFile(path).metadata.num_rows
+    return read_arrow_table(path).num_rows
+
+def parquet_bytes(path):
+    """A parquet or Arrow IPC file as parquet bytes, e.g. for uploads that only accept parquet"""
+    pa = _pyarrow()
+    if table_format(os.path.basename(path)) == "parquet":
+        with open(path, "rb") as f:
+            return f.read()
+    sink = pa.BufferOutputStream()
+    pa.parquet.write_table(read_arrow_table(path), sink, compression="zstd")
+    return sink.getvalue().to_pybytes()
+
+def _columnar_records(path):
+    pa = _pyarrow()
+    table = read_arrow_table(path)
+    date_columns = [field.name for field in table.schema if pa.types.is_date(field.type)]
+    for record in table.to_pylist():
+        for column in date_columns:
+            if record[column] is not None:
+                record[column] = record[column].strftime(DATE_FORMAT)
+        yield record
+
+def iter_records(path):
+    """Records of a table file or partitioned directory; NDJSON files are streamed line by line.
+
+    Partition columns only live in directory names and are not added back.
+    """
+    if os.path.isdir(path):
+        for part_path in partition_files(path):
+            yield from iter_records(part_path)
+        return
+    fmt = table_format(os.path.basename(path))
+    if fmt in COLUMNAR_FORMATS:
+        yield from _columnar_records(path)
+    elif fmt == "json":
+        with open(path, "r", encoding="utf-8") as f:
+            yield from json.load(f)
+    else:
+        with _open_text(path, "r") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+def json_default(value):
+    """json.dumps hook: compact record objects (e.g. FactRecord) are written as their plain dict"""
+    to_dict = getattr(value, "to_dict", None)
+    if to_dict is None:
+        raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+    return to_dict()
+
+# Flat records are encoded by json's C encoder in this separator layout and wrapped
+# into the lines json.dump(records, indent=2) writes; its indenting encoder is pure Python
+_FLAT_RECORD_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",\n    ", ": "),
+                                       default=json_default)
+
+def _indented_record(record):
+    """One element of a pretty-printed (indent=2) JSON array"""
+    if (not isinstance(record, dict) or not record
+            or any(isinstance(value, (dict, list, tuple)) for value in record.values())):
+        return "  " + json.dumps(record, indent=2, ensure_ascii=False, default=json_default).replace("\n", "\n  ")
+    return "  {\n    " + _FLAT_RECORD_ENCODER.encode(record)[1:-1] + "\n  }"
+
+def plain_record(record):
+    """A record object (e.g. FactRecord) as its plain dict, converted once before encoding"""
+    to_dict = getattr(record, "to_dict", None)
+    return record if to_dict is None else to_dict()
+
+def json_array_chunks(records):
+    """Encode records lazily as the text of json.dump(records, indent=2, ensure_ascii=False)"""
+    first = True
+    for record in records:
+        yield ("[\n" if first else ",\n") + _indented_record(plain_record(record))
+        first = False
+    yield "[]" if first else "\n]"
+
+def ndjson_lines(records):
+    """Encode records lazily, one JSON document per line"""
+    for record in records:
+        yield json.dumps(plain_record(record), ensure_ascii=False, default=json_default) + "\n"
+
+def _infer_type(values):
+    kinds = {type(value) for value in values if value is not None}
+    if kinds == {bool}:
+        return "bool"
+    if kinds and kinds <= {int}:
+        return "int64"
+    if kinds and kinds <= {int, float}:
+        return "float64"
+    return "string"
+
+def _coerce(values, type_name):
+    if type_name == "date":
+        dates = []
+        for value in values:
+            try:
+                dates.append(datetime.datetime.strptime(value, DATE_FORMAT).date())
+            except (TypeError, ValueError):
+                dates.append(None)
+        return dates
+    if type_name == "int64":
+        return [value if isinstance(value, int) and not isinstance(value, bool) else None for value in values]
+    if type_name == "float64":
+        return [float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+                for value in values]
+    if type_name == "string":
+        return [value if value is None or isinstance(value, str) else str(value) for value in values]
+    return values
+
+def records_to_arrow(records, schema=None):
+    """pyarrow Table of records; `schema` maps columns to int64/float64/string/date/bool, others are inferred"""
+    pa = _pyarrow()
+    arrow_types = {"int64": pa.int64(), "float64": pa.float64(), "string": pa.string(),
+                   "date": pa.date32(), "bool": pa.bool_()}
+    columns = list(dict.fromkeys(column for record in records for column in record))
+    arrays = []
+    for column in columns:
+        values = [record.get(column) for record in records]
+        type_name = (schema or {}).get(column) or _infer_type(values)
+        arrays.append(pa.array(_coerce(values, type_name), type=arrow_types[type_name]))
+    return pa.Table.from_arrays(arrays, names=columns)
+
+def _write_arrow_file(table, path, fmt):
+    pa = _pyarrow()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if fmt == "parquet":
+        pa.parquet.write_table(table, path, compression="zstd")
+    else:
+        options = pa.ipc.IpcWriteOptions(compression="zstd")
+        with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, table.schema, options=options) as writer:
+            writer.write_table(table)
+
+def _remove_path(path):
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+def records_hash(records, schema=None):
+    """Content hash of records as they would be written (plus column types), for skipping unchanged files"""
+    sha = hashlib.sha256(json.dumps(schema or {}, sort_keys=True).encode("utf-8"))
+    for line in ndjson_lines(records):
+        sha.update(line.encode("utf-8"))
+    return sha.hexdigest()
+
+def load_partition_manifest(directory):
+    """Partition manifest saved with the transformed tables, or None"""
+    try:
+        with open(os.path.join(directory, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("version") == MANIFEST_VERSION else None
+
+def save_partition_manifest(directory, manifest):
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = os.path.join(directory, MANIFEST_FILE + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(directory, MANIFEST_FILE))
+
+def partition_value(part):
+    """(column, value) of a partition directory name, e.g. year=2024 -> ("year", 2024); null partitions give None"""
+    column, _, value = part.partition("=")
+    if value == NULL_PARTITION:
+        return column, None
+    try:
+        return column, int(value)
+    except ValueError:
+        return column, value
+
+def partition_payload(path, column, value):
+    """One partition file with its partition column added back, as parquet bytes for
+    columnar files and NDJSON bytes otherwise (partition columns only live in directory names)"""
+    if table_format(os.path.basename(path)) in COLUMNAR_FORMATS:
+        pa = _pyarrow()
+        table = read_arrow_table(path)
+        value_type = pa.string() if isinstance(value, str) else pa.int64()
+        table = table.append_column(column, pa.array([value] * table.num_rows, type=value_type))
+        sink = pa.BufferOutputStream()
+        pa.parquet.write_table(table, sink, compression="zstd")
+        return sink.getvalue().to_pybytes()
+    records = (dict(record, **{column: value}) for record in iter_records(path))
+    return "".join(ndjson_lines(records)).encode("utf-8")
+
+def _write_file(path, records, fmt):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    count = 0
+    if fmt == "json":
+        with open(path, "w", encoding="utf-8") as f:
+            for chunk in json_array_chunks(records):
+                f.write(chunk)
+                count += 1
+        count -= 1  # one chunk per record plus the closing bracket
+    else:
+        with _open_text(path, "w") as f:
+            for line in ndjson_lines(records):
+                f.write(line)
+                count += 1
+    return count
+
+def write_table(directory, name, records, fmt=None, schema=None, partition=None, manifest=None):
+    """Write table `name` from an iterable of records and return the record count.
+
+    Columnar formats use `schema` for explicit column types. Given
+    partition=(column, record -> value), one file per value is written below
+    <name>/<column>=<value>/. Files of the same table in other formats or
+    layouts are removed, so a directory never holds two versions of a table.
+
+    `manifest` is the table's {partition: {file, rows, hash}} entry of the
+    partition manifest ("" for an unpartitioned table). Files whose content
+    hash is unchanged are left alone and the entry is updated in place.
+    """
+    fmt = (fmt or OUTPUT_FORMAT).lower()
+    if fmt not in TABLE_SUFFIXES:
+        raise ValueError(f"Unknown transform output format '{fmt}' (expected one of {', '.join(TABLE_SUFFIXES)})")
+    os.makedirs(directory, exist_ok=True)
+    suffix = TABLE_SUFFIXES[fmt]
+    partitioned = partition is not None
+    path = os.path.join(directory, name if partitioned else name + suffix)
+
+    if (partitioned or manifest is not None or fmt in COLUMNAR_FORMATS) and not isinstance(records, list):
+        records = list(records)
+    if partitioned:
+        column, key = partition
+        row_indexes = {}
+        for row_index, record in enumerate(records):
+            value = key(record)
+            row_indexes.setdefault(f"{column}={NULL_PARTITION if value is None else value}", []).append(row_index)
+        parts = [(part, os.path.join(path, part, PARTITION_FILE + suffix), indexes)
+                 for part, indexes in sorted(row_indexes.items())]
+    else:
+        parts = [("", path, None)]
+
+    count = 0
+    table = None
+    entries = {}
+    for part, part_path, indexes in parts:
+        part_records = records if indexes is None else [records[row_index] for row_index in indexes]
+        if manifest is not None:
+            entry = {"file": os.path.relpath(part_path, directory).replace(os.sep, "/"),
+                     "rows": len(part_records), "hash": records_hash(part_records, schema)}
+            entries[part] = entry
+            if manifest.get(part) == entry and os.path.exists(part_path):
+                count += entry["rows"]
+                continue
+        if fmt in COLUMNAR_FORMATS:
+            # One conversion for the whole table keeps column types equal across partitions
+            if table is None:
+                table = records_to_arrow(records, schema)
+            _write_arrow_file(table if indexes is None else table.take(indexes), part_path, fmt)
+            count += len(part_records)
+        else:
+            count += _write_file(part_path, part_records, fmt)
+
+    if partitioned:
+        # Drop partitions that no longer have rows and part files of other formats
+        current = {part: os.path.basename(part_path) for part, part_path, _ in parts}
+        for part in os.listdir(path):
+            if part not in current:
+                _remove_path(os.path.join(path, part))
+                continue
+            for file_name in os.listdir(os.path.join(path, part)):
+                if file_name != current[part]:
+                    _remove_path(os.path.join(path, part, file_name))
+    for other_path in [os.path.join(directory, name + other) for other in TABLE_SUFFIXES.values()] + \
+                      [os.path.join(directory, name)]:
+        if other_path != path:
+            _remove_path(other_path)
+    if manifest is not None:
+        manifest.clear()
+        manifest.update(entries)
+    return count
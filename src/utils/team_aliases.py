@@ -0,0 +1,11 @@
+# Spellings of the same constructor/engine entry across seasons and pages: (alias, team name).
+# Matching ignores case and whitespace; an alias resolves to the team_id of its team name.
+team_aliases = [
+    ('Red Bull Racing RBPT', 'Red Bull Racing Honda RBPT'),  # 2022 naming of the Honda RBPT unit
+    ('AlphaTauri RBPT', 'AlphaTauri Honda RBPT'),
+    ('Alfa Romeo Racing Ferrari', 'Alfa Romeo Ferrari'),  # 2019-2021 entry name
+    ('Racing Point BWT Mercedes', 'Racing Point Mercedes'),
+    ('STR Ferrari', 'Toro Rosso Ferrari'),
+    ('STR Renault', 'Toro Rosso Renault'),
+    ('STR Cosworth', 'Toro Rosso Cosworth'),
+]
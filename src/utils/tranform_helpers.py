@@ -1,5 +1,12 @@
 
 import itertools
+import logging
+from collections import defaultdict
+
+from utils.driver_rules import driver_rules
+from utils.team_aliases import team_aliases
+
+logger = logging.getLogger(__name__)
 
 # Utility functions for data transformation and normalization
 def normalize_name(name):
@@ -206,6 +213,10 @@ def update_driver_dimensions_with_nationality(dimensions, driver_standings):
             driver_info['country_code'] = nat_info['country_code']
             driver_info['country'] = nat_info['country']
 
+def race_slug(grand_prix):
+    """Race part of the (year, slug) race key, e.g. Emilia-Romagna -> emilia_romagna"""
+    return grand_prix.lower().replace(' ', '_').replace('-', '_').replace("'", "")
+
 # Function to generate a unique team ID based on the team name
 def generate_team_id(team_name):
     # Step 1: Convert to lowercase and replace spaces with hyphens
@@ -245,33 +256,244 @@ def generate_unique_driver_id(driver_name, existing_ids_sources):
         # Single name fallback
         base_id = f"{driver_name[:6].upper().replace(' ', '')}"
     
-    # Collect all existing IDs from all sources
-    all_existing_ids = set()
+    # Existing IDs are tracked incrementally per dimension instead of being collected on every call
+    allocator = IdAllocator()
+    if existing_ids_sources and isinstance(existing_ids_sources[0], dict):
+        allocator = id_allocator(existing_ids_sources[0])
     for source in existing_ids_sources:
-        if isinstance(source, dict):
-            # For dictionaries, add all keys (for missing_drivers) or all values (for id maps)
-            if source:
-                first_key = next(iter(source.keys()))
-                if isinstance(source[first_key], dict) and 'driver_id' in source[first_key]:
-                    # This is a dimension-like dict, extract driver_ids
-                    all_existing_ids.update(item['driver_id'] for item in source.values())
-                else:
-                    # This is probably an id map, add values
-                    all_existing_ids.update(source.values())
-        elif hasattr(source, '__iter__'):
-            # For iterables (like driver_id_map.values())
-            all_existing_ids.update(source)
+        allocator.sync(source)
     
-    # Find next available number
-    counter = 1
-    while True:
-        driver_id = f"{base_id}{counter:02d}"
-        if driver_id not in all_existing_ids:
+    return allocator.allocate(base_id)
+
+class IdAllocator:
+    """Surrogate ID registry: the set of IDs in use plus the next free counter per prefix.
+
+    IDs are picked up from append-only dimension dicts with sync(), which only
+    reads entries added since the previous sync.
+    """
+
+    def __init__(self):
+        self.ids = set()
+        self._next = {}  # prefix -> next counter worth probing, e.g. MARDON -> 2
+        self._synced = {}  # id(source) -> (source, entries already read)
+
+    def __contains__(self, surrogate_id):
+        return surrogate_id in self.ids
+
+    def sync(self, source):
+        """Register the IDs of a dimension dict (its keys) or of an id map (its values)"""
+        if not isinstance(source, dict):
+            # Plain iterables (e.g. driver_id_map.values()) cannot be tracked incrementally
+            self.ids.update(source)
+            return
+        seen = self._synced.get(id(source))
+        start = seen[1] if seen is not None and seen[0] is source and len(source) >= seen[1] else 0
+        for key, item in itertools.islice(source.items(), start, None):
+            self.ids.add(key if isinstance(item, dict) else item)
+        self._synced[id(source)] = (source, len(source))
+
+    def claim(self, surrogate_id):
+        """Register a deterministic ID; False if it was already taken"""
+        if surrogate_id in self.ids:
+            return False
+        self.ids.add(surrogate_id)
+        return True
+
+    def allocate(self, prefix):
+        """Lowest free <prefix><NN> ID, e.g. MARDON01, MARDON02, ..."""
+        counter = self._next.get(prefix, 1)
+        while f"{prefix}{counter:02d}" in self.ids:
+            counter += 1
+        surrogate_id = f"{prefix}{counter:02d}"
+        self.ids.add(surrogate_id)
+        self._next[prefix] = counter + 1
+        return surrogate_id
+
+_id_allocators = {}
+
+def id_allocator(dimension):
+    """Shared IdAllocator of a dimension dict"""
+    entry = _id_allocators.get(id(dimension))
+    if entry is None or entry[0] is not dimension:
+        entry = _id_allocators[id(dimension)] = (dimension, IdAllocator())
+    return entry[1]
+
+def claim_team_id(team_name, teams):
+    """generate_team_id registered with the teams allocator, noting names that collide with another team"""
+    team_id = generate_team_id(team_name)
+    allocator = id_allocator(teams)
+    allocator.sync(teams)
+    if not allocator.claim(team_id):
+        known_team = teams.get(team_id)
+        if known_team and known_team.get('team_name') != team_name:
+            logger.debug(f"Team '{team_name}' shares team_id {team_id} with '{known_team.get('team_name')}'")
+    return team_id
+
+def team_key(team_name):
+    """Case- and whitespace-insensitive lookup key of a team name"""
+    return " ".join(team_name.split()).casefold()
+
+class TeamIndex:
+    """Team dimension indexed by team_key, so lookups do not scan every team.
+
+    The first team seen for a key keeps it; names that resolved to an existing
+    team (collisions, aliases) are remembered under their own key as well.
+    """
+
+    def __init__(self):
+        self.size = 0
+        self._by_key = {}
+
+    def add(self, team_id, team_info):
+        self.size += 1
+        team_name = team_info.get('team_name')
+        if team_name:
+            self.remember(team_name, team_id)
+
+    def remember(self, team_name, team_id):
+        self._by_key.setdefault(team_key(team_name), team_id)
+
+    def find(self, team_name):
+        """team_id of a known team name or of the team an alias stands for, else None"""
+        key = team_key(team_name)
+        team_id = self._by_key.get(key)
+        if team_id is None and key in TEAM_ALIASES:
+            team_id = self._by_key.get(team_key(TEAM_ALIASES[key]))
+        return team_id
+
+_team_indexes = {}
+
+def team_index(teams):
+    """Shared TeamIndex of a team dict, extended as teams are appended to it"""
+    entry = _team_indexes.get(id(teams))
+    if entry is None or entry[0] is not teams or len(teams) < entry[1].size:
+        entry = _team_indexes[id(teams)] = (teams, TeamIndex())
+    index = entry[1]
+    if len(teams) > index.size:
+        for team_id, team_info in itertools.islice(teams.items(), index.size, None):
+            index.add(team_id, team_info)
+    return index
+
+def resolve_team(team_name, teams):
+    """team_id of a team name, adding the team to `teams` when neither the name nor an alias is known.
+
+    An unknown alias is added under its team name, so the alias and the name
+    end up with one team_id whichever appears first.
+    """
+    team_id = team_index(teams).find(team_name)
+    if team_id is None:
+        canonical_name = TEAM_ALIASES.get(team_key(team_name), team_name)
+        team_id = claim_team_id(canonical_name, teams)
+        if team_id not in teams:
+            teams[team_id] = {
+                'team_id': team_id,
+                'team_name': canonical_name
+            }
+        index = team_index(teams)
+        index.remember(canonical_name, team_id)
+        index.remember(team_name, team_id)
+    return team_id
+
+def _index_driver_rules(rules):
+    rules_by_name = defaultdict(list)
+    for driver_name, first_year, last_year, driver_id in rules:
+        rules_by_name[normalize_driver_name(driver_name).lower()].append((first_year, last_year, driver_id))
+    return dict(rules_by_name)
+
+def has_driver_rules(driver_name):
+    """True for names shared by several drivers, resolved by year through driver_rules"""
+    return normalize_driver_name(driver_name).lower() in DRIVER_RULES
+
+def rule_driver_id(driver_name, year):
+    """driver_id the rule table assigns to this name in `year`, or None"""
+    year = int(year)
+    for first_year, last_year, driver_id in DRIVER_RULES.get(normalize_driver_name(driver_name).lower(), []):
+        if (first_year is None or year >= first_year) and (last_year is None or year <= last_year):
             return driver_id
-        counter += 1
-        if counter > 99:  # Safety check
-            return f"{base_id}{counter}"  # No leading zero for 3+ digits
+    return None
+
+def driver_name_key(driver_name):
+    """Order-insensitive key of a 2-3 part name, so every permutation shares it; other names are their own key"""
+    parts = driver_name.split()
+    if 2 <= len(parts) <= 3:
+        return " ".join(sorted(parts))
+    return driver_name
+
+class DriverIndex:
+    """Driver dimension indexed by name, so lookups do not scan every driver.
+
+    Keeps one bucket per lowercase name, per normalized name and per
+    driver_name_key, each listing driver IDs in dimension order. Name-key
+    matches are filtered by the driver rules of the requested year and cached
+    per (key, year) until another driver is added.
+    """
+
+    def __init__(self):
+        self.size = 0
+        self._names = {}
+        self._by_lower = defaultdict(list)
+        self._by_normalized = {}
+        self._by_name_key = defaultdict(list)
+        self._era_matches = {}
+
+    def add(self, driver_id, driver_info):
+        self.size += 1
+        driver_name = driver_info.get('driver_name')
+        if driver_name is None:
+            return
+        self._names[driver_id] = driver_name
+        self._by_lower[driver_name.lower()].append(driver_id)
+        self._by_normalized.setdefault(normalize_driver_name(driver_name), driver_id)
+        self._by_name_key[driver_name_key(driver_name)].append(driver_id)
+        self._era_matches.clear()
 
+    def find_exact(self, driver_name, year):
+        """First driver with this name (case-insensitive), or the rule table's driver for that year"""
+        if has_driver_rules(driver_name):
+            driver_id = rule_driver_id(driver_name, year)
+            return driver_id if driver_id in self._names else None
+        candidates = self._by_lower.get(driver_name.lower())
+        return candidates[0] if candidates else None
+
+    def find_normalized(self, driver_name):
+        """First driver whose normalized name matches"""
+        return self._by_normalized.get(normalize_driver_name(driver_name))
+
+    def find_variant(self, driver_name, year):
+        """Last driver whose name is a permutation of driver_name and who raced in `year`"""
+        name_key = driver_name_key(driver_name)
+        era_key = (name_key, int(year))
+        if era_key not in self._era_matches:
+            match = None
+            for driver_id in reversed(self._by_name_key.get(name_key, [])):
+                known_name = self._names[driver_id]
+                if not has_driver_rules(known_name) or rule_driver_id(known_name, year) == driver_id:
+                    match = driver_id
+                    break
+            self._era_matches[era_key] = match
+        return self._era_matches[era_key]
+
+_driver_indexes = {}
+
+def driver_index(drivers):
+    """Shared DriverIndex of a driver dict, extended as drivers are appended to it"""
+    entry = _driver_indexes.get(id(drivers))
+    if entry is None or entry[0] is not drivers or len(drivers) < entry[1].size:
+        entry = _driver_indexes[id(drivers)] = (drivers, DriverIndex())
+    index = entry[1]
+    if len(drivers) > index.size:
+        for driver_id, driver_info in itertools.islice(drivers.items(), index.size, None):
+            index.add(driver_id, driver_info)
+    return index
+
+def known_driver_id(driver_name, year, drivers):
+    """driver_id of a name already in the drivers dimension, or None"""
+    # Drivers with multiple entries are resolved by era/year from the rule table
+    if has_driver_rules(driver_name):
+        return driver_index(drivers).find_exact(driver_name, year)
+    # Regular matching - the first normalized match, then any name order of the year's drivers
+    index = driver_index(drivers)
+    return index.find_normalized(driver_name) or index.find_variant(driver_name, year)
 
 def find_driver_id(driver_name, year, driver_cache, dimensions, missing_drivers):
     # Create cache key - include year for drivers with multiple entries
@@ -281,51 +503,10 @@ def find_driver_id(driver_name, year, driver_cache, dimensions, missing_drivers)
     if cache_key in driver_cache:
         return driver_cache[cache_key]
 
-    driver_id = None
-    normalized_name = normalize_driver_name(driver_name)
-
-    # Special handling for drivers with multiple entries based on era/year
-    if driver_name.lower() == "nelson piquet":
-        if int(year) <= 1991:
-            # Look for NELPIQ01 first (Sr.)
-            for d_id, d_info in dimensions['drivers'].items():
-                if d_info['driver_name'].lower() == driver_name.lower() and "01" in d_id:
-                    driver_id = d_id
-                    break
-        else:
-            # Look for NELPIQ02 (Jr.)
-            for d_id, d_info in dimensions['drivers'].items():
-                if d_info['driver_name'].lower() == driver_name.lower() and "02" in d_id:
-                    driver_id = d_id
-                    break
-    
-    elif driver_name.lower() == "robert doornbos":
-        if int(year) == 2005:
-            # Look for ROBDOO02 first (2005 Monaco)
-            for d_id, d_info in dimensions['drivers'].items():
-                if d_info['driver_name'].lower() == driver_name.lower() and "02" in d_id:
-                    driver_id = d_id
-                    break
-        else:
-            # Look for ROBDOO02 (2006+ Netherlands)
-            for d_id, d_info in dimensions['drivers'].items():
-                if d_info['driver_name'].lower() == driver_name.lower() and "01" in d_id:
-                    driver_id = d_id
-                    break
-    
-    else:
-        # Regular matching - just pick the first match found
-        for d_id, d_info in dimensions['drivers'].items():
-            if normalize_driver_name(d_info['driver_name']) == normalized_name:
-                driver_id = d_id
-                break
-                
-        # Also check in missing_drivers
-        if not driver_id:
-            for d_id, d_info in missing_drivers.items():
-                if normalize_driver_name(d_info['driver_name']) == normalized_name:
-                    driver_id = d_id
-                    break
+    # Known drivers first, then check missing_drivers (names sharing rules never match those)
+    driver_id = known_driver_id(driver_name, year, dimensions['drivers'])
+    if not driver_id and not has_driver_rules(driver_name):
+        driver_id = driver_index(missing_drivers).find_normalized(driver_name)
 
     # Create new entry if still no match
     if not driver_id:
@@ -341,6 +522,25 @@ def find_driver_id(driver_name, year, driver_cache, dimensions, missing_drivers)
     
     driver_cache[cache_key] = driver_id
     return driver_id
+
+class DimensionResolver:
+    """Driver and team IDs of the names met while building facts.
+
+    Unknown teams are added to the teams dimension right away; unknown
+    drivers are collected in missing_drivers and added by the caller once
+    every season is done.
+    """
+
+    def __init__(self, dimensions):
+        self.dimensions = dimensions
+        self.driver_cache = {}  # "driver_name|year" -> driver_id
+        self.missing_drivers = {}
+
+    def driver(self, driver_name, year):
+        return find_driver_id(driver_name, year, self.driver_cache, self.dimensions, self.missing_drivers)
+
+    def team(self, team_name):
+        return resolve_team(team_name, self.dimensions['teams'])
     
 def normalize_driver_name(name):
     """Standardize driver name format for consistent matching"""
@@ -348,3 +548,9 @@ def normalize_driver_name(name):
         return ""
     # Remove extra spaces, standardize case
     return " ".join(name.strip().split())
+
+# normalized lowercase name -> [(first_year, last_year, driver_id)], built once
+DRIVER_RULES = _index_driver_rules(driver_rules)
+
+# team_key of an alias -> team name it stands for
+TEAM_ALIASES = {team_key(alias): team_name for alias, team_name in team_aliases}
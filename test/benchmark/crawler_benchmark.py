@@ -0,0 +1,164 @@
+"""Offline crawler throughput benchmark.
+
+Serves the recorded pages in test/benchmark/fixtures from a local server and
+runs each crawler entry point against it in a fresh subprocess, reporting
+pages/s, request latency percentiles and peak RSS.
+
+    python test/benchmark/crawler_benchmark.py --latency-ms 20 --jitter-ms 10 --error-rate 0.01
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(os.path.dirname(BENCHMARK_DIR))
+sys.path.insert(0, BENCHMARK_DIR)
+sys.path.insert(0, REPO_ROOT)
+
+from fixture_server import FixtureServer
+from src.utils.crawl_telemetry import percentile
+
+ENTRY_POINTS = ["race", "drivers", "teams", "fastest_laps"]
+# Crawl reports of the last run per entry point; the crawl's work directory itself is removed
+TELEMETRY_DIR = os.getenv("F1_TELEMETRY_DIR", os.path.join(tempfile.gettempdir(), "f1_benchmark_telemetry"))
+
+def peak_rss_mb():
+    # ru_maxrss is reported in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+async def run_entry_point(entry, years):
+    """Run one crawler entry point in this process and measure it"""
+    import aiohttp
+    from src.utils import crawling_helpers
+
+    latencies = []
+    statuses = {}
+
+    async def on_request_start(session, ctx, params):
+        ctx.start = asyncio.get_running_loop().time()
+
+    async def on_request_end(session, ctx, params):
+        latencies.append(asyncio.get_running_loop().time() - ctx.start)
+        statuses[params.response.status] = statuses.get(params.response.status, 0) + 1
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_request_end.append(on_request_end)
+    crawling_helpers.session_trace_configs.append(trace_config)
+
+    start = time.perf_counter()
+    if entry == "race":
+        from src.crawler import f1_race
+        f1_race.years = years
+        await f1_race.scrape_race_async()
+    elif entry == "drivers":
+        from src.crawler import f1_drivers
+        f1_drivers.years = years
+        await f1_drivers.scrape_driver_async()
+    elif entry == "teams":
+        from src.crawler import f1_teams
+        f1_teams.years = years
+        await f1_teams.scrape_team_async()
+    elif entry == "fastest_laps":
+        from src.crawler import f1_fastest_laps
+        await f1_fastest_laps.collect_fastest_laps_data(years[0], years[-1])
+    elapsed = time.perf_counter() - start
+    telemetry_files = crawling_helpers.write_crawl_telemetry(os.path.join(os.path.abspath(TELEMETRY_DIR), entry))
+
+    pages = len(latencies)
+    return {
+        "entry": entry,
+        "pages": pages,
+        "non_200": sum(count for status, count in statuses.items() if status != 200),
+        "elapsed_s": round(elapsed, 3),
+        "pages_per_s": round(pages / elapsed, 2) if elapsed else None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2) if latencies else None,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "telemetry": telemetry_files,
+    }
+
+def run_child(args):
+    """Subprocess side: crawl into a throwaway data directory"""
+    years = [int(y) for y in args.child_years.split(",")]
+    work_dir = tempfile.mkdtemp(prefix="f1_bench_")
+    try:
+        # Crawlers resolve their data directories from the working directory at import time
+        os.chdir(work_dir)
+        result = asyncio.run(run_entry_point(args.child, years))
+    finally:
+        os.chdir(REPO_ROOT)
+        shutil.rmtree(work_dir, ignore_errors=True)
+    with open(args.result, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+
+async def run_benchmark(args):
+    years = ",".join(str(y) for y in range(args.last_year - args.years + 1, args.last_year + 1))
+    results = []
+
+    async with FixtureServer(args.latency_ms, args.jitter_ms, args.error_rate, seed=args.seed) as server:
+        env = dict(os.environ, F1_BASE_URL=server.base_url)
+        for entry in args.entry:
+            with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as tmp:
+                result_file = tmp.name
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, os.path.abspath(__file__), "--child", entry, "--child-years", years, "--result", result_file,
+                env=env,
+                stdout=None if args.verbose else asyncio.subprocess.DEVNULL,
+                stderr=None if args.verbose else asyncio.subprocess.DEVNULL,
+            )
+            await process.wait()
+            if process.returncode != 0:
+                print(f"{entry}: crawler exited with {process.returncode}")
+                continue
+            with open(result_file, "r", encoding="utf-8") as f:
+                results.append(json.load(f))
+            os.remove(result_file)
+
+        served, injected = server.requests, server.errors
+
+    print(f"\nServer: {served} requests, {injected} injected errors "
+          f"(latency {args.latency_ms}ms +/- {args.jitter_ms}ms, error rate {args.error_rate})")
+    print(f"{'entry':<14}{'pages':>7}{'non-200':>9}{'time s':>9}{'pages/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'RSS MB':>9}")
+    for r in results:
+        print(f"{r['entry']:<14}{r['pages']:>7}{r['non_200']:>9}{r['elapsed_s']:>9}{r['pages_per_s']:>9}"
+              f"{r['p50_ms']:>9}{r['p99_ms']:>9}{r['peak_rss_mb']:>9}")
+    if args.verbose:
+        for r in results:
+            print(f"{r['entry']} telemetry: {', '.join(r['telemetry'])}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline crawler throughput benchmark")
+    parser.add_argument("--entry", nargs="+", choices=ENTRY_POINTS, default=ENTRY_POINTS)
+    parser.add_argument("--years", type=int, default=2, help="number of seasons to crawl")
+    parser.add_argument("--last-year", type=int, default=2024)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--jitter-ms", type=float, default=5)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--verbose", action="store_true", help="show crawler output")
+    parser.add_argument("--child", choices=ENTRY_POINTS, help=argparse.SUPPRESS)
+    parser.add_argument("--child-years", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+    else:
+        asyncio.run(run_benchmark(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import asyncio
+import os
+import random
+from string import Template
+
+from aiohttp import web
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# (route pattern, fixture file) - mirrors the formula1.com URLs the crawlers request
+ROUTES = [
+    ("/en/results/{year}/races", "races.html"),
+    ("/en/results/{year}/races/{race_id}/{slug}/{session:.+}", "race.html"),
+    ("/en/results/{year}/drivers", "driver_standings.html"),
+    ("/en/results/{year}/drivers/{code}/{slug}", "driver_results.html"),
+    ("/en/drivers.html", "drivers_listing.html"),
+    ("/en/drivers/{slug}", "driver_profile.html"),
+    ("/en/results/{year}/team", "team_standings.html"),
+    ("/en/results/{year}/team/{code}", "team_results.html"),
+    ("/en/teams", "teams_listing.html"),
+    ("/en/teams/{code}", "team_profile.html"),
+    ("/en/results/{year}/awards/fastest-laps", "fastest_laps.html"),
+]
+
+def load_fixtures(fixtures_dir=FIXTURES_DIR):
+    """Read every recorded page into memory as a Template"""
+    fixtures = {}
+    for file_name in os.listdir(fixtures_dir):
+        if file_name.endswith(".html"):
+            with open(os.path.join(fixtures_dir, file_name), "r", encoding="utf-8") as f:
+                fixtures[file_name] = Template(f.read())
+    return fixtures
+
+class FixtureServer:
+    """Local aiohttp server replaying recorded formula1.com pages.
+
+    Every response is delayed by `latency_ms` +/- `jitter_ms`, and a share of
+    `error_rate` requests is answered with a 503 instead of the page.
+    """
+
+    def __init__(self, latency_ms=0, jitter_ms=0, error_rate=0.0, seed=0, host="127.0.0.1", port=0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.host = host
+        self.port = port
+        self.requests = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._fixtures = load_fixtures()
+        self._runner = None
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+
+    @web.middleware
+    async def _inject_faults(self, request, handler):
+        self.requests += 1
+        delay = self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        if self._random.random() < self.error_rate:
+            self.errors += 1
+            return web.Response(status=503, text="Service Unavailable")
+        return await handler(request)
+
+    def _handler(self, fixture_name):
+        template = self._fixtures[fixture_name]
+
+        async def handle(request):
+            values = dict(request.match_info)
+            slug = values.get("slug", "")
+            name = slug.replace("-", " ").title()
+            values.setdefault("race_id", "")
+            values.update({
+                "session_label": values.get("session", "race-result").replace("-", " ").replace("/", " ").title(),
+                "date": "01 - 03 Mar",
+                "circuit": f"{name} Circuit",
+                "city": name,
+            })
+            return web.Response(text=template.safe_substitute(values), content_type="text/html")
+
+        return handle
+
+    async def start(self):
+        """Start serving and return the base URL"""
+        app = web.Application(middlewares=[self._inject_faults])
+        for pattern, fixture_name in ROUTES:
+            app.router.add_get(pattern, self._handler(fixture_name))
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        # Resolve the ephemeral port when port=0
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self.base_url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,136 @@
+"""Fact building benchmark: serial vs season-parallel builds.
+
+Runs the transform's fact stage over an existing data directory once per
+season worker count and repetition, each in a fresh subprocess, and reports
+wall time, fact rows/s and peak RSS. --season-workers 0 4 builds the seasons
+in this process and in 4 processes (F1_TRANSFORM_SEASON_WORKERS). The fact
+tables of every run are hashed so the builds can be checked for identical
+output.
+
+    python test/benchmark/transform_benchmark.py --data-root . --season-workers 0 4 --repeat 3
+"""
+import argparse
+import hashlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(os.path.dirname(BENCHMARK_DIR))
+
+def peak_rss_mb():
+    # ru_maxrss is reported in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def run_child(args):
+    """Subprocess side: build dimensions untimed, then time the fact stage with one worker count"""
+    # The transform resolves its data directories from the working directory at import time
+    os.chdir(os.path.abspath(args.data_root))
+    sys.path[:0] = [os.path.join(REPO_ROOT, "src"), REPO_ROOT]
+    from transform import transform_data as td
+    from utils.country_list import country_list
+    from utils.key_registry import KeyRegistry
+    from utils.table_io import json_default
+
+    _, session_files, race_metadata = td.discover_sessions()
+    keys = KeyRegistry(None)
+    race_sessions_dims = td.extract_race_sessions_dimensions(session_files, race_metadata, keys)
+    dimensions = {
+        'races': race_sessions_dims['races'],
+        'sessions': race_sessions_dims['sessions'],
+        'drivers': td.extract_drivers_dimensions(),
+        'teams': td.extract_teams_dimensions(),
+        'countries': td.extract_countries_dimensions(country_list)
+    }
+
+    start = time.perf_counter()
+    fact_tables = td.transform_race_results_to_facts(session_files, dimensions, keys, season_workers=args.child)
+    elapsed = time.perf_counter() - start
+
+    digest = hashlib.sha256()
+    for table_name in sorted(fact_tables):
+        digest.update(json.dumps([table_name, fact_tables[table_name]], default=json_default).encode("utf-8"))
+    digest.update(json.dumps([dimensions['drivers'], dimensions['teams']], default=str).encode("utf-8"))
+
+    rows = sum(len(records) for records in fact_tables.values())
+    result = {
+        "workers": args.child,
+        "files": len(session_files),
+        "rows": rows,
+        "elapsed_s": round(elapsed, 3),
+        "rows_per_s": round(rows / elapsed) if elapsed else None,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "digest": digest.hexdigest(),
+    }
+    with open(args.result, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+
+def run_benchmark(args):
+    results = []
+    for _ in range(args.repeat):
+        for workers in args.season_workers:
+            with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as tmp:
+                result_file = tmp.name
+            # Keep the benchmark away from the persisted key registry
+            env = dict(os.environ, F1_KEY_REGISTRY="")
+            process = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", str(workers), "--data-root", args.data_root,
+                 "--result", result_file],
+                env=env,
+                stdout=None if args.verbose else subprocess.DEVNULL,
+                stderr=None if args.verbose else subprocess.DEVNULL,
+            )
+            if process.returncode != 0:
+                print(f"{workers} workers: transform exited with {process.returncode}")
+                continue
+            with open(result_file, "r", encoding="utf-8") as f:
+                results.append(json.load(f))
+            os.remove(result_file)
+
+    print(f"{'workers':<10}{'files':>7}{'rows':>9}{'time s':>9}{'rows/s':>10}{'RSS MB':>9}  digest")
+    for r in results:
+        print(f"{r['workers']:<10}{r['files']:>7}{r['rows']:>9}{r['elapsed_s']:>9}{r['rows_per_s']:>10}"
+              f"{r['peak_rss_mb']:>9}  {r['digest'][:12]}")
+
+    best = {}
+    for r in results:
+        if r['workers'] not in best or r['elapsed_s'] < best[r['workers']]['elapsed_s']:
+            best[r['workers']] = r
+    baseline = best.get(args.season_workers[0])
+    for workers, r in best.items():
+        if baseline and workers != baseline['workers'] and r['elapsed_s']:
+            print(f"\nBest of {args.repeat}: {workers} workers vs {baseline['workers']}: "
+                  f"speedup x{baseline['elapsed_s'] / r['elapsed_s']:.2f}")
+    digests = {r['digest'] for r in results}
+    if digests:
+        print("Output identical across runs" if len(digests) == 1 else "OUTPUT DIFFERS between runs")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Fact building benchmark: serial vs season-parallel builds")
+    parser.add_argument("--data-root", default=".", help="directory containing data/f1_race_data etc.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--season-workers", type=int, nargs="+", default=[0],
+                        help="season worker counts to compare (0: build seasons in one process)")
+    parser.add_argument("--verbose", action="store_true", help="show transform output")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        run_child(args)
+    else:
+        run_benchmark(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+from src.utils.table_io import iter_records, table_name
+
+TRANSFORM_SCRIPT = os.path.join(PROJECT_ROOT, "src", "transform", "transform_data.py")
+
+DRIVERS = [
+    ("Max Verstappen", "MAXVER01", "Red Bull Racing Honda RBPT"),
+    ("Lewis Hamilton", "LEWHAM01", "Mercedes"),
+    ("Charles Leclerc", "CHALEC01", "Ferrari"),
+    ("Lando Norris", "LANNOR01", "McLaren Mercedes"),
+    ("George Russell", "GEORUS01", "Mercedes"),
+    ("Carlos Sainz", "CARSAI01", "Ferrari"),
+]
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+def write_race(root, year, grand_prix, date, order=None):
+    """Raw files of one race weekend; `order` permutes the finishing order of DRIVERS"""
+    drivers = [DRIVERS[i] for i in (order or range(len(DRIVERS)))]
+    race_dir = os.path.join(root, "data", "f1_race_data", str(year), grand_prix)
+    _write_json(os.path.join(race_dir, "race_metadata.json"), {
+        "grand_prix": grand_prix.replace("_", " ").title(), "circuit": "Circuit", "city": "City",
+        "year": str(year), "date": date})
+    _write_json(os.path.join(race_dir, "qualifying.json"), {
+        "session_name": "Qualifying",
+        "header": ["POS", "NO", "DRIVER", "TEAM", "Q1", "Q2", "Q3", "LAPS"],
+        "data": [[str(pos), str(pos * 3), name, team, f"1:3{pos}.100", f"1:2{pos}.200" if pos <= 4 else "",
+                  f"1:1{pos}.300" if pos <= 2 else "", str(10 + pos)]
+                 for pos, (name, _, team) in enumerate(drivers, start=1)]})
+    _write_json(os.path.join(race_dir, "starting_grid.json"), {
+        "session_name": "Starting Grid",
+        "header": ["POS", "NO", "DRIVER", "TEAM", "TIME"],
+        "data": [[str(pos), str(pos * 3), name, team, f"1:1{pos}.300"]
+                 for pos, (name, _, team) in enumerate(drivers, start=1)]})
+    _write_json(os.path.join(race_dir, "race_result.json"), {
+        "session_name": "Race Result",
+        "header": ["POS", "NO", "DRIVER", "TEAM", "LAPS", "TIME / RETIRED", "PTS"],
+        "data": [[str(pos), str(pos * 3), name, team, "57", f"+{pos}.500s", str(max(0, 26 - 4 * pos))]
+                 for pos, (name, _, team) in enumerate(drivers, start=1)]})
+    _write_json(os.path.join(race_dir, "practice_1.json"), {
+        "session_name": "Practice 1",
+        "header": ["POS", "NO", "DRIVER", "TEAM", "TIME / GAP", "LAPS"],
+        "data": [[str(pos), str(pos * 3), name, team, f"1:3{pos}.000", "20"]
+                 for pos, (name, _, team) in enumerate(reversed(drivers), start=1)]})
+
+def write_raw_tree(root, races):
+    """Raw crawler output for `races` [(year, grand prix slug, date)] plus driver and team files"""
+    years = sorted({year for year, _, _ in races})
+    for year in years:
+        for name, code, team in DRIVERS:
+            _write_json(os.path.join(root, "data", "f1_drivers_data", str(year), name.lower().replace(" ", "_") + ".json"),
+                        {"name": name, "driver_code": code, "headers": [], "race_results": []})
+        for team in sorted({team for _, _, team in DRIVERS}):
+            _write_json(os.path.join(root, "data", "f1_teams_data", str(year), team.lower().replace(" ", "_") + ".json"),
+                        {"name": team, "headers": [], "race_results": []})
+    _write_json(os.path.join(root, "data", "f1_drivers_data", "race_standing.json"), {
+        "headers": ["POS", "DRIVER", "NATIONALITY", "TEAM", "PTS", "YEAR"],
+        "drivers": [[str(pos), name, "GBR", team, str(100 - pos), str(year)]
+                    for year in years for pos, (name, _, team) in enumerate(DRIVERS, start=1)]})
+    _write_json(os.path.join(root, "data", "f1_teams_data", "team_standing.json"), {
+        "headers": ["POS", "TEAM", "PTS", "YEAR"],
+        "teams": [[str(pos), team, str(300 - pos), str(year)]
+                  for year in years for pos, team in enumerate(sorted({team for _, _, team in DRIVERS}), start=1)]})
+    for year, grand_prix, date in races:
+        write_race(root, year, grand_prix, date)
+
+def run_transform(root, *args, **env):
+    """Run the transform script in `root` (the transform reads ./data) and return its log"""
+    process = subprocess.run(
+        [sys.executable, TRANSFORM_SCRIPT, *args], cwd=root,
+        env=dict(os.environ, PYTHONPATH=os.pathsep.join([os.path.join(PROJECT_ROOT, "src"), PROJECT_ROOT]), **env),
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    assert process.returncode == 0, process.stdout
+    return process.stdout
+
+def read_tables(root):
+    """{"dimensions/races": [records], "facts/race_results": [...], ...} of a transformed output"""
+    tables = {}
+    for group in ("dimensions", "facts"):
+        group_dir = os.path.join(root, "data", "transformed_data", group)
+        for entry in sorted(os.listdir(group_dir)):
+            tables[f"{group}/{table_name(entry) or entry}"] = list(iter_records(os.path.join(group_dir, entry)))
+    return tables
+
+@pytest.fixture
+def raw_tree(tmp_path):
+    """Root of a small raw data tree: two seasons of two races each"""
+    write_raw_tree(str(tmp_path), [
+        (2023, "bahrain", "03 - 05 Mar 2023"),
+        (2023, "monaco", "26 - 28 May 2023"),
+        (2024, "bahrain", "29 Feb - 02 Mar 2024"),
+        (2024, "las_vegas", "21 - 23 Nov 2024"),
+    ])
+    return str(tmp_path)
@@ -0,0 +1,64 @@
+import datetime
+import os
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+from src.utils.date_ranges import parse_date_range, parse_date
+
+date = datetime.date
+
+@pytest.mark.parametrize("text, expected", [
+    # Same-month weekends
+    ("25 - 27 Oct 2024", (date(2024, 10, 25), date(2024, 10, 27))),
+    ("01 - 03 Nov 2024", (date(2024, 11, 1), date(2024, 11, 3))),
+    ("1 - 3 Nov 2024", (date(2024, 11, 1), date(2024, 11, 3))),
+    ("25-27 Oct 2024", (date(2024, 10, 25), date(2024, 10, 27))),
+    ("25 – 27 Oct 2024", (date(2024, 10, 25), date(2024, 10, 27))),
+    # Weekends across a month or year boundary
+    ("29 Feb - 02 Mar 2024", (date(2024, 2, 29), date(2024, 3, 2))),
+    ("30 Jun - 02 Jul 2023", (date(2023, 6, 30), date(2023, 7, 2))),
+    ("30 Dec - 01 Jan 2022", (date(2021, 12, 30), date(2022, 1, 1))),
+    ("30 Dec 2021 - 01 Jan 2022", (date(2021, 12, 30), date(2022, 1, 1))),
+    # Single race days of older seasons
+    ("07 Apr 1985", (date(1985, 4, 7), date(1985, 4, 7))),
+    ("13 May 1950", (date(1950, 5, 13), date(1950, 5, 13))),
+    ("7 Apr 1985", (date(1985, 4, 7), date(1985, 4, 7))),
+    # Full, dotted and differently cased month names
+    ("25 - 27 October 2024", (date(2024, 10, 25), date(2024, 10, 27))),
+    ("03 Sept 2023", (date(2023, 9, 3), date(2023, 9, 3))),
+    ("03 Sep. 2023", (date(2023, 9, 3), date(2023, 9, 3))),
+    ("25 - 27 OCT 2024", (date(2024, 10, 25), date(2024, 10, 27))),
+    ("  07 Apr 1985 ", (date(1985, 4, 7), date(1985, 4, 7))),
+])
+def test_parse_date_range(text, expected):
+    assert parse_date_range(text) == expected
+
+@pytest.mark.parametrize("text", [
+    "TBC", "", None, "Oct 2024", "27 May", "25 - 27 Foo 2024", "31 Feb 2024", "29 Feb 2023", "32 - 33 Oct 2024",
+])
+def test_parse_date_range_rejects(text):
+    with pytest.raises(ValueError):
+        parse_date_range(text)
+
+def test_parse_date_range_iso_output():
+    start, end = parse_date_range("29 Feb - 02 Mar 2024")
+    assert (start.isoformat(), end.isoformat()) == ("2024-02-29", "2024-03-02")
+
+def test_parse_date_range_is_memoised():
+    parse_date_range.cache_clear()
+    first = parse_date_range("25 - 27 Oct 2024")
+    assert parse_date_range("25 - 27 Oct 2024") is first
+    assert parse_date_range.cache_info().hits == 1
+
+def test_parse_date_driver_results():
+    # Driver result dates are scraped as "27 May" with the season appended
+    assert parse_date("27 May 2024") == date(2024, 5, 27)
+    assert parse_date("05 Jul 1953") == date(1953, 7, 5)
+
+@pytest.mark.parametrize("text", ["25 - 27 Oct 2024", "27 May", "TBC"])
+def test_parse_date_rejects_ranges(text):
+    with pytest.raises(ValueError):
+        parse_date(text)
@@ -0,0 +1,38 @@
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(PROJECT_ROOT, "src"))
+from utils.tranform_helpers import driver_index, find_driver_id
+
+def drivers(*entries):
+    return {driver_id: {'driver_id': driver_id, 'driver_name': name} for driver_id, name in entries}
+
+def test_name_permutation_matches():
+    dimensions = {'drivers': drivers(('ZHOGUA01', 'Zhou Guanyu'), ('MAXVER01', 'Max Verstappen'))}
+    missing = {}
+    assert find_driver_id('Guanyu Zhou', 2023, {}, dimensions, missing) == 'ZHOGUA01'
+    assert driver_index(dimensions['drivers']).find_variant('Verstappen Max', 2023) == 'MAXVER01'
+    assert driver_index(dimensions['drivers']).find_variant(' Guanyu   Zhou ', '2023') == 'ZHOGUA01'
+    assert missing == {}
+
+def test_near_miss_is_a_new_driver():
+    dimensions = {'drivers': drivers(('ZHOGUA01', 'Zhou Guanyu'))}
+    missing = {}
+    index = driver_index(dimensions['drivers'])
+    assert index.find_variant('Guanyu Zhou Jr', 2023) is None
+    assert index.find_variant('Guanyo Zhou', 2023) is None
+    driver_id = find_driver_id('Guanyo Zhou', 2023, {}, dimensions, missing)
+    assert driver_id != 'ZHOGUA01'
+    assert missing[driver_id]['driver_name'] == 'Guanyo Zhou'
+
+def test_permutation_follows_the_driver_rules_of_the_year():
+    index = driver_index(drivers(('NELPIQ01', 'Nelson Piquet'), ('NELPIQ02', 'Nelson Piquet')))
+    assert index.find_variant('Piquet Nelson', 1985) == 'NELPIQ01'
+    assert index.find_variant('Piquet Nelson', 2008) == 'NELPIQ02'
+
+def test_cached_miss_is_dropped_when_a_driver_is_added():
+    known = drivers(('MAXVER01', 'Max Verstappen'))
+    assert driver_index(known).find_variant('Norris Lando', 2024) is None
+    known.update(drivers(('LANNOR01', 'Lando Norris')))
+    assert driver_index(known).find_variant('Norris Lando', 2024) == 'LANNOR01'
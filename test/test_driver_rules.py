@@ -0,0 +1,37 @@
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(PROJECT_ROOT, "src"))
+from utils.tranform_helpers import rule_driver_id, has_driver_rules, find_driver_id
+
+def drivers(*entries):
+    return {driver_id: {'driver_id': driver_id, 'driver_name': name} for driver_id, name in entries}
+
+def test_piquet_is_resolved_by_era():
+    assert rule_driver_id('Nelson Piquet', 1980) == 'NELPIQ01'
+    assert rule_driver_id('Nelson Piquet', 1991) == 'NELPIQ01'
+    assert rule_driver_id('Nelson Piquet', 1992) == 'NELPIQ02'
+    assert rule_driver_id('Nelson Piquet', '2008') == 'NELPIQ02'
+
+def test_doornbos_2005_entry_is_separate():
+    assert rule_driver_id('Robert Doornbos', 2005) == 'ROBDOO02'
+    assert rule_driver_id('Robert Doornbos', 2004) == 'ROBDOO01'
+    assert rule_driver_id('Robert Doornbos', 2006) == 'ROBDOO01'
+
+def test_rule_names_ignore_case_and_whitespace():
+    assert has_driver_rules('  nelson   PIQUET ')
+    assert rule_driver_id('  nelson   PIQUET ', 1990) == 'NELPIQ01'
+    assert not has_driver_rules('Nelson Piquet Jr.')
+    assert rule_driver_id('Max Verstappen', 2024) is None
+
+def test_find_driver_id_uses_the_rule_of_the_year():
+    dimensions = {'drivers': drivers(('NELPIQ01', 'Nelson Piquet'), ('NELPIQ02', 'Nelson Piquet'),
+                                     ('ROBDOO01', 'Robert Doornbos'), ('ROBDOO02', 'Robert Doornbos'))}
+    missing = {}
+    cache = {}
+    assert find_driver_id('Nelson Piquet', 1983, cache, dimensions, missing) == 'NELPIQ01'
+    assert find_driver_id('nelson piquet', 2008, cache, dimensions, missing) == 'NELPIQ02'
+    assert find_driver_id('Robert Doornbos', 2005, cache, dimensions, missing) == 'ROBDOO02'
+    assert find_driver_id('Robert Doornbos', 2006, cache, dimensions, missing) == 'ROBDOO01'
+    assert missing == {}
@@ -0,0 +1,40 @@
+import json
+import os
+import shutil
+from collections import Counter
+
+from conftest import run_transform, read_tables, write_race
+
+def row_multisets(tables):
+    return {name: Counter(json.dumps(record, sort_keys=True) for record in records) for name, records in tables.items()}
+
+def test_incremental_matches_full_transform(raw_tree, tmp_path_factory):
+    registry = os.path.join(raw_tree, "key_registry.sqlite")
+    log = run_transform(raw_tree, "--incremental", F1_KEY_REGISTRY=registry)
+    assert "No previous transform state, running a full transform" in log
+
+    # One race changes (finishing order swapped), one race is new
+    write_race(raw_tree, 2023, "monaco", "26 - 28 May 2023", order=[1, 0, 3, 2, 5, 4])
+    write_race(raw_tree, 2024, "monaco", "24 - 26 May 2024")
+    log = run_transform(raw_tree, "--incremental", F1_KEY_REGISTRY=registry)
+    assert "Incremental transform: 2 changed and 0 removed of 5 races" in log
+    incremental = read_tables(raw_tree)
+
+    # Full run over the same raw data, starting from the registry the incremental run left behind
+    full_root = str(tmp_path_factory.mktemp("full"))
+    shutil.copytree(os.path.join(raw_tree, "data"), os.path.join(full_root, "data"),
+                    ignore=shutil.ignore_patterns("transformed_data"))
+    full_registry = os.path.join(full_root, "key_registry.sqlite")
+    shutil.copy(registry, full_registry)
+    run_transform(full_root, F1_KEY_REGISTRY=full_registry)
+    full = read_tables(full_root)
+
+    assert sorted(incremental) == sorted(full)
+    assert row_multisets(incremental) == row_multisets(full)
+    assert len(incremental["dimensions/races"]) == 5
+
+def test_unchanged_inputs_keep_previous_output(raw_tree):
+    registry = os.path.join(raw_tree, "key_registry.sqlite")
+    run_transform(raw_tree, "--incremental", F1_KEY_REGISTRY=registry, F1_TRANSFORM_OUTPUT="ndjson")
+    log = run_transform(raw_tree, "--incremental", F1_KEY_REGISTRY=registry, F1_TRANSFORM_OUTPUT="ndjson")
+    assert "No raw inputs changed since the last transform, keeping previous output" in log
@@ -0,0 +1,117 @@
+import json
+import os
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+from src.utils.raw_storage import write_raw_json, read_raw_json, close_raw_storage, load_pack_index, \
+    iter_raw_files, rebuild_manifest, load_manifest, plan_raw_files, RawManifest, PACK_INDEX_SUFFIX, MANIFEST_NAME
+
+def session(rows):
+    return {"header": ["POS", "DRIVER"], "data": [[str(pos), name] for pos, name in enumerate(rows, start=1)],
+            "session_name": "Race Result"}
+
+@pytest.fixture
+def base_dir(tmp_path):
+    yield str(tmp_path)
+    close_raw_storage()
+
+def planned(base_dir, manifest=None):
+    return sorted((year, race, name) for year, race, name, _ in plan_raw_files(base_dir, nested=True, manifest=manifest))
+
+def test_packed_records_round_trip(base_dir):
+    first = os.path.join(base_dir, "2024", "bahrain", "race_result.json")
+    second = os.path.join(base_dir, "2024", "monaco", "race_result.json")
+    write_raw_json(first, session(["Max Verstappen"]), layout="packed")
+    write_raw_json(second, session(["Charles Leclerc"]), layout="packed")
+    close_raw_storage()
+
+    pack_path = os.path.join(base_dir, "2024.jsonl")
+    assert not os.path.exists(first)
+    assert sorted(load_pack_index(pack_path)) == ["bahrain/race_result.json", "monaco/race_result.json"]
+    assert read_raw_json(second) == session(["Charles Leclerc"])
+    assert sorted(name for _, _, name, _ in iter_raw_files(base_dir, nested=True)) == ["race_result.json"] * 2
+
+def test_rewritten_pack_record_is_compacted(base_dir):
+    path = os.path.join(base_dir, "2024", "bahrain", "race_result.json")
+    write_raw_json(path, session(["Max Verstappen"]), layout="packed")
+    close_raw_storage()
+    write_raw_json(path, session(["Lando Norris"]), layout="packed")
+    close_raw_storage()
+
+    with open(os.path.join(base_dir, "2024.jsonl"), "rb") as f:
+        assert len(f.readlines()) == 1
+    assert read_raw_json(path) == session(["Lando Norris"])
+
+def test_pack_index_is_rebuilt_when_stale(base_dir):
+    path = os.path.join(base_dir, "2024", "bahrain", "race_result.json")
+    write_raw_json(path, session(["Max Verstappen"]), layout="packed")
+    close_raw_storage()
+    pack_path = os.path.join(base_dir, "2024.jsonl")
+    os.remove(pack_path + PACK_INDEX_SUFFIX)
+    # A record cut short by an interrupted crawl is ignored
+    with open(pack_path, "ab") as f:
+        f.write(b'{"key":"monaco/race_result.json","data":{"hea')
+    assert list(load_pack_index(pack_path)) == ["bahrain/race_result.json"]
+    assert read_raw_json(path) == session(["Max Verstappen"])
+
+def test_zstd_round_trip(base_dir):
+    pytest.importorskip("zstandard")
+    path = os.path.join(base_dir, "2024", "bahrain", "race_result.json")
+    write_raw_json(path, session(["Max Verstappen"]), raw_format="json")
+    write_raw_json(path, session(["Oscar Piastri"]), raw_format="zstd")
+    assert not os.path.exists(path)
+    assert os.path.exists(path + ".zst")
+    assert read_raw_json(path) == session(["Oscar Piastri"])
+    assert [name for _, _, name, _ in iter_raw_files(base_dir, nested=True)] == ["race_result.json.zst"]
+
+def test_crawler_manifest_plans_the_transform(base_dir):
+    write_raw_json(os.path.join(base_dir, "2024", "bahrain", "race_result.json"), session(["Max Verstappen"]))
+    write_raw_json(os.path.join(base_dir, "2024", "monaco", "qualifying.json"), session(["Charles Leclerc"]),
+                   layout="packed")
+    close_raw_storage()
+
+    manifest = load_manifest(base_dir)
+    assert manifest is not None
+    assert planned(base_dir, manifest) == [("2024", "bahrain", "race_result.json"),
+                                           ("2024", "monaco", "qualifying.json")]
+    entry = manifest.get(os.path.join(base_dir, "2024", "monaco", "qualifying.json"))
+    assert (entry["race"], entry["rows"], entry["session_name"]) == ("monaco", 1, "Race Result")
+
+def test_rebuild_manifest_twice(base_dir):
+    write_raw_json(os.path.join(base_dir, "2023", "bahrain", "race_result.json"), session(["Max Verstappen"]),
+                   layout="packed")
+    write_raw_json(os.path.join(base_dir, "2024", "bahrain", "race_result.json"), session(["Max Verstappen"]))
+    with open(os.path.join(base_dir, "race_standing.json"), "w", encoding="utf-8") as f:
+        json.dump({"drivers": []}, f)
+    close_raw_storage()
+
+    first = rebuild_manifest(base_dir, nested=True)
+    # The manifest and pack index next to the packs are neither packs nor raw files
+    second = rebuild_manifest(base_dir, nested=True)
+    assert sorted(second.entries) == ["2023/bahrain/race_result.json", "2024/bahrain/race_result.json",
+                                      "race_standing.json"]
+    assert [(entry["path"], entry["content_hash"]) for entry in first.entries.values()] == \
+        [(entry["path"], entry["content_hash"]) for entry in second.entries.values()]
+    assert planned(base_dir) == [("2023", "bahrain", "race_result.json"), ("2024", "bahrain", "race_result.json")]
+
+def test_incomplete_manifest_falls_back_to_the_tree(base_dir, caplog):
+    write_raw_json(os.path.join(base_dir, "2024", "bahrain", "race_result.json"), session(["Max Verstappen"]))
+    close_raw_storage()
+    # Written outside the crawler (or after an interrupted crawl saved the manifest)
+    with open(os.path.join(base_dir, "2024", "bahrain", "qualifying.json"), "w", encoding="utf-8") as f:
+        json.dump(session(["Lando Norris"]), f)
+
+    with caplog.at_level("WARNING"):
+        assert load_manifest(base_dir) is None
+    assert "2024/bahrain/qualifying.json" in caplog.text
+    assert planned(base_dir) == [("2024", "bahrain", "qualifying.json"), ("2024", "bahrain", "race_result.json")]
+
+    # A listed file that no longer exists makes the manifest unusable as well
+    rebuild_manifest(base_dir, nested=True)
+    os.remove(os.path.join(base_dir, "2024", "bahrain", "race_result.json"))
+    assert load_manifest(base_dir) is None
+    assert RawManifest.load(base_dir) is not None
+    assert os.path.exists(os.path.join(base_dir, MANIFEST_NAME))
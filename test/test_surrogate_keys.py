@@ -0,0 +1,42 @@
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+from src.utils.key_registry import KeyRegistry
+from conftest import run_transform, read_tables
+
+def test_registry_keeps_assigned_ids():
+    keys = KeyRegistry(":memory:")
+    first = keys.get_id('races', 2024, 'bahrain')
+    second = keys.get_id('races', 2024, 'monaco')
+    assert (first, second) == (1, 2)
+    assert keys.get_id('races', 2024, 'bahrain') == first
+    assert keys.lookup('races', 2024, 'las_vegas') is None
+    assert keys.get_id('sessions', 'Race') == 1
+
+def test_registry_reloads_saved_ids(tmp_path):
+    path = str(tmp_path / "key_registry.sqlite")
+    keys = KeyRegistry(path)
+    keys.get_id('races', 2024, 'bahrain')
+    keys.get_id('races', 2024, 'são_paulo')
+    keys.close()
+
+    keys = KeyRegistry(path)
+    assert keys.lookup('races', 2024, 'são_paulo') == 2
+    assert keys.lookup('races', '2024', 'bahrain') is None
+    assert keys.get_id('races', 2025, 'bahrain') == 3
+    keys.close()
+
+def test_fresh_registry_ids_are_deterministic(raw_tree):
+    # Each run starts from an empty in-memory registry; differing hash seeds
+    # catch IDs that follow set or dict-of-hash iteration order
+    runs = []
+    for seed in ("1", "2"):
+        run_transform(raw_tree, F1_KEY_REGISTRY=":memory:", PYTHONHASHSEED=seed)
+        runs.append(read_tables(raw_tree))
+    first, second = runs
+    assert first["facts/qualifying_results"]
+    assert [record["qualifying_result_id"] for record in first["facts/qualifying_results"]] == \
+        [record["qualifying_result_id"] for record in second["facts/qualifying_results"]]
+    assert first == second
@@ -0,0 +1,94 @@
+import copy
+import json
+import os
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+from src.utils.table_io import write_table, iter_records, TABLE_SUFFIXES
+from src.transform.fact_records import FactRecord
+
+RACE_YEARS = {1: 2023, 2: 2023, 3: 2024}
+BY_YEAR = ('year', lambda record: RACE_YEARS.get(record['race_id']))
+# Files are stamped with this mtime after each write; a rewritten file gets a current one
+OLD_MTIME = 1_000_000_000
+
+def race_results():
+    return [{'race_result_id': race_id * 10 + pos, 'race_id': race_id, 'position': str(pos), 'points': 25.0 / pos}
+            for race_id in RACE_YEARS for pos in (1, 2, 3)]
+
+def part_files(table_dir):
+    return {part: os.path.join(table_dir, part, file_name)
+            for part in sorted(os.listdir(table_dir)) for file_name in os.listdir(os.path.join(table_dir, part))}
+
+def stamp(files):
+    for path in files.values():
+        os.utime(path, (OLD_MTIME, OLD_MTIME))
+
+def rewritten(files):
+    return sorted(part for part, path in files.items() if os.stat(path).st_mtime != OLD_MTIME)
+
+@pytest.fixture(params=["json", "ndjson", "parquet"])
+def fmt(request):
+    if request.param == "parquet":
+        pytest.importorskip("pyarrow")
+    return request.param
+
+def test_unchanged_partitions_are_not_rewritten(tmp_path, fmt):
+    directory = str(tmp_path)
+    table_dir = os.path.join(directory, "race_results")
+    manifest = {}
+    assert write_table(directory, "race_results", race_results(), fmt, partition=BY_YEAR, manifest=manifest) == 9
+    assert sorted(manifest) == ["year=2023", "year=2024"]
+    assert manifest["year=2023"]["file"] == f"race_results/year=2023/part-0{TABLE_SUFFIXES[fmt]}"
+    assert (manifest["year=2023"]["rows"], manifest["year=2024"]["rows"]) == (6, 3)
+    files = part_files(table_dir)
+    stamp(files)
+
+    # Identical records: same hashes, nothing rewritten
+    first = copy.deepcopy(manifest)
+    write_table(directory, "race_results", race_results(), fmt, partition=BY_YEAR, manifest=manifest)
+    assert manifest == first
+    assert rewritten(files) == []
+
+    # A change in one season only rewrites that season's file
+    records = race_results()
+    records[-1]['points'] = 0.0
+    write_table(directory, "race_results", records, fmt, partition=BY_YEAR, manifest=manifest)
+    assert manifest["year=2023"] == first["year=2023"]
+    assert manifest["year=2024"]["hash"] != first["year=2024"]["hash"]
+    assert rewritten(files) == ["year=2024"]
+    assert sorted(record['points'] for record in iter_records(files["year=2024"]))[0] == 0.0
+
+def test_removed_partitions_are_deleted(tmp_path, fmt):
+    directory = str(tmp_path)
+    manifest = {}
+    write_table(directory, "race_results", race_results(), fmt, partition=BY_YEAR, manifest=manifest)
+    records = [record for record in race_results() if RACE_YEARS[record['race_id']] == 2024]
+    write_table(directory, "race_results", records, fmt, partition=BY_YEAR, manifest=manifest)
+    assert sorted(manifest) == ["year=2024"]
+    assert sorted(os.listdir(os.path.join(directory, "race_results"))) == ["year=2024"]
+
+def test_missing_file_is_rewritten(tmp_path, fmt):
+    directory = str(tmp_path)
+    manifest = {}
+    write_table(directory, "race_results", race_results(), fmt, partition=BY_YEAR, manifest=manifest)
+    files = part_files(os.path.join(directory, "race_results"))
+    os.remove(files["year=2023"])
+    write_table(directory, "race_results", race_results(), fmt, partition=BY_YEAR, manifest=manifest)
+    assert os.path.exists(files["year=2023"])
+    assert len(list(iter_records(files["year=2023"]))) == 6
+
+def test_json_output_matches_json_dump(tmp_path):
+    records = race_results()
+    records[0]['driver'] = 'Sergio Pérez'
+    records[1]['sectors'] = [{'sector': 1, 'time': None}]
+    records[2] = {}
+    records_iter = (FactRecord.from_dict(record) for record in records)
+    assert write_table(str(tmp_path), "race_results", records_iter, "json") == len(records)
+    with open(tmp_path / "race_results.json", encoding="utf-8") as f:
+        assert f.read() == json.dumps(records, indent=2, ensure_ascii=False)
+    assert write_table(str(tmp_path), "race_results", [], "json") == 0
+    assert list(iter_records(str(tmp_path / "race_results.json"))) == []
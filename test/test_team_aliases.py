@@ -0,0 +1,35 @@
+import os
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(PROJECT_ROOT, "src"))
+from utils.team_aliases import team_aliases
+from utils.tranform_helpers import resolve_team, generate_team_id
+
+@pytest.mark.parametrize("alias, team_name", team_aliases)
+def test_alias_resolves_to_its_team(alias, team_name):
+    # Whichever spelling is seen first, both share the team name's ID and one dimension entry
+    for first, second in ((team_name, alias), (alias, team_name)):
+        teams = {}
+        team_id = resolve_team(first, teams)
+        assert resolve_team(second, teams) == team_id == generate_team_id(team_name)
+        assert teams == {team_id: {'team_id': team_id, 'team_name': team_name}}
+
+def test_alias_examples():
+    assert resolve_team('STR Ferrari', {}) == 'TOR-ROS-FER'
+    assert resolve_team('Red Bull Racing RBPT', {}) == 'RED-BUL-RAC-HON-RBP'
+
+def test_team_names_ignore_case_and_whitespace():
+    teams = {}
+    team_id = resolve_team('Toro Rosso Ferrari', teams)
+    assert resolve_team('  str   FERRARI ', teams) == team_id
+    assert resolve_team('toro rosso  ferrari', teams) == team_id
+    assert len(teams) == 1
+
+def test_unaliased_name_is_a_new_team():
+    teams = {}
+    team_id = resolve_team('Toro Rosso Ferrari', teams)
+    assert resolve_team('STR Ferrari Racing', teams) != team_id
+    assert len(teams) == 2